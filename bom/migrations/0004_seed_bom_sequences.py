@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:18
+
+from django.db import migrations
+
+
+def seed_bom_sequences(apps, schema_editor):
+    BOM = apps.get_model("bom", "BOM")
+    DocumentSequence = apps.get_model("master", "DocumentSequence")
+
+    # Highest number already issued per PO (BOM/{oa}/{0001})
+    last_numbers = {}
+    for po_id, bom_no in BOM.objects.values_list("po_id", "bom_no").iterator():
+        try:
+            number = int(bom_no.split("/")[-1])
+        except (AttributeError, IndexError, ValueError):
+            continue
+        if number > last_numbers.get(po_id, 0):
+            last_numbers[po_id] = number
+
+    DocumentSequence.objects.bulk_create(
+        [
+            DocumentSequence(doc_type="BOM", scope=str(po_id), last_number=number)
+            for po_id, number in last_numbers.items()
+        ],
+        batch_size=1000,
+    )
+
+
+def unseed_bom_sequences(apps, schema_editor):
+    DocumentSequence = apps.get_model("master", "DocumentSequence")
+    DocumentSequence.objects.filter(doc_type="BOM").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bom', '0003_alter_bomitem_options_bomitem_po_item_and_more'),
+        ('master', '0006_documentsequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_bom_sequences, unseed_bom_sequences),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bom', '0004_seed_bom_sequences'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BOMRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('changes', models.JSONField(default=dict)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+                ('bom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='bom.bom')),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bom_revisions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-version'],
+                'unique_together': {('bom', 'version')},
+            },
+        ),
+    ]
@@ -1,6 +1,7 @@
-from django.db import models, transaction
+from django.db import models
 from django.contrib.auth import get_user_model
 
+from master.sequences import allocate_numbers
 from po.models import PurchaseOrder, PurchaseOrderItem
 
 User = get_user_model()
@@ -23,27 +24,28 @@ class BOM(models.Model):
     def __str__(self):
         return self.bom_no
 
+    SEQUENCE_TYPE = "BOM"
+
     @classmethod
     def generate_bom_no(cls, po):
         """
         Generates BOM number like:
         BOM/OA-00123/0001
-        Uses po.oa_number as the reference segment.
+        Uses po.oa_number as the reference segment; numbered per PO.
         """
-        with transaction.atomic():
-            last_bom = (
-                cls.objects.select_for_update().filter(po=po).order_by("-id").first()
-            )
-
-            last_no = 0
-            if last_bom:
-                try:
-                    last_no = int(last_bom.bom_no.split("/")[-1])
-                except (IndexError, ValueError):
-                    last_no = 0
+        return cls.generate_bom_nos(po, 1)[0]
 
-            next_no = str(last_no + 1).zfill(4)
-            return f"BOM/{po.oa_number}/{next_no}"
+    @classmethod
+    def generate_bom_nos(cls, po, count):
+        """
+        Reserves `count` consecutive BOM numbers for `po` at once
+        (bulk imports). Call inside the transaction that saves the BOMs.
+        """
+        first = allocate_numbers(cls.SEQUENCE_TYPE, po.pk, count)
+        return [
+            f"BOM/{po.oa_number}/{str(number).zfill(4)}"
+            for number in range(first, first + count)
+        ]
 
 
 class BOMItem(models.Model):
@@ -74,3 +76,47 @@ class BOMItem(models.Model):
 
     def __str__(self):
         return f"{self.bom.bom_no} — [{self.po_item_id}] {self.item} ({self.material})"
+
+
+class BOMRevision(models.Model):
+    """
+    One saved change of a BOM, stored as a backward diff against the
+    state it replaced — only what is needed to undo it:
+
+      {"header":  {field: old value},
+       "added":   [item ids created by this change],
+       "changed": {item id: {field: old value}},
+       "removed": {item id: {every field of the removed row}}}
+
+    Earlier states are rebuilt by undoing revisions newest-first from the
+    current rows (see bom.revisions.bom_items_at) — no full copies.
+    """
+
+    bom = models.ForeignKey(BOM, on_delete=models.CASCADE, related_name="revisions")
+    version = models.PositiveIntegerField()
+    changes = models.JSONField(default=dict)
+    changed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="bom_revisions",
+    )
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-version"]
+        unique_together = ("bom", "version")
+
+    def __str__(self):
+        return f"{self.bom.bom_no} v{self.version}"
+
+    @property
+    def summary(self):
+        changes = self.changes
+        return {
+            "added": len(changes.get("added", [])),
+            "changed": len(changes.get("changed", {})),
+            "removed": len(changes.get("removed", {})),
+            "header": sorted(changes.get("header", {})),
+        }
@@ -0,0 +1,155 @@
+from decimal import Decimal
+
+from django.db.models import Max
+
+from suntech_erp.report_cache import schedule_data_version_bump
+
+from .models import BOMItem, BOMRevision
+
+ITEM_FIELDS = ("po_item_id", "item", "size", "quantity", "material", "remarks")
+
+
+def _json(value):
+    """Field value as stored in a revision (JSON-safe)."""
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def _item_values(item):
+    return {field: _json(getattr(item, field)) for field in ITEM_FIELDS}
+
+
+def _record_revision(bom, user, changes):
+    version = (bom.revisions.aggregate(last=Max("version"))["last"] or 0) + 1
+    return BOMRevision.objects.create(
+        bom=bom, version=version, changes=changes, changed_by=user
+    )
+
+
+# ------------------------------
+# SAVE (diff against current rows)
+# ------------------------------
+def sync_bom_items(bom, rows, user, header=None):
+    """
+    Makes the BOM's items match `rows` and records one revision.
+
+    `rows` is a list of dicts with "id" (None for a new row) and the
+    ITEM_FIELDS values; `header` optionally holds new BOM header values
+    (e.g. {"bom_date": date}). Rows are matched by id, so only real
+    changes are written: one bulk insert, one bulk update and one delete
+    at most. Call inside a transaction, with the BOM row locked.
+
+    Returns a list of error messages; nothing is written when it is
+    non-empty (items referenced by indents cannot be removed).
+    """
+    existing = {item.pk: item for item in bom.items.all()}
+
+    kept = set()
+    to_create = []
+    to_update = []
+    changed = {}
+
+    for row in rows:
+        values = {field: row[field] for field in ITEM_FIELDS}
+        item = existing.get(row.get("id"))
+
+        # Unknown or repeated id → a new row
+        if item is None or item.pk in kept:
+            to_create.append(BOMItem(bom=bom, **values))
+            continue
+
+        kept.add(item.pk)
+        old = {
+            field: _json(getattr(item, field))
+            for field, value in values.items()
+            if getattr(item, field) != value
+        }
+        if old:
+            for field in old:
+                setattr(item, field, values[field])
+            to_update.append(item)
+            changed[str(item.pk)] = old
+
+    removed_ids = [pk for pk in existing if pk not in kept]
+    if removed_ids:
+        linked = BOMItem.objects.filter(
+            pk__in=removed_ids, indent_sub_items__isnull=False
+        ).distinct()
+        errors = [
+            f"Cannot remove '{item.item}' ({item.material}) — "
+            "it is used in an indent."
+            for item in linked
+        ]
+        if errors:
+            return errors
+
+    header_changes = {}
+    for field, value in (header or {}).items():
+        if value is not None and getattr(bom, field) != value:
+            header_changes[field] = _json(getattr(bom, field))
+            setattr(bom, field, value)
+
+    if not (to_create or to_update or removed_ids or header_changes):
+        return []
+
+    if header_changes:
+        bom.save(update_fields=list(header_changes))
+    if removed_ids:
+        BOMItem.objects.filter(pk__in=removed_ids).delete()
+    if to_update:
+        BOMItem.objects.bulk_update(to_update, list(ITEM_FIELDS))
+
+    added_ids = []
+    if to_create:
+        created = BOMItem.objects.bulk_create(to_create)
+        added_ids = [item.pk for item in created]
+        if None in added_ids:
+            # MySQL does not return ids from bulk inserts
+            added_ids = list(
+                bom.items.exclude(pk__in=kept).values_list("pk", flat=True)
+            )
+    if to_create or to_update:
+        # Bulk writes send no post_save for the report cache
+        schedule_data_version_bump(BOMItem)
+
+    changes = {}
+    if header_changes:
+        changes["header"] = header_changes
+    if added_ids:
+        changes["added"] = added_ids
+    if changed:
+        changes["changed"] = changed
+    if removed_ids:
+        changes["removed"] = {
+            str(pk): _item_values(existing[pk]) for pk in removed_ids
+        }
+    _record_revision(bom, user, changes)
+    return []
+
+
+# ------------------------------
+# HISTORY
+# ------------------------------
+def bom_items_at(bom, version):
+    """
+    The BOM as it was right after revision `version` was saved:
+    (header values, {item id: item values}). Built from the current
+    rows by undoing every newer revision, newest first.
+    """
+    header = {"bom_date": _json(bom.bom_date)}
+    items = {item.pk: _item_values(item) for item in bom.items.all()}
+
+    for revision in bom.revisions.filter(version__gt=version).order_by("-version"):
+        changes = revision.changes
+        header.update(changes.get("header", {}))
+        for pk in changes.get("added", []):
+            items.pop(pk, None)
+        for pk, old in changes.get("changed", {}).items():
+            items[int(pk)].update(old)
+        for pk, values in changes.get("removed", {}).items():
+            items[int(pk)] = dict(values)
+
+    return header, items
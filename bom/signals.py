@@ -0,0 +1,37 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import BOM, BOMItem
+from po.rollup import schedule_rollup_refresh
+from suntech_erp.report_cache import schedule_data_version_bump
+
+
+@receiver(pre_save, sender=BOM)
+def remember_previous_po(sender, instance, **kwargs):
+    """
+    A BOM can be moved to another PO on edit — remember the old one
+    so its rollup is refreshed as well.
+    """
+    if instance.pk:
+        instance._previous_po_id = (
+            BOM.objects.filter(pk=instance.pk).values_list("po_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=BOM)
+@receiver(post_delete, sender=BOM)
+def refresh_po_rollup_on_bom_change(sender, instance, **kwargs):
+    """Keeps PORollup.has_bom in step with the PO's BOMs."""
+    schedule_rollup_refresh(instance.po_id)
+
+    previous_po_id = getattr(instance, "_previous_po_id", None)
+    if previous_po_id and previous_po_id != instance.po_id:
+        schedule_rollup_refresh(previous_po_id)
+
+
+@receiver(post_save, sender=BOM)
+@receiver(post_delete, sender=BOM)
+@receiver(post_save, sender=BOMItem)
+@receiver(post_delete, sender=BOMItem)
+def invalidate_cached_bom_reports(sender, **kwargs):
+    schedule_data_version_bump(sender)
@@ -1,3 +1,200 @@
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+
+from master import cache as master_cache
+from master.models import CompanyMaster
+from master.versions import get_version, model_label
+from po.models import PORollup, PurchaseOrder, PurchaseOrderItem
+
+from .models import BOM, BOMItem, BOMRevision
+from .revisions import bom_items_at, sync_bom_items
+from .views import BOM_REVISIONS_PER_PAGE
+
+User = get_user_model()
+
+
+class BOMTestCase(TestCase):
+    def setUp(self):
+        master_cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user("designer", password="x")
+            company = CompanyMaster.objects.create(code="ACM", code2="1", name="Acme")
+            self.po, self.other_po = [
+                PurchaseOrder.objects.create(
+                    po_number=number,
+                    oa_number=f"OA-{number}",
+                    company=company,
+                    po_date=datetime.date.today(),
+                    created_by=self.user,
+                )
+                for number in ("P1", "P2")
+            ]
+            self.po_item = PurchaseOrderItem.objects.create(
+                purchase_order=self.po,
+                material_code="M1",
+                material_description="Pump",
+                quantity="1",
+                quantity_value=1,
+                material_value=100,
+            )
+            self.bom = BOM.objects.create(
+                bom_no=BOM.generate_bom_no(self.po),
+                po=self.po,
+                bom_date=datetime.date(2025, 1, 1),
+                created_by=self.user,
+            )
+
+    def row(self, item, quantity="1", id=None, **values):
+        return {
+            "id": id,
+            "po_item_id": self.po_item.pk,
+            "item": item,
+            "size": values.get("size", ""),
+            "quantity": Decimal(quantity),
+            "material": values.get("material", "MS"),
+            "remarks": values.get("remarks", ""),
+        }
+
+    def sync(self, rows, header=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return sync_bom_items(self.bom, rows, self.user, header)
+
+
+class BOMRollupTests(BOMTestCase):
+    def has_bom(self, po):
+        return PORollup.objects.get(purchase_order=po).has_bom
+
+    def test_moving_a_bom_refreshes_both_pos(self):
+        self.assertTrue(self.has_bom(self.po))
+        self.assertFalse(self.has_bom(self.other_po))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bom.po = self.other_po
+            self.bom.save()
+
+        self.assertFalse(self.has_bom(self.po))
+        self.assertTrue(self.has_bom(self.other_po))
+
+
+class BOMNumberTests(BOMTestCase):
+    def test_bom_numbers_count_up_per_po(self):
+        self.assertEqual(self.bom.bom_no, "BOM/OA-P1/0001")
+        self.assertEqual(
+            BOM.generate_bom_nos(self.po, 2), ["BOM/OA-P1/0002", "BOM/OA-P1/0003"]
+        )
+        self.assertEqual(BOM.generate_bom_no(self.other_po), "BOM/OA-P2/0001")
+
+
+class SyncBOMItemsTests(BOMTestCase):
+    def test_history_round_trip(self):
+        self.assertEqual(self.sync([self.row("Shaft", "2"), self.row("Impeller")]), [])
+        v1 = bom_items_at(self.bom, 1)
+        shaft, impeller = self.bom.items.order_by("id")
+
+        self.sync(
+            [
+                self.row("Shaft", "3", id=shaft.pk),
+                self.row("Casing"),
+            ],
+            header={"bom_date": datetime.date(2025, 2, 1)},
+        )
+        v2 = bom_items_at(self.bom, 2)
+
+        self.sync([self.row("Casing", id=self.bom.items.get(item="Casing").pk)])
+
+        header, items = bom_items_at(self.bom, 1)
+        self.assertEqual((header, items), v1)
+        self.assertEqual(header, {"bom_date": "2025-01-01"})
+        self.assertEqual(
+            {pk: (row["item"], row["quantity"]) for pk, row in items.items()},
+            {shaft.pk: ("Shaft", "2.00"), impeller.pk: ("Impeller", "1.00")},
+        )
+        self.assertEqual(bom_items_at(self.bom, 2), v2)
+        self.assertEqual(
+            sorted(row["item"] for row in v2[1].values()), ["Casing", "Shaft"]
+        )
+
+        current = bom_items_at(self.bom, 3)
+        self.assertEqual([row["item"] for row in current[1].values()], ["Casing"])
+        self.assertEqual(self.bom.revisions.count(), 3)
+
+    def test_only_changes_are_written(self):
+        self.sync([self.row("Shaft"), self.row("Impeller")])
+        shaft, impeller = self.bom.items.order_by("id")
+
+        self.sync([self.row("Shaft", id=shaft.pk), self.row("Impeller", id=impeller.pk)])
+        self.assertEqual(self.bom.revisions.count(), 1)
+
+        self.sync([self.row("Shaft", "5", id=shaft.pk), self.row("Impeller", id=impeller.pk)])
+        revision = self.bom.revisions.get(version=2)
+        self.assertEqual(revision.changes, {"changed": {str(shaft.pk): {"quantity": "1.00"}}})
+        self.assertEqual(list(self.bom.items.order_by("id")), [shaft, impeller])
+
+    def test_repeated_id_becomes_a_new_row(self):
+        self.sync([self.row("Shaft")])
+        shaft = self.bom.items.get()
+
+        self.sync([self.row("Shaft", id=shaft.pk), self.row("Shaft copy", id=shaft.pk)])
+
+        self.assertEqual(self.bom.items.count(), 2)
+        self.assertEqual(self.bom.items.get(item="Shaft").pk, shaft.pk)
+
+
+class BOMReportCacheTests(BOMTestCase):
+    def test_bulk_writes_bump_report_version(self):
+        self.sync([self.row("Shaft")])
+        label = model_label(BOMItem)
+        version = get_version(label)
+
+        self.sync([self.row("Shaft", "4", id=self.bom.items.get().pk)])
+
+        self.assertEqual(get_version(label), version + 1)
+
+
+class BOMRevisionViewTests(BOMTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_past_version_shows_its_items(self):
+        self.sync([self.row("Shaft", "2"), self.row("Impeller")])
+        shaft = self.bom.items.get(item="Shaft")
+        self.sync(
+            [self.row("Shaft", "3", id=shaft.pk), self.row("Casing")],
+            header={"bom_date": datetime.date(2025, 2, 1)},
+        )
+
+        response = self.client.get(reverse("bom:bom_revision", args=[self.bom.pk, 1]))
+
+        self.assertEqual(response.context["bom_date"], datetime.date(2025, 1, 1))
+        self.assertEqual(
+            [(item["item"], item["quantity"]) for item in response.context["items"]],
+            [("Shaft", "2.00"), ("Impeller", "1.00")],
+        )
+        self.assertEqual(response.context["items"][0]["po_item"], self.po_item)
+
+    def test_unknown_version_is_not_found(self):
+        self.sync([self.row("Shaft")])
+
+        response = self.client.get(reverse("bom:bom_revision", args=[self.bom.pk, 2]))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_detail_pages_revisions_newest_first(self):
+        BOMRevision.objects.bulk_create(
+            BOMRevision(bom=self.bom, version=version, changed_by=self.user)
+            for version in range(1, BOM_REVISIONS_PER_PAGE + 6)
+        )
+        url = reverse("bom:bom_detail", args=[self.bom.pk])
+
+        first = self.client.get(url).context["revisions"]
+        last = self.client.get(url, {"page": 2}).context["revisions"]
 
-# Create your tests here.
+        self.assertEqual(len(first), BOM_REVISIONS_PER_PAGE)
+        self.assertEqual(first[0].version, BOM_REVISIONS_PER_PAGE + 5)
+        self.assertEqual([r.version for r in last], [5, 4, 3, 2, 1])
+        self.assertEqual(first.paginator.count, BOM_REVISIONS_PER_PAGE + 5)
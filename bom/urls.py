@@ -8,6 +8,11 @@ urlpatterns = [
     path("create/", views.bom_create, name="bom_create"),
     path("<int:pk>/edit/", views.bom_edit, name="bom_edit"),
     path("<int:pk>/", views.bom_detail, name="bom_detail"),
+    path(
+        "<int:pk>/revisions/<int:version>/",
+        views.bom_revision,
+        name="bom_revision",
+    ),
     path("<int:pk>/delete/", views.bom_delete, name="bom_delete"),
     # BOM REPORT
     path("report/", views.bom_report, name="bom_report"),
@@ -3,14 +3,25 @@ from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.db import transaction
 from django.contrib import messages
+from django.core.paginator import Paginator
 
 from .models import BOM, BOMItem
+from .revisions import bom_items_at, sync_bom_items
 from po.models import PurchaseOrder, PurchaseOrderItem
-from django.core.paginator import Paginator
 from django.db.models import Q, Count, Prefetch
 from datetime import datetime
-from django.template.loader import render_to_string
-from django.http import HttpResponse
+from decimal import Decimal, InvalidOperation
+from itertools import zip_longest
+from django.utils.dateparse import parse_date
+from django.utils.text import Truncator
+from suntech_erp.exports import stream_export, export_format, iter_queryset
+from jobs.utils import background_export
+from suntech_erp.pagination import paginate_list
+from suntech_erp.report_cache import cached_report, paginate_ids
+from suntech_erp.widgets import selected_choices
+
+# Revisions listed per page on the BOM detail page
+BOM_REVISIONS_PER_PAGE = 20
 
 
 # ======================================================
@@ -30,6 +41,8 @@ def bom_list(request):
             | Q(created_by__username__icontains=q)
         )
 
+    filtered_qs = qs
+
     qs = qs.annotate(
         # Count how many IndentSubItems reference any BOMItem of this BOM
         # items = related_name on BOMItem → bom
@@ -37,8 +50,7 @@ def bom_list(request):
         indent_link_count=Count("items__indent_sub_items", distinct=True),
     ).order_by("-id")
 
-    paginator = Paginator(qs, 20)
-    page_obj = paginator.get_page(request.GET.get("page"))
+    page_obj = paginate_list(request, qs, 20, count_queryset=filtered_qs)
 
     return render(request, "bom/bom_list.html", {"page_obj": page_obj, "q": q})
 
@@ -49,8 +61,6 @@ def bom_list(request):
 @login_required
 @transaction.atomic
 def bom_create(request):
-    purchase_orders = PurchaseOrder.objects.order_by("-id")
-
     if request.method == "POST":
         po_id = request.POST.get("purchase_order")
         bom_date = request.POST.get("bom_date")
@@ -73,7 +83,7 @@ def bom_create(request):
             created_by=request.user,
         )
 
-        # Parse and save BOM items from POST
+        # Parse and save BOM items from POST (recorded as version 1)
         _save_bom_items(request, bom)
 
         messages.success(request, f"BOM {bom.bom_no} created successfully.")
@@ -86,7 +96,8 @@ def bom_create(request):
             "mode": "create",
             "bom": None,
             "items": [],
-            "purchase_orders": purchase_orders,
+            # PO picker searches po:po_lookup — nothing is pre-selected
+            "purchase_orders": [],
             "po_items": [],
         },
     )
@@ -112,6 +123,47 @@ def bom_detail(request, pk):
             "bom": bom,
             "items": items,
             "indent_link_count": indent_link_count,
+            # Newest first, a page at a time — a BOM edited for years
+            # can have hundreds of revisions
+            "revisions": Paginator(
+                bom.revisions.select_related("changed_by"), BOM_REVISIONS_PER_PAGE
+            ).get_page(request.GET.get("page")),
+        },
+    )
+
+
+# ======================================================
+# BOM REVISION (read-only view of a past version)
+# ======================================================
+@login_required
+def bom_revision(request, pk, version):
+    bom = get_object_or_404(BOM.objects.select_related("po", "created_by"), pk=pk)
+    revision = get_object_or_404(
+        bom.revisions.select_related("changed_by"), version=version
+    )
+
+    header, rows = bom_items_at(bom, version)
+
+    # Same order as the detail page: by PO item, then id
+    po_items = PurchaseOrderItem.objects.in_bulk(
+        {row["po_item_id"] for row in rows.values()}
+    )
+    items = sorted(
+        (
+            dict(row, id=item_id, po_item=po_items.get(row["po_item_id"]))
+            for item_id, row in rows.items()
+        ),
+        key=lambda item: (item["po_item_id"] or 0, item["id"]),
+    )
+
+    return render(
+        request,
+        "bom/bom_revision.html",
+        {
+            "bom": bom,
+            "revision": revision,
+            "bom_date": parse_date(header["bom_date"] or ""),
+            "items": items,
         },
     )
 
@@ -126,14 +178,17 @@ def bom_edit(request, pk):
     items = bom.items.select_related("po_item").all()
 
     if request.method == "POST":
-        bom_date = request.POST.get("bom_date")
-        if bom_date:
-            bom.bom_date = bom_date
-            bom.save()
+        # Serialise concurrent edits of the same BOM
+        bom = BOM.objects.select_for_update().get(pk=bom.pk)
 
-        # Replace all items with freshly submitted ones
-        bom.items.all().delete()
-        _save_bom_items(request, bom)
+        # Reconcile submitted rows with existing ones (by id)
+        errors = _save_bom_items(
+            request, bom, bom_date=parse_date(request.POST.get("bom_date") or "")
+        )
+        if errors:
+            for error in errors:
+                messages.error(request, error)
+            return redirect("bom:bom_edit", pk=bom.id)
 
         messages.success(request, "BOM updated successfully.")
         return redirect("bom:bom_detail", pk=bom.id)
@@ -179,52 +234,72 @@ def bom_delete(request, pk):
 
 
 # ======================================================
-# BOM REPORT  — replace the existing bom_report view
+# BOM REPORT FILTERS & CACHED RESULTS
 # ======================================================
-@login_required
-def bom_report(request):
-    today = datetime.today().date()
+def _bom_report_filters(request):
+    """The BOM report filters from the query string; dates default to today."""
+    today = datetime.today().date().strftime("%Y-%m-%d")
+    return {
+        "date_from": request.GET.get("date_from") or today,
+        "date_to": request.GET.get("date_to") or today,
+        "po": request.GET.get("po", ""),
+        "bom_no": request.GET.get("bom_no", "").strip(),
+    }
+
+
+def _bom_report_lookups(filters):
+    lookups = {"bom_date__range": [filters["date_from"], filters["date_to"]]}
+    if filters["po"]:
+        lookups["po_id"] = filters["po"]
+    if filters["bom_no"]:
+        lookups["bom_no__icontains"] = filters["bom_no"]
+    return lookups
+
+
+def _bom_report_result(filters):
+    """Ids of the matching BOMs (newest first) and the summary, cached per filter set."""
+
+    def compute():
+        boms = BOM.objects.filter(**_bom_report_lookups(filters))
+        return {
+            "ids": list(boms.order_by("-id").values_list("pk", flat=True)),
+            "summary": boms.aggregate(
+                total_boms=Count("id"),
+                unique_pos=Count("po", distinct=True),
+                total_items=Count("items"),
+            ),
+        }
 
-    date_from = request.GET.get("date_from") or today.strftime("%Y-%m-%d")
-    date_to = request.GET.get("date_to") or today.strftime("%Y-%m-%d")
-    po_id = request.GET.get("po", "")
-    bom_no = request.GET.get("bom_no", "").strip()
+    return cached_report("bom_report", filters, (BOM, BOMItem), compute)
 
-    filters = {"bom_date__range": [date_from, date_to]}
-    if po_id:
-        filters["po_id"] = po_id
-    if bom_no:
-        filters["bom_no__icontains"] = bom_no
 
-    qs = (
-        BOM.objects.select_related("po", "created_by")
-        .filter(**filters)
-        .annotate(item_count=Count("items"))
-        .order_by("-id")
-    )
+# ======================================================
+# BOM REPORT  — replace the existing bom_report view
+# ======================================================
+@login_required
+def bom_report(request):
+    filters = _bom_report_filters(request)
+    result = _bom_report_result(filters)
 
-    summary = qs.aggregate(
-        total_boms=Count("id"),
-        unique_pos=Count("po", distinct=True),
-        total_items=Count("items"),
+    page_obj = paginate_ids(
+        request,
+        result["ids"],
+        BOM.objects.select_related("po", "created_by").annotate(
+            item_count=Count("items")
+        ),
+        20,
     )
 
-    paginator = Paginator(qs, 20)
-    page_obj = paginator.get_page(request.GET.get("page"))
-
     return render(
         request,
         "bom/bom_report.html",
         {
             "page_obj": page_obj,
-            "summary": summary,
-            "filters": {
-                "date_from": date_from,
-                "date_to": date_to,
-                "po": po_id,
-                "bom_no": bom_no,
-            },
-            "purchase_orders": PurchaseOrder.objects.order_by("-id"),
+            "summary": result["summary"],
+            "filters": filters,
+            "purchase_orders": selected_choices(
+                PurchaseOrder.objects.all(), filters["po"]
+            ),
             "q": "",
         },
     )
@@ -234,65 +309,101 @@ def bom_report(request):
 # BOM REPORT EXCEL  — replace the existing view
 # ======================================================
 @login_required
+@background_export
 def bom_report_excel(request):
-    today = datetime.today().date()
-
-    date_from = request.GET.get("date_from") or today.strftime("%Y-%m-%d")
-    date_to = request.GET.get("date_to") or today.strftime("%Y-%m-%d")
-    po_id = request.GET.get("po", "")
-    bom_no = request.GET.get("bom_no", "").strip()
-
-    filters = {"bom_date__range": [date_from, date_to]}
-    if po_id:
-        filters["po_id"] = po_id
-    if bom_no:
-        filters["bom_no__icontains"] = bom_no
+    filters = _bom_report_filters(request)
+    date_from = filters["date_from"]
+    date_to = filters["date_to"]
 
     boms = (
         BOM.objects.select_related("po", "created_by")
         .prefetch_related(
             Prefetch("items", queryset=BOMItem.objects.select_related("po_item"))
         )
-        .filter(**filters)
+        .filter(**_bom_report_lookups(filters))
         .order_by("-id")
     )
 
-    html = render_to_string(
-        "bom/bom_report_excel.html",
-        {"boms": boms},
-    )
+    # One row per BOM item, BOM-level info repeated for easy filtering in Excel
+    headers = [
+        "#",
+        "BOM No",
+        "BOM Date",
+        "PO No",
+        "OA No",
+        "Created By",
+        "PO Item",
+        "Item / Component",
+        "Size",
+        "Quantity",
+        "Material",
+        "Remarks",
+    ]
 
-    response = HttpResponse(html)
-    response["Content-Type"] = "application/vnd.ms-excel"
-    response["Content-Disposition"] = (
-        f'attachment; filename="BOM_Report_{date_from}_to_{date_to}.xls"'
+    def rows():
+        # The same ids the report page showed, when still cached
+        bom_ids = _bom_report_result(filters)["ids"]
+        for bom in iter_queryset(boms, pks=bom_ids):
+            bom_cells = [
+                bom.bom_no,
+                bom.bom_date,
+                bom.po.po_number,
+                bom.po.oa_number,
+                str(bom.created_by) if bom.created_by else "—",
+            ]
+            items = bom.items.all()
+            if not items:
+                yield ["—", *bom_cells, "No items in this BOM."]
+                continue
+
+            for counter, item in enumerate(items, start=1):
+                yield [
+                    counter,
+                    *bom_cells,
+                    f"{item.po_item.material_code or '—'} | "
+                    f"{Truncator(item.po_item.material_description).chars(50)}",
+                    item.item,
+                    item.size,
+                    item.quantity,
+                    item.material,
+                    item.remarks,
+                ]
+
+    return stream_export(
+        f"BOM_Report_{date_from}_to_{date_to}",
+        headers,
+        rows(),
+        title="BOM REPORT — Suntech ERP",
+        fmt=export_format(request),
     )
-    response["Pragma"] = "no-cache"
-    response["Expires"] = "0"
-    return response
 
 
 # ======================================================
 # HELPER
 # ======================================================
-def _save_bom_items(request, bom):
+def _save_bom_items(request, bom, bom_date=None):
     """
     Reads repeating POST arrays:
-      po_item_id[], item[], size[], quantity[], material[], remarks[]
-    and bulk-creates BOMItem rows.
+      bom_item_id[], po_item_id[], item[], size[], quantity[], material[], remarks[]
+    and reconciles them with the BOM's existing rows by id (bom_item_id
+    is blank for new rows): only changed rows are written, in bulk, and
+    the change is recorded as a BOM revision.
     Rows where po_item_id/item/quantity/material are blank are skipped.
+    Returns a list of error messages (nothing saved when non-empty).
     """
-    items_data = zip(
+    items_data = zip_longest(
+        request.POST.getlist("bom_item_id[]"),
         request.POST.getlist("po_item_id[]"),
         request.POST.getlist("item[]"),
         request.POST.getlist("size[]"),
         request.POST.getlist("quantity[]"),
         request.POST.getlist("material[]"),
         request.POST.getlist("remarks[]"),
+        fillvalue="",
     )
 
-    to_create = []
-    for po_item_id, item, size, quantity, material, remarks in items_data:
+    rows = []
+    for bom_item_id, po_item_id, item, size, quantity, material, remarks in items_data:
         po_item_id = po_item_id.strip()
         item = item.strip()
         quantity = quantity.strip()
@@ -302,20 +413,27 @@ def _save_bom_items(request, bom):
         if not po_item_id or not item or not quantity or not material:
             continue
 
-        to_create.append(
-            BOMItem(
-                bom=bom,
-                po_item_id=po_item_id,
-                item=item,
-                size=size.strip(),
-                quantity=quantity or 0,
-                material=material,
-                remarks=remarks.strip(),
-            )
+        try:
+            quantity = Decimal(quantity)
+            po_item_id = int(po_item_id)
+        except (InvalidOperation, ValueError):
+            continue
+
+        bom_item_id = bom_item_id.strip()
+        rows.append(
+            {
+                "id": int(bom_item_id) if bom_item_id.isdigit() else None,
+                "po_item_id": po_item_id,
+                "item": item,
+                "size": size.strip(),
+                "quantity": quantity,
+                "material": material,
+                "remarks": remarks.strip(),
+            }
         )
 
-    if to_create:
-        BOMItem.objects.bulk_create(to_create)
+    header = {"bom_date": bom_date} if bom_date else None
+    return sync_bom_items(bom, rows, request.user, header=header)
 
 
 @login_required
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class IndentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'indent'
+
+    def ready(self):
+        import indent.signals
@@ -3,6 +3,7 @@ from django.forms import inlineformset_factory, BaseInlineFormSet
 
 from .models import Indent, IndentItem
 from po.models import PurchaseOrder, PurchaseOrderItem, POProcess
+from suntech_erp.widgets import LookupSelect
 
 INDENT_PROCESS_IDS = [13, 18, 23]
 
@@ -20,7 +21,9 @@ class IndentForm(forms.ModelForm):
             "remarks",
         ]
         widgets = {
-            "purchase_order": forms.Select(attrs={"class": "form-control po-select"}),
+            "purchase_order": LookupSelect(
+                "po:po_lookup", attrs={"class": "form-control po-select"}
+            ),
             "po_process": forms.Select(
                 attrs={"class": "form-control po-process-select"}
             ),
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:18
+
+from django.db import migrations
+
+
+def seed_indent_sequences(apps, schema_editor):
+    Indent = apps.get_model("indent", "Indent")
+    DocumentSequence = apps.get_model("master", "DocumentSequence")
+
+    # Highest number already issued per department process
+    # (IND/{oa}/{CODE}/{0001})
+    last_numbers = {}
+    for process_id, indent_number in Indent.objects.values_list(
+        "po_process__department_process_id", "indent_number"
+    ).iterator():
+        try:
+            number = int(indent_number.split("/")[-1])
+        except (AttributeError, IndexError, ValueError):
+            continue
+        if number > last_numbers.get(process_id, 0):
+            last_numbers[process_id] = number
+
+    DocumentSequence.objects.bulk_create(
+        [
+            DocumentSequence(
+                doc_type="IND", scope=str(process_id), last_number=number
+            )
+            for process_id, number in last_numbers.items()
+        ],
+        batch_size=1000,
+    )
+
+
+def unseed_indent_sequences(apps, schema_editor):
+    DocumentSequence = apps.get_model("master", "DocumentSequence")
+    DocumentSequence.objects.filter(doc_type="IND").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indent', '0002_remove_indent_status_alter_indent_indent_number_and_more'),
+        ('master', '0006_documentsequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_indent_sequences, unseed_indent_sequences),
+    ]
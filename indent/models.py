@@ -1,6 +1,7 @@
 from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
+from master.sequences import allocate_numbers
 from po.models import PurchaseOrder, PurchaseOrderItem, POProcess
 from bom.models import BOMItem
 
@@ -62,40 +63,39 @@ class Indent(models.Model):
     def __str__(self):
         return self.indent_number
 
+    SEQUENCE_TYPE = "IND"
+
+    @classmethod
+    def generate_indent_numbers(cls, purchase_order, po_process, count):
+        """
+        Reserves `count` consecutive indent numbers like
+        IND/{oa_number}/{CODE}/0001. Numbering runs per department
+        process (across POs). Call inside the transaction that saves
+        the indents.
+        """
+        department_process = po_process.department_process
+
+        indent_code = department_process.code.strip().upper()
+        if not indent_code:
+            raise ValueError(
+                f"Process '{department_process.name}' has no code set. "
+                "Please set a code in the Department Process Master."
+            )
+
+        first = allocate_numbers(cls.SEQUENCE_TYPE, department_process.pk, count)
+        return [
+            f"IND/{purchase_order.oa_number}/{indent_code}/{str(number).zfill(4)}"
+            for number in range(first, first + count)
+        ]
+
     def save(self, *args, **kwargs):
-        if not self.indent_number:
-            process_id = self.po_process.department_process_id
-
-            indent_code = self.po_process.department_process.code.strip().upper()
-            if not indent_code:
-                raise ValueError(
-                    f"Process '{self.po_process.department_process.name}' has no code set. "
-                    "Please set a code in the Department Process Master."
-                )
-
-            oa_number = self.purchase_order.oa_number
-
-            with transaction.atomic():
-                last_indent = (
-                    Indent.objects.select_for_update()
-                    .filter(po_process__department_process_id=process_id)
-                    .order_by("-id")
-                    .first()
-                )
-
-                if last_indent and last_indent.indent_number:
-                    try:
-                        last_no = int(last_indent.indent_number.split("/")[-1])
-                    except (IndexError, ValueError):
-                        last_no = 0
-                else:
-                    last_no = 0
-
-                self.indent_number = (
-                    f"IND/{oa_number}/{indent_code}/{str(last_no + 1).zfill(4)}"
-                )
-
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if not self.indent_number:
+                self.indent_number = self.generate_indent_numbers(
+                    self.purchase_order, self.po_process, 1
+                )[0]
+
+            super().save(*args, **kwargs)
 
 
 class IndentItem(models.Model):
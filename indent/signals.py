@@ -0,0 +1,32 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Indent
+from po.rollup import schedule_rollup_refresh
+from suntech_erp.report_cache import schedule_data_version_bump
+
+
+@receiver(pre_save, sender=Indent)
+def remember_previous_po(sender, instance, **kwargs):
+    """
+    An indent can be moved to another PO on edit — remember the old one
+    so its rollup is refreshed as well.
+    """
+    if instance.pk:
+        instance._previous_po_id = (
+            Indent.objects.filter(pk=instance.pk)
+            .values_list("purchase_order_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Indent)
+@receiver(post_delete, sender=Indent)
+def refresh_po_rollup_on_indent_change(sender, instance, **kwargs):
+    """Keeps PORollup.has_indent in step with the PO's indents."""
+    schedule_rollup_refresh(instance.purchase_order_id)
+    schedule_data_version_bump(Indent)
+
+    previous_po_id = getattr(instance, "_previous_po_id", None)
+    if previous_po_id and previous_po_id != instance.purchase_order_id:
+        schedule_rollup_refresh(previous_po_id)
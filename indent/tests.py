@@ -1,3 +1,210 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from bom.models import BOM, BOMItem
+from bom.revisions import sync_bom_items
+from master import cache as master_cache
+from master.models import CompanyMaster, DepartmentProcessMaster, ProcessStatusMaster
+from po.models import POProcess, PurchaseOrder, PurchaseOrderItem
+
+from .models import Indent, IndentItem
+from .views import _indent_report_result, _save_sub_items
+
+User = get_user_model()
+
+
+class IndentTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        master_cache.clear()
+        self.today = datetime.date.today()
+        with self.captureOnCommitCallbacks(execute=True):
+            ProcessStatusMaster.objects.create(name="PENDING")
+            DepartmentProcessMaster.objects.create(
+                department="Production", name="Cutting", sequence=1, code="raw"
+            )
+            company = CompanyMaster.objects.create(code="ACM", code2="1", name="Acme")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user("storekeeper", password="x")
+            self.po, self.other_po = [
+                PurchaseOrder.objects.create(
+                    po_number=number,
+                    oa_number=f"OA-{number}",
+                    company=company,
+                    po_date=self.today,
+                    created_by=self.user,
+                )
+                for number in ("P1", "P2")
+            ]
+            self.po_item, other_po_item = [
+                PurchaseOrderItem.objects.create(
+                    purchase_order=po,
+                    material_code="M1",
+                    material_description="Pump",
+                    quantity="1",
+                    quantity_value=1,
+                    material_value=100,
+                )
+                for po in (self.po, self.other_po)
+            ]
+            self.bom_item, self.other_bom_item = [
+                BOMItem.objects.create(
+                    bom=BOM.objects.create(
+                        bom_no=BOM.generate_bom_no(po_item.purchase_order),
+                        po=po_item.purchase_order,
+                        bom_date=self.today,
+                        created_by=self.user,
+                    ),
+                    po_item=po_item,
+                    item="Shaft",
+                    quantity=2,
+                    material="EN8",
+                )
+                for po_item in (self.po_item, other_po_item)
+            ]
+            self.indent = self.create_indent()
+            self.indent_item = IndentItem.objects.create(
+                indent=self.indent,
+                purchase_order_item=self.po_item,
+                required_quantity=1,
+                uom="NOS",
+            )
+
+    def create_indent(self):
+        return Indent.objects.create(
+            indent_date=self.today,
+            purchase_order=self.po,
+            po_process=POProcess.objects.get(purchase_order=self.po),
+            created_by=self.user,
+        )
+
+
+class SaveSubItemsTests(IndentTestCase):
+    def save(self, rows, is_create=False):
+        """
+        Posts `rows` (dicts of sub-item fields, "id" for an existing row)
+        for the indent's one item, as the indent form does.
+        """
+        post = {"sub_item_count-0": str(len(rows))}
+        for index, row in enumerate(rows):
+            for field, value in row.items():
+                key = "sub_item" if field == "item" else f"sub_{field}"
+                post[f"{key}-0-{index}"] = str(value)
+        formset = SimpleNamespace(
+            instance=self.indent,
+            forms=[SimpleNamespace(instance=self.indent_item)],
+            deleted_forms=[],
+        )
+        _save_sub_items(post, formset, is_create=is_create)
+        return list(self.indent_item.sub_items.order_by("id"))
+
+    def test_create(self):
+        subs = self.save(
+            [
+                {"item": "Shaft", "quantity": "2", "material": "EN8", "bom_item_id": self.bom_item.pk},
+                {"item": "", "quantity": "", "material": ""},
+                {"item": "Bolt", "quantity": "abc", "material": "SS"},
+            ],
+            is_create=True,
+        )
+
+        self.assertEqual(
+            [(s.item, s.quantity, s.bom_item_id) for s in subs],
+            [("Shaft", Decimal("2"), self.bom_item.pk), ("Bolt", Decimal("0"), None)],
+        )
+
+    def test_edit_reconciles_by_id(self):
+        shaft, bolt = self.save(
+            [
+                {"item": "Shaft", "quantity": "2", "material": "EN8"},
+                {"item": "Bolt", "quantity": "4", "material": "SS"},
+            ],
+            is_create=True,
+        )
+
+        subs = self.save(
+            [
+                {"id": shaft.pk, "item": "Shaft", "quantity": "2", "material": "EN8"},
+                {"id": bolt.pk, "item": "Bolt", "quantity": "6", "material": "SS"},
+                {"item": "Nut", "quantity": "6", "material": "SS"},
+            ]
+        )
+        self.assertEqual(
+            [(s.pk, s.item, s.quantity) for s in subs[:2]],
+            [(shaft.pk, "Shaft", Decimal("2")), (bolt.pk, "Bolt", Decimal("6"))],
+        )
+        self.assertEqual(subs[2].item, "Nut")
+
+        subs = self.save(
+            [{"id": bolt.pk, "item": "Bolt", "quantity": "6", "material": "SS"}]
+        )
+        self.assertEqual([s.pk for s in subs], [bolt.pk])
+
+    def test_edit_without_rows_leaves_sub_items(self):
+        self.save([{"item": "Shaft", "quantity": "2", "material": "EN8"}], is_create=True)
+
+        self.assertEqual(len(self.save([])), 1)
+
+    def test_bom_item_of_another_po_is_dropped(self):
+        (sub,) = self.save(
+            [
+                {
+                    "item": "Shaft",
+                    "quantity": "2",
+                    "material": "EN8",
+                    "bom_item_id": self.other_bom_item.pk,
+                }
+            ],
+            is_create=True,
+        )
+        self.assertIsNone(sub.bom_item_id)
+
+    def test_linked_bom_item_cannot_be_removed(self):
+        self.save(
+            [{"item": "Shaft", "quantity": "2", "material": "EN8", "bom_item_id": self.bom_item.pk}],
+            is_create=True,
+        )
+
+        errors = sync_bom_items(self.bom_item.bom, [], self.user)
+
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(BOMItem.objects.filter(pk=self.bom_item.pk).exists())
+        self.assertFalse(self.bom_item.bom.revisions.exists())
+
+
+class IndentNumberTests(IndentTestCase):
+    def test_numbers_count_up_per_process(self):
+        self.assertEqual(self.indent.indent_number, "IND/OA-P1/RAW/0001")
+        self.assertEqual(self.create_indent().indent_number, "IND/OA-P1/RAW/0002")
+        self.assertEqual(
+            Indent.generate_indent_numbers(self.po, self.indent.po_process, 2),
+            ["IND/OA-P1/RAW/0003", "IND/OA-P1/RAW/0004"],
+        )
+
+
+@override_settings(REPORT_CACHE_TIMEOUT=60)
+class IndentReportCacheTests(IndentTestCase):
+    def ids(self):
+        filters = {
+            "date_from": str(self.today),
+            "date_to": str(self.today),
+            "purchase_order": "",
+            "indent_no": "",
+        }
+        return _indent_report_result(filters)["ids"]
+
+    def test_saved_and_deleted_indents_invalidate_results(self):
+        self.assertEqual(self.ids(), [self.indent.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second = self.create_indent()
+        self.assertEqual(self.ids(), [second.pk, self.indent.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual(self.ids(), [self.indent.pk])
@@ -8,11 +8,15 @@ from .forms import IndentForm, IndentItemFormSet
 from po.models import PurchaseOrder, POProcess, PurchaseOrderItem
 from bom.models import BOM, BOMItem
 
-from django.http import JsonResponse, HttpResponse
-from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.db.models import Q, Count
-from django.template.loader import render_to_string
+from suntech_erp.exports import stream_export, export_format, iter_queryset
+from jobs.utils import background_export
+from suntech_erp.pagination import paginate_list
+from suntech_erp.report_cache import cached_report, paginate_ids
+from suntech_erp.widgets import selected_choices
 from datetime import datetime
+from decimal import Decimal, InvalidOperation
 
 
 # ======================================================
@@ -38,13 +42,14 @@ def indent_list(request):
             | Q(created_by__username__icontains=q)
         )
 
+    filtered_qs = qs
+
     qs = qs.annotate(
         item_count=Count("items", distinct=True),
         sub_item_count=Count("items__sub_items", distinct=True),
     ).order_by("-id")
 
-    paginator = Paginator(qs, 20)
-    page_obj = paginator.get_page(request.GET.get("page"))
+    page_obj = paginate_list(request, qs, 20, count_queryset=filtered_qs)
 
     return render(request, "indent/indent_list.html", {"page_obj": page_obj, "q": q})
 
@@ -300,56 +305,75 @@ def ajax_load_bom_items(request):
     return JsonResponse(data, safe=False)
 
 
+# ======================================================
+# INDENT REPORT FILTERS & CACHED RESULTS
+# ======================================================
+def _indent_report_filters(request):
+    """The indent report filters from the query string; dates default to today."""
+    today = datetime.today().date().strftime("%Y-%m-%d")
+    return {
+        "date_from": request.GET.get("date_from") or today,
+        "date_to": request.GET.get("date_to") or today,
+        "purchase_order": request.GET.get("purchase_order", ""),
+        "indent_no": request.GET.get("indent_no", "").strip(),
+    }
+
+
+def _indent_report_lookups(filters):
+    lookups = {"indent_date__range": [filters["date_from"], filters["date_to"]]}
+    if filters["purchase_order"]:
+        lookups["purchase_order_id"] = filters["purchase_order"]
+    if filters["indent_no"]:
+        lookups["indent_number__icontains"] = filters["indent_no"]
+    return lookups
+
+
+def _indent_report_result(filters):
+    """Ids of the matching indents (newest first) and the summary, cached per filter set."""
+
+    def compute():
+        indents = Indent.objects.filter(**_indent_report_lookups(filters))
+        return {
+            "ids": list(indents.order_by("-id").values_list("pk", flat=True)),
+            "summary": indents.aggregate(
+                total=Count("id"),
+                unique_pos=Count("purchase_order", distinct=True),
+            ),
+        }
+
+    return cached_report("indent_report", filters, (Indent,), compute)
+
+
 # ======================================================
 # INDENT REPORT
 # ======================================================
 @login_required
 def indent_report(request):
-    today = datetime.today().date()
-
-    date_from = request.GET.get("date_from") or today.strftime("%Y-%m-%d")
-    date_to = request.GET.get("date_to") or today.strftime("%Y-%m-%d")
-    po_id = request.GET.get("purchase_order", "")
-    indent_no = request.GET.get("indent_no", "").strip()
+    filters = _indent_report_filters(request)
+    result = _indent_report_result(filters)
 
-    filters = {"indent_date__range": [date_from, date_to]}
-    if po_id:
-        filters["purchase_order_id"] = po_id
-    if indent_no:
-        filters["indent_number__icontains"] = indent_no
-
-    qs = (
+    page_obj = paginate_ids(
+        request,
+        result["ids"],
         Indent.objects.select_related(
             "purchase_order",
             "po_process",
             "po_process__department_process",
             "created_by",
-        )
-        .filter(**filters)
-        .order_by("-id")
-    )
-
-    summary = qs.aggregate(
-        total=Count("id"),
-        unique_pos=Count("purchase_order", distinct=True),
+        ),
+        20,
     )
 
-    paginator = Paginator(qs, 20)
-    page_obj = paginator.get_page(request.GET.get("page"))
-
     return render(
         request,
         "indent/indent_report.html",
         {
             "page_obj": page_obj,
-            "summary": summary,
-            "filters": {
-                "date_from": date_from,
-                "date_to": date_to,
-                "purchase_order": po_id,
-                "indent_no": indent_no,
-            },
-            "purchase_orders": PurchaseOrder.objects.order_by("-id"),
+            "summary": result["summary"],
+            "filters": filters,
+            "purchase_orders": selected_choices(
+                PurchaseOrder.objects.all(), filters["purchase_order"]
+            ),
             "q": "",
         },
     )
@@ -359,19 +383,11 @@ def indent_report(request):
 # INDENT REPORT EXCEL
 # ======================================================
 @login_required
+@background_export
 def indent_report_excel(request):
-    today = datetime.today().date()
-
-    date_from = request.GET.get("date_from") or today.strftime("%Y-%m-%d")
-    date_to = request.GET.get("date_to") or today.strftime("%Y-%m-%d")
-    po_id = request.GET.get("purchase_order", "")
-    indent_no = request.GET.get("indent_no", "").strip()
-
-    filters = {"indent_date__range": [date_from, date_to]}
-    if po_id:
-        filters["purchase_order_id"] = po_id
-    if indent_no:
-        filters["indent_number__icontains"] = indent_no
+    filters = _indent_report_filters(request)
+    date_from = filters["date_from"]
+    date_to = filters["date_to"]
 
     indents = (
         Indent.objects.select_related(
@@ -384,23 +400,80 @@ def indent_report_excel(request):
             "items__purchase_order_item",
             "items__sub_items",
         )
-        .filter(**filters)
+        .filter(**_indent_report_lookups(filters))
         .order_by("-id")
     )
 
-    html = render_to_string(
-        "indent/indent_report_excel.html",
-        {"indents": indents},
-    )
+    # One row per sub-item, indent and item info repeated for filtering
+    headers = [
+        "Indent No",
+        "Indent Date",
+        "PO No",
+        "OA No",
+        "Process",
+        "Created By",
+        "#",
+        "PO Item",
+        "Required Qty",
+        "UOM",
+        "Item Remarks",
+        "Sub #",
+        "Component / Item",
+        "Size",
+        "Quantity",
+        "Material",
+        "Sub Remarks",
+        "Source",
+    ]
+
+    def rows():
+        # The same ids the report page showed, when still cached
+        indent_ids = _indent_report_result(filters)["ids"]
+        for indent in iter_queryset(indents, pks=indent_ids):
+            indent_cells = [
+                indent.indent_number,
+                indent.indent_date,
+                indent.purchase_order.po_number,
+                indent.purchase_order.oa_number,
+                indent.po_process.department_process.name,
+                str(indent.created_by) if indent.created_by else "—",
+            ]
+            items = indent.items.all()
+            if not items:
+                yield indent_cells + ["", "No items in this indent."]
+                continue
 
-    response = HttpResponse(html)
-    response["Content-Type"] = "application/vnd.ms-excel"
-    response["Content-Disposition"] = (
-        f'attachment; filename="Indent_Report_{date_from}_to_{date_to}.xls"'
+            for item_no, item in enumerate(items, start=1):
+                item_cells = [
+                    item_no,
+                    item.purchase_order_item.material_description,
+                    item.required_quantity,
+                    item.uom,
+                    item.remarks,
+                ]
+                sub_items = item.sub_items.all()
+                if not sub_items:
+                    yield indent_cells + item_cells + ["", "No sub-items"]
+                    continue
+
+                for sub_no, sub in enumerate(sub_items, start=1):
+                    yield indent_cells + item_cells + [
+                        sub_no,
+                        sub.item,
+                        sub.size,
+                        sub.quantity,
+                        sub.material,
+                        sub.remarks,
+                        "BOM" if sub.bom_item_id else "Manual",
+                    ]
+
+    return stream_export(
+        f"Indent_Report_{date_from}_to_{date_to}",
+        headers,
+        rows(),
+        title="INDENT REPORT — Suntech ERP",
+        fmt=export_format(request),
     )
-    response["Pragma"] = "no-cache"
-    response["Expires"] = "0"
-    return response
 
 
 # ======================================================
@@ -410,7 +483,18 @@ def _save_sub_items(post_data, formset, is_create):
     """
     Iterates over formset.forms using their actual index position
     so POST key names (sub_item-{idx}-{sub_idx}) always match.
+
+    Submitted rows are matched to the existing sub-items by their
+    sub_id, so an edit only writes what changed: one bulk insert, one
+    bulk update and one delete at most. BOM references are resolved
+    with a single query limited to the indent's PO.
     """
+    indent = formset.instance
+    fields = ("bom_item", "item", "size", "quantity", "material", "remarks")
+
+    # Collect the submitted rows per indent item
+    submitted = []
+    bom_item_ids = set()
     for form_index, form in enumerate(formset.forms):
 
         # Skip deleted forms
@@ -427,13 +511,11 @@ def _save_sub_items(post_data, formset, is_create):
         except (ValueError, TypeError):
             count = 0
 
-        # On edit: only wipe and re-save if sub-item rows were submitted
-        if not is_create:
-            if count == 0:
-                continue  # nothing submitted for this row — leave existing untouched
-            indent_item.sub_items.all().delete()
+        # On edit: nothing submitted for this row — leave existing untouched
+        if not is_create and count == 0:
+            continue
 
-        to_create = []
+        rows = []
         for sub_idx in range(count):
             item_val = post_data.get(f"sub_item-{form_index}-{sub_idx}", "").strip()
             size_val = post_data.get(f"sub_size-{form_index}-{sub_idx}", "").strip()
@@ -447,37 +529,87 @@ def _save_sub_items(post_data, formset, is_create):
             bom_item_id = post_data.get(
                 f"sub_bom_item_id-{form_index}-{sub_idx}", ""
             ).strip()
+            sub_id = post_data.get(f"sub_id-{form_index}-{sub_idx}", "").strip()
 
             # Skip entirely blank rows
             if not item_val and not material_val and not qty_val:
                 continue
 
-            bom_item_obj = None
+            bom_item_id = int(bom_item_id) if bom_item_id.isdigit() else None
             if bom_item_id:
-                try:
-                    bom_item_obj = BOMItem.objects.get(pk=int(bom_item_id))
-                except (BOMItem.DoesNotExist, ValueError):
-                    bom_item_obj = None
+                bom_item_ids.add(bom_item_id)
 
             try:
-                quantity = float(qty_val) if qty_val else 0
-            except ValueError:
-                quantity = 0
-
-            to_create.append(
-                IndentSubItem(
-                    indent_item=indent_item,
-                    bom_item=bom_item_obj,
-                    item=item_val,
-                    size=size_val,
-                    quantity=quantity,
-                    material=material_val,
-                    remarks=remarks_val,
-                )
+                quantity = Decimal(qty_val or 0).quantize(Decimal("0.01"))
+            except InvalidOperation:
+                quantity = Decimal("0")
+
+            rows.append(
+                {
+                    "id": int(sub_id) if sub_id.isdigit() else None,
+                    "bom_item_id": bom_item_id,
+                    "item": item_val,
+                    "size": size_val,
+                    "quantity": quantity,
+                    "material": material_val,
+                    "remarks": remarks_val,
+                }
             )
+        submitted.append((indent_item, rows))
+
+    if not submitted:
+        return
+
+    # One lookup for every BOM reference; items from another PO are ignored
+    bom_items = BOMItem.objects.filter(
+        bom__po_id=indent.purchase_order_id
+    ).in_bulk(bom_item_ids)
+
+    existing = {}
+    if not is_create:
+        for sub in IndentSubItem.objects.filter(
+            indent_item__in=[indent_item for indent_item, _ in submitted]
+        ):
+            existing.setdefault(sub.indent_item_id, {})[sub.pk] = sub
+
+    to_create = []
+    to_update = []
+    to_delete = []
+    for indent_item, rows in submitted:
+        current = existing.get(indent_item.pk, {})
+        kept = set()
+
+        for row in rows:
+            bom_item = bom_items.get(row["bom_item_id"])
+            values = {
+                "bom_item_id": bom_item.pk if bom_item else None,
+                "item": row["item"],
+                "size": row["size"],
+                "quantity": row["quantity"],
+                "material": row["material"],
+                "remarks": row["remarks"],
+            }
+            sub = current.get(row["id"])
+
+            # Unknown or repeated id → a new row
+            if sub is None or sub.pk in kept:
+                to_create.append(IndentSubItem(indent_item=indent_item, **values))
+                continue
+
+            kept.add(sub.pk)
+            if any(getattr(sub, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(sub, field, value)
+                to_update.append(sub)
+
+        to_delete.extend(pk for pk in current if pk not in kept)
 
-        if to_create:
-            IndentSubItem.objects.bulk_create(to_create)
+    if to_delete:
+        IndentSubItem.objects.filter(pk__in=to_delete).delete()
+    if to_update:
+        IndentSubItem.objects.bulk_update(to_update, list(fields))
+    if to_create:
+        IndentSubItem.objects.bulk_create(to_create)
 
 
 @login_required
@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import ExportJob
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ["id", "user", "view_name", "status", "created_at", "finished_at"]
+    list_filter = ["status", "view_name"]
+    readonly_fields = ["created_at", "started_at", "finished_at"]
@@ -0,0 +1,67 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs.utils import claim_next_job, fail_stale_jobs, purge_old_jobs, run_export_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker for background report exports: runs queued ExportJobs one "
+        "at a time, saves the files under MEDIA_ROOT and notifies the users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the jobs queued right now, then exit (for cron).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=5,
+            help="Seconds to wait when the queue is empty (default 5).",
+        )
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            default=60,
+            help="Mark jobs RUNNING for longer than this as failed (default 60).",
+        )
+
+    def handle(self, *args, **options):
+        retention_days = getattr(settings, "EXPORT_JOB_RETENTION_DAYS", 7)
+        last_housekeeping = None
+
+        while True:
+            close_old_connections()
+            if last_housekeeping is None or time.monotonic() - last_housekeeping > 3600:
+                self._housekeeping(options["stale_minutes"], retention_days)
+                last_housekeeping = time.monotonic()
+
+            job = claim_next_job()
+
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+                continue
+
+            started = time.monotonic()
+            run_export_job(job)
+            self.stdout.write(
+                f"Job #{job.pk} {job.view_name}: {job.status} "
+                f"in {time.monotonic() - started:.1f}s"
+                + (f" ({job.error})" if job.error else "")
+            )
+
+    def _housekeeping(self, stale_minutes, retention_days):
+        failed = fail_stale_jobs(stale_minutes)
+        purged = purge_old_jobs(retention_days)
+        if failed or purged:
+            self.stdout.write(
+                f"{failed} stale job(s) marked failed, {purged} old job(s) removed."
+            )
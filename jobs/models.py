@@ -0,0 +1,71 @@
+import os
+
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class ExportJob(models.Model):
+    """
+    One report export run off the request path.
+
+    Stores the export URL (path + query string) exactly as the user
+    requested it; the `run_export_jobs` worker replays it as that user
+    and saves the streamed file under MEDIA_ROOT/exports/.
+    """
+
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="export_jobs",
+    )
+
+    # Resolved URL name of the export view, e.g. "indent:indent_report_excel"
+    view_name = models.CharField(max_length=100)
+    path = models.CharField(max_length=255)
+    query = models.TextField(blank=True)
+
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+    )
+    file = models.FileField(upload_to="exports/%Y/%m/", blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Export Job"
+        verbose_name_plural = "Export Jobs"
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["user", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.view_name} ({self.status}) → {self.user.username}"
+
+    @property
+    def filename(self):
+        return os.path.basename(self.file.name) if self.file else ""
+
+    @property
+    def url(self):
+        return f"{self.path}?{self.query}" if self.query else self.path
@@ -0,0 +1,23 @@
+from django import template
+from django.conf import settings
+
+register = template.Library()
+
+
+@register.inclusion_tag("components/background_export_button.html", takes_context=True)
+def background_export_button(context, export_url, row_count, css_class="btn btn-outline-success"):
+    """
+    "Export in background" link for `export_url` with the page's current
+    filters — shown only when `row_count` reaches BACKGROUND_EXPORT_MIN_ROWS.
+    """
+    request = context["request"]
+    query = request.GET.copy()
+    query.pop("page", None)
+    query["background"] = "1"
+
+    return {
+        "show": (row_count or 0) >= settings.BACKGROUND_EXPORT_MIN_ROWS,
+        "url": f"{export_url}?{query.urlencode()}",
+        "row_count": row_count,
+        "css_class": css_class,
+    }
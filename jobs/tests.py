@@ -0,0 +1,102 @@
+import datetime
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import ExportJob
+from .utils import claim_next_job, queue_export, run_export_job
+
+User = get_user_model()
+
+
+class ExportJobTestCase(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user("planner", password="x")
+        self.export_path = reverse("indent:indent_report_excel")
+
+    def queue(self, path=None, query="", age=0):
+        job, _ = queue_export(self.user, path or self.export_path, query)
+        ExportJob.objects.filter(pk=job.pk).update(
+            created_at=timezone.now() - datetime.timedelta(minutes=age)
+        )
+        return job
+
+
+class QueueExportTests(ExportJobTestCase):
+    def test_identical_pending_export_is_reused(self):
+        job, created = queue_export(self.user, self.export_path, "date_from=2025-01-01")
+        again, created_again = queue_export(
+            self.user, self.export_path, "date_from=2025-01-01"
+        )
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again, job)
+        self.assertEqual(job.view_name, "indent:indent_report_excel")
+
+    def test_background_flag_queues_instead_of_streaming(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(
+            self.export_path, {"background": "1", "indent_no": "IND"}
+        )
+
+        self.assertRedirects(response, reverse("jobs:export_list"))
+        self.assertEqual(ExportJob.objects.get().query, "indent_no=IND")
+
+
+class ClaimNextJobTests(ExportJobTestCase):
+    def test_claims_oldest_pending_job_once(self):
+        newer = self.queue(query="a=1", age=1)
+        older = self.queue(query="a=2", age=2)
+
+        first = claim_next_job()
+        second = claim_next_job()
+
+        self.assertEqual((first, second), (older, newer))
+        self.assertEqual(first.status, ExportJob.RUNNING)
+        self.assertIsNotNone(first.started_at)
+        self.assertIsNone(claim_next_job())
+
+    def test_running_jobs_are_not_claimed(self):
+        job = self.queue()
+        ExportJob.objects.filter(pk=job.pk).update(status=ExportJob.RUNNING)
+
+        self.assertIsNone(claim_next_job())
+
+
+class RunExportJobTests(ExportJobTestCase):
+    def test_export_file_is_saved_and_user_notified(self):
+        self.queue(query="date_from=2025-01-01&date_to=2025-01-31")
+
+        job = run_export_job(claim_next_job())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.DONE, job.error)
+        self.assertTrue(job.filename.endswith(".xlsx"))
+        with job.file.open("rb") as f:
+            self.assertEqual(f.read(2), b"PK")
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(self.user.notifications.get().title, "Export ready")
+
+    def test_non_export_response_fails_the_job(self):
+        self.queue(path=reverse("indent:indent_report"))
+
+        with self.assertLogs("jobs.utils", "WARNING"):
+            job = run_export_job(claim_next_job())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.FAILED)
+        self.assertEqual(job.error, "The export returned HTTP 200.")
+        self.assertFalse(job.file)
+        self.assertEqual(self.user.notifications.get().title, "Export failed")
@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = "jobs"
+
+urlpatterns = [
+    path("exports/", views.export_list, name="export_list"),
+    path("exports/<int:pk>/download/", views.export_download, name="export_download"),
+]
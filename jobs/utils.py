@@ -0,0 +1,216 @@
+import datetime
+import logging
+import re
+import tempfile
+from functools import wraps
+
+from django.contrib import messages
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.files import File
+from django.http import HttpRequest, QueryDict
+from django.shortcuts import redirect
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme
+
+from notifications.utils import notify_user
+
+from .models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+_FILENAME_RE = re.compile(r'filename="([^"]+)"')
+
+
+class ExportFailed(Exception):
+    """The export view answered with something other than a file."""
+
+
+# ======================================================
+# QUEUE (web side)
+# ======================================================
+def background_export(view):
+    """
+    Lets an export view run in the background: with ?background=1 the
+    request is stored as an ExportJob and the user is sent back to the
+    report page; without it the view streams the file as before.
+    Put it under @login_required.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.GET.get("background") != "1":
+            return view(request, *args, **kwargs)
+
+        query = request.GET.copy()
+        query.pop("background")
+        job, created = queue_export(request.user, request.path, query.urlencode())
+
+        if created:
+            messages.success(
+                request,
+                "Export queued. You will get a notification with the download "
+                "link when it is ready.",
+            )
+        else:
+            messages.info(request, "This export is already queued.")
+
+        back = request.META.get("HTTP_REFERER", "")
+        if not url_has_allowed_host_and_scheme(
+            back, {request.get_host()}, request.is_secure()
+        ):
+            back = reverse("jobs:export_list")
+        return redirect(back)
+
+    return wrapper
+
+
+def queue_export(user, path, query=""):
+    """
+    (job, created) — an identical export the user is still waiting for
+    is reused instead of queued twice.
+    """
+    existing = ExportJob.objects.filter(
+        user=user,
+        path=path,
+        query=query,
+        status__in=[ExportJob.PENDING, ExportJob.RUNNING],
+    ).first()
+    if existing:
+        return existing, False
+
+    job = ExportJob.objects.create(
+        user=user,
+        view_name=resolve(path).view_name,
+        path=path,
+        query=query,
+    )
+    return job, True
+
+
+# ======================================================
+# RUN (worker side)
+# ======================================================
+def claim_next_job():
+    """
+    The oldest pending job, marked RUNNING — or None. The conditional
+    UPDATE makes the claim safe with several workers.
+    """
+    candidates = ExportJob.objects.filter(status=ExportJob.PENDING).order_by(
+        "created_at"
+    )
+    for pk in candidates.values_list("pk", flat=True)[:10]:
+        claimed = ExportJob.objects.filter(pk=pk, status=ExportJob.PENDING).update(
+            status=ExportJob.RUNNING, started_at=timezone.now()
+        )
+        if claimed:
+            return ExportJob.objects.select_related("user").get(pk=pk)
+    return None
+
+
+def _export_request(job):
+    """A GET request for the stored export URL, made as the job's user."""
+    request = HttpRequest()
+    request.method = "GET"
+    request.path = request.path_info = job.path
+    request.GET = QueryDict(job.query)
+    request.META = {
+        "REQUEST_METHOD": "GET",
+        "QUERY_STRING": job.query,
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+    }
+    request.user = job.user
+    request.resolver_match = resolve(job.path)
+    request._messages = CookieStorage(request)
+    return request
+
+
+def _finish(job, status, error=""):
+    job.status = status
+    job.error = error
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "file", "finished_at"])
+
+
+def run_export_job(job):
+    """
+    Replays the export view for `job`, saves the streamed file and
+    notifies the user. Any error marks the job FAILED (and notifies too).
+    """
+    request = _export_request(job)
+    match = request.resolver_match
+
+    try:
+        response = match.func(request, *match.args, **match.kwargs)
+        try:
+            disposition = response.get("Content-Disposition", "")
+            filename = _FILENAME_RE.search(disposition)
+            if response.status_code != 200 or not filename:
+                raise ExportFailed(f"The export returned HTTP {response.status_code}.")
+
+            chunks = response.streaming_content if response.streaming else [response.content]
+            with tempfile.TemporaryFile() as tmp:
+                for chunk in chunks:
+                    tmp.write(chunk)
+                tmp.seek(0)
+                job.file.save(filename.group(1), File(tmp), save=False)
+        finally:
+            response.close()
+
+    except ExportFailed as e:
+        logger.warning("Export job #%s failed: %s", job.pk, e)
+        return _fail(job, str(e))
+    except Exception as e:
+        logger.exception("Export job #%s failed", job.pk)
+        return _fail(job, str(e) or e.__class__.__name__)
+
+    _finish(job, ExportJob.DONE)
+    notify_user(
+        job.user,
+        "Export ready",
+        f"{job.filename} is ready to download.",
+        url=reverse("jobs:export_download", args=[job.pk]),
+    )
+    return job
+
+
+def _fail(job, error):
+    _finish(job, ExportJob.FAILED, error)
+    notify_user(
+        job.user,
+        "Export failed",
+        f"Your export ({job.view_name}) could not be generated: {error}",
+        url=reverse("jobs:export_list"),
+    )
+    return job
+
+
+# ======================================================
+# HOUSEKEEPING
+# ======================================================
+def fail_stale_jobs(minutes):
+    """Jobs left RUNNING by a worker that died are marked FAILED."""
+    cutoff = timezone.now() - datetime.timedelta(minutes=minutes)
+    return ExportJob.objects.filter(
+        status=ExportJob.RUNNING, started_at__lt=cutoff
+    ).update(
+        status=ExportJob.FAILED,
+        error="The worker stopped before the export finished.",
+        finished_at=timezone.now(),
+    )
+
+
+def purge_old_jobs(days):
+    """Deletes finished jobs older than `days`, with their files."""
+    cutoff = timezone.now() - datetime.timedelta(days=days)
+    old = ExportJob.objects.filter(
+        status__in=[ExportJob.DONE, ExportJob.FAILED], finished_at__lt=cutoff
+    )
+    count = 0
+    for job in old.iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        count += 1
+    return count
@@ -0,0 +1,25 @@
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404, render
+
+from .models import ExportJob
+
+
+@login_required
+def export_list(request):
+    """The user's recent background exports."""
+    jobs = ExportJob.objects.filter(user=request.user)[:50]
+    return render(request, "jobs/export_list.html", {"jobs": jobs})
+
+
+@login_required
+def export_download(request, pk):
+    job = get_object_or_404(ExportJob, pk=pk, user=request.user)
+    if job.status != ExportJob.DONE or not job.file:
+        raise Http404("This export is not available.")
+
+    try:
+        handle = job.file.open("rb")
+    except FileNotFoundError:
+        raise Http404("This export file has been removed.")
+    return FileResponse(handle, as_attachment=True, filename=job.filename)
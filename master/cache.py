@@ -0,0 +1,118 @@
+"""
+Process-wide cache for the master tables.
+
+Statuses, department processes and companies are read on almost every
+PO page but change rarely. Each table is loaded once per worker process
+into a module-level dict and reused until its version changes.
+
+The version of each table is a DataVersion row (master.versions), bumped
+after commit whenever a row is saved or deleted — see master/signals.py.
+The local copy's version is compared with the one in the database (a
+single indexed read) at most once every MASTER_CACHE_RECHECK_SECONDS;
+lookups in between cost no query at all. The worker that made an edit
+drops its copy right away; every other worker picks the edit up within
+that interval, whatever cache backend is configured.
+
+Cached instances are shared between requests: treat them as read-only.
+"""
+
+import time
+
+from django.conf import settings
+
+from .models import CompanyMaster, DepartmentProcessMaster, ProcessStatusMaster
+from .versions import bump_versions, get_version, model_label
+
+# {model label: (version, rows, monotonic time the version was checked)}
+_local = {}
+
+
+def bump_version(model):
+    """Marks `model`'s cached rows as stale in every worker."""
+    bump_versions(model_label(model))
+    _local.pop(model_label(model), None)
+
+
+def clear():
+    """
+    Drops every local copy. Tests call this in setUp: their rolled-back
+    transactions reuse version numbers, so a copy could look current.
+    """
+    _local.clear()
+
+
+def _rows(model):
+    """All rows of `model` in its default ordering, reloaded on version change."""
+    label = model_label(model)
+    now = time.monotonic()
+
+    cached = _local.get(label)
+    recheck = getattr(settings, "MASTER_CACHE_RECHECK_SECONDS", 0)
+    if cached is not None and now - cached[2] < recheck:
+        return cached[1]
+
+    version = get_version(label)
+    if cached is not None and cached[0] == version:
+        _local[label] = (version, cached[1], now)
+        return cached[1]
+
+    rows = tuple(model.objects.all())
+    _local[label] = (version, rows, now)
+    return rows
+
+
+# ======================================================
+# PROCESS STATUS
+# ======================================================
+def get_statuses():
+    """Active statuses, ordered by name."""
+    return [s for s in _rows(ProcessStatusMaster) if s.is_active]
+
+
+def get_status(pk):
+    """Any status (active or not) by primary key, or None."""
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    for status in _rows(ProcessStatusMaster):
+        if status.pk == pk:
+            return status
+    return None
+
+
+def get_completed_status():
+    """The first active status that counts as completed, or None."""
+    for status in get_statuses():
+        if status.is_completed:
+            return status
+    return None
+
+
+def get_pending_status():
+    """The active PENDING status, or None."""
+    for status in get_statuses():
+        if status.name.upper() == "PENDING":
+            return status
+    return None
+
+
+# ======================================================
+# DEPARTMENT PROCESS
+# ======================================================
+def get_active_processes():
+    """Active department processes in execution (sequence) order."""
+    return [p for p in _rows(DepartmentProcessMaster) if p.is_active]
+
+
+def get_active_processes_by_department():
+    """Active department processes grouped for display: department, then sequence."""
+    return sorted(get_active_processes(), key=lambda p: (p.department, p.sequence))
+
+
+# ======================================================
+# COMPANY
+# ======================================================
+def get_companies():
+    """All companies ordered by name (for dropdowns)."""
+    return sorted(_rows(CompanyMaster), key=lambda c: c.name.lower())
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0004_departmentprocessmaster_code'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='companymaster',
+            index=models.Index(fields=['name'], name='master_comp_name_573ae8_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('master', '0005_companymaster_master_comp_name_573ae8_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc_type', models.CharField(max_length=20)),
+                ('scope', models.CharField(max_length=100)),
+                ('last_number', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Document Sequence',
+                'verbose_name_plural': 'Document Sequences',
+                'unique_together': {('doc_type', 'scope')},
+            },
+        ),
+    ]
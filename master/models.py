@@ -36,6 +36,10 @@ class CompanyMaster(models.Model):
         ordering = ["code"]
         verbose_name = "Company"
         verbose_name_plural = "Companies"
+        indexes = [
+            # Prefix search in the company picker
+            models.Index(fields=["name"]),
+        ]
 
     def __str__(self):
         return f"{self.code} - {self.code2} – {self.name}"
@@ -157,3 +161,43 @@ class DepartmentProcessMaster(models.Model):
         self.name = self.name.strip().upper()
         self.full_clean()
         super().save(*args, **kwargs)
+
+
+# Document Number Sequence
+class DocumentSequence(models.Model):
+    """
+    Last number issued for one document type within one scope
+    (e.g. BOMs of one PO, indents of one department process).
+    Numbers are handed out by master.sequences — never edit by hand.
+    """
+
+    doc_type = models.CharField(max_length=20)
+    scope = models.CharField(max_length=100)
+    last_number = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("doc_type", "scope")
+        verbose_name = "Document Sequence"
+        verbose_name_plural = "Document Sequences"
+
+    def __str__(self):
+        return f"{self.doc_type} [{self.scope}] → {self.last_number}"
+
+
+# Shared Data Versions
+class DataVersion(models.Model):
+    """
+    Version counter for one kind of data (a table, or any named set of
+    rows). Bumped whenever that data changes; caches key their entries
+    on it — see master.versions. Never edit by hand.
+    """
+
+    label = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Data Version"
+        verbose_name_plural = "Data Versions"
+
+    def __str__(self):
+        return f"{self.label} → {self.version}"
@@ -0,0 +1,44 @@
+"""
+Document number counters (BOM, Indent, ...).
+
+Each (doc_type, scope) pair has one DocumentSequence row. Allocating is
+an atomic `UPDATE ... SET last_number = last_number + n` on that row, so
+concurrent creators queue on a single row lock — held until their
+transaction ends — instead of locking a range of the documents table,
+and no number is ever parsed back out of a document string.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import DocumentSequence
+
+
+def allocate_numbers(doc_type, scope, count=1):
+    """
+    Reserves `count` consecutive numbers for (doc_type, scope) and
+    returns the first one. The reservation is part of the caller's
+    transaction: if it rolls back, the numbers are released with it.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    scope = str(scope)
+    sequence = DocumentSequence.objects.filter(doc_type=doc_type, scope=scope)
+
+    with transaction.atomic():
+        if not sequence.update(last_number=F("last_number") + count):
+            # First number in this scope — create the row; if another
+            # transaction just did, fall back to incrementing theirs.
+            try:
+                with transaction.atomic():
+                    DocumentSequence.objects.create(
+                        doc_type=doc_type, scope=scope, last_number=count
+                    )
+            except IntegrityError:
+                sequence.update(last_number=F("last_number") + count)
+
+        last_number = sequence.values_list("last_number", flat=True).get()
+
+    return last_number - count + 1
+
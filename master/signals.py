@@ -0,0 +1,22 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import bump_version
+from .models import CompanyMaster, DepartmentProcessMaster, ProcessStatusMaster
+
+
+@receiver(post_save, sender=CompanyMaster)
+@receiver(post_delete, sender=CompanyMaster)
+@receiver(post_save, sender=ProcessStatusMaster)
+@receiver(post_delete, sender=ProcessStatusMaster)
+@receiver(post_save, sender=DepartmentProcessMaster)
+@receiver(post_delete, sender=DepartmentProcessMaster)
+def invalidate_master_cache(sender, **kwargs):
+    """
+    Master row changed → every worker reloads that table on next use,
+    and cached reports showing it are recomputed (both are keyed on the
+    table's DataVersion). Bumped after commit, so no worker can re-cache
+    the old rows under the new version.
+    """
+    transaction.on_commit(lambda: bump_version(sender))
@@ -1,3 +1,120 @@
-from django.test import TestCase
+from django.db import transaction
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from .models import DataVersion, DocumentSequence, ProcessStatusMaster
+from .sequences import allocate_numbers
+from .versions import bump_versions, get_version, get_versions, model_label
+from . import cache as master_cache
+
+
+class AllocateNumbersTests(TestCase):
+    def test_repeated_calls_count_up_from_one(self):
+        numbers = [allocate_numbers("BOM", 7) for _ in range(5)]
+
+        self.assertEqual(numbers, [1, 2, 3, 4, 5])
+        self.assertEqual(
+            DocumentSequence.objects.get(doc_type="BOM", scope="7").last_number, 5
+        )
+
+    def test_block_reservation_returns_first_number(self):
+        self.assertEqual(allocate_numbers("IND", 1, count=3), 1)
+        self.assertEqual(allocate_numbers("IND", 1, count=2), 4)
+        self.assertEqual(allocate_numbers("IND", 1), 6)
+
+    def test_scopes_and_doc_types_are_independent(self):
+        allocate_numbers("BOM", 1, count=10)
+
+        self.assertEqual(allocate_numbers("BOM", 2), 1)
+        self.assertEqual(allocate_numbers("IND", 1), 1)
+        self.assertEqual(allocate_numbers("BOM", 1), 11)
+
+    def test_scope_is_stored_as_text(self):
+        allocate_numbers("BOM", 3)
+        self.assertEqual(allocate_numbers("BOM", "3"), 2)
+
+    def test_rolled_back_numbers_are_released(self):
+        allocate_numbers("BOM", 1)
+        try:
+            with transaction.atomic():
+                allocate_numbers("BOM", 1, count=5)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        self.assertEqual(allocate_numbers("BOM", 1), 2)
+
+    def test_count_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            allocate_numbers("BOM", 1, count=0)
+        self.assertFalse(DocumentSequence.objects.exists())
+
+
+class DataVersionTests(TestCase):
+    def setUp(self):
+        master_cache.clear()
+
+    def test_missing_labels_are_created_once(self):
+        first = get_versions(["a", "b", "a"])
+        second = get_versions(["b", "a"])
+
+        self.assertEqual(first, second)
+        self.assertEqual(DataVersion.objects.count(), 2)
+
+    def test_bump_increments_each_label_once(self):
+        before = get_versions(["a", "b"])
+
+        bump_versions("a", "a", "b")
+
+        self.assertEqual(get_version("a"), before["a"] + 1)
+        self.assertEqual(get_version("b"), before["b"] + 1)
+
+    def test_bump_of_unread_label_creates_it(self):
+        bump_versions("new")
+        self.assertTrue(DataVersion.objects.filter(label="new").exists())
+
+    def test_master_rows_reload_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ProcessStatusMaster.objects.create(name="PENDING")
+        self.assertEqual([s.name for s in master_cache.get_statuses()], ["PENDING"])
+
+        label = model_label(ProcessStatusMaster)
+        version = get_version(label)
+        with self.captureOnCommitCallbacks(execute=True):
+            ProcessStatusMaster.objects.create(name="COMPLETED", is_completed=True)
+
+        self.assertEqual(get_version(label), version + 1)
+        self.assertEqual(master_cache.get_completed_status().name, "COMPLETED")
+
+
+@override_settings(MASTER_CACHE_RECHECK_SECONDS=60)
+class MasterCacheTests(TestCase):
+    def setUp(self):
+        master_cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pending = ProcessStatusMaster.objects.create(name="PENDING")
+            ProcessStatusMaster.objects.create(name="COMPLETED", is_completed=True)
+
+    def test_lookups_between_rechecks_run_no_query(self):
+        master_cache.get_statuses()
+
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                master_cache.get_status(self.pending.pk)
+                master_cache.get_pending_status()
+                master_cache.get_completed_status()
+
+    def test_edit_in_another_worker_is_seen_after_recheck(self):
+        master_cache.get_statuses()
+
+        # Another worker's edit: the row and its version bump, but not
+        # this worker's local copy
+        ProcessStatusMaster.objects.create(name="WIP")
+        bump_versions(model_label(ProcessStatusMaster))
+        self.assertEqual(len(master_cache.get_statuses()), 2)
+
+        with override_settings(MASTER_CACHE_RECHECK_SECONDS=0):
+            self.assertEqual(len(master_cache.get_statuses()), 3)
+
+            # Unchanged version: one version read, no reload
+            with self.assertNumQueries(1):
+                master_cache.get_statuses()
@@ -9,6 +9,7 @@ urlpatterns = [
     path("companies/create/", views.company_create, name="company_create"),
     path("companies/<int:pk>/edit/", views.company_edit, name="company_edit"),
     path("companies/<int:pk>/delete/", views.company_delete, name="company_delete"),
+    path("companies/lookup/", views.company_lookup, name="company_lookup"),
     # ----- Process Status Master -----
     path("process-statuses/", views.process_status_list, name="process_status_list"),
     path(
@@ -1,6 +1,8 @@
 from django.core.paginator import Paginator
 from django.db.models import Q
 
+from .models import CompanyMaster
+
 
 def apply_master_search_pagination(
     request,
@@ -29,3 +31,20 @@ def apply_master_search_pagination(
         "page_obj": page_obj,
         "q": q,
     }
+
+
+def lookup_companies(term, limit=20):
+    """
+    Company picker search: companies whose code or name starts with
+    `term` (both indexed), ordered by name. Returns (companies, more).
+    """
+    term = (term or "").strip()[:200]
+    if not term:
+        return [], False
+
+    companies = list(
+        CompanyMaster.objects.filter(
+            Q(code__istartswith=term) | Q(name__istartswith=term)
+        ).order_by("name")[: limit + 1]
+    )
+    return companies[:limit], len(companies) > limit
@@ -0,0 +1,72 @@
+"""
+Data versions shared by every worker process.
+
+Each label (a model's `app_label.modelname`, or any other name for a set
+of rows) has one DataVersion row. Bumping is an atomic
+`UPDATE ... SET version = version + 1`; reading is one indexed query for
+any number of labels.
+
+Caches — the per-process master tables (master.cache), cached report
+results (suntech_erp.report_cache), unread notification counts — key
+their entries on the versions they were built from. A bump in any
+worker is therefore seen by all of them on their next read, whatever
+cache backend CACHES points at.
+"""
+
+import time
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import DataVersion
+
+
+def _initial_version():
+    # Time-based, so a recreated row never repeats a version an old
+    # cache entry may still be stored under
+    return int(time.time() * 1000)
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+def get_versions(labels):
+    """{label: version} for `labels`; missing rows are created."""
+    labels = list(dict.fromkeys(labels))
+    versions = dict(
+        DataVersion.objects.filter(label__in=labels).values_list("label", "version")
+    )
+
+    missing = [label for label in labels if label not in versions]
+    if missing:
+        DataVersion.objects.bulk_create(
+            [DataVersion(label=label, version=_initial_version()) for label in missing],
+            ignore_conflicts=True,
+        )
+        versions.update(
+            DataVersion.objects.filter(label__in=missing).values_list(
+                "label", "version"
+            )
+        )
+
+    return versions
+
+
+def get_version(label):
+    return get_versions([label])[label]
+
+
+def bump_versions(*labels):
+    """Marks everything cached under `labels` as stale, in every worker."""
+    # Sorted, so concurrent bumps lock the rows in the same order
+    for label in sorted(set(labels)):
+        rows = DataVersion.objects.filter(label=label)
+        if rows.update(version=F("version") + 1):
+            continue
+        # Never read yet — nothing can be cached under it
+        try:
+            with transaction.atomic():
+                DataVersion.objects.create(label=label, version=_initial_version())
+        except IntegrityError:
+            rows.update(version=F("version") + 1)
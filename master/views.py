@@ -2,6 +2,7 @@ from django.contrib import messages
 
 from django.shortcuts import render, redirect, get_object_or_404
 from suntech_erp.permissions import admin_required
+from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
 from django.http import JsonResponse, HttpResponseBadRequest
 from django.views.decorators.http import require_POST
@@ -17,7 +18,7 @@ from .forms import (
     ProcessStatusMasterForm,
     DepartmentProcessMasterForm,
 )
-from .utils import apply_master_search_pagination
+from .utils import apply_master_search_pagination, lookup_companies
 
 # ======================  COMPANY MASTER  ======================
 @admin_required
@@ -93,6 +94,24 @@ def company_delete(request, pk):
     return redirect("master:company_list")
 
 
+@login_required
+def company_lookup(request):
+    """
+    GET /master/companies/lookup/?q=<prefix>
+    Typeahead for company pickers (Select2 "results" format).
+    """
+    companies, more = lookup_companies(request.GET.get("q", ""))
+
+    return JsonResponse(
+        {
+            "results": [
+                {"id": c.pk, "text": c.name, "code": c.code} for c in companies
+            ],
+            "pagination": {"more": more},
+        }
+    )
+
+
 # ======================  PROCESS STATUS MASTER  ======================
 @admin_required
 def process_status_list(request):
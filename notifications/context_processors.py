@@ -1,8 +1,15 @@
+from django.conf import settings
+from django.utils.functional import lazy
+
+from .utils import unread_count
+
+
 def unread_notification_count(request):
     if request.user.is_authenticated:
+        # The header badge is filled by the unread API / stream, so the
+        # count is only read if a template actually renders it
         return {
-            "unread_notification_count": request.user.notifications.filter(
-                is_read=False
-            ).count()
+            "unread_notification_count": lazy(unread_count, int)(request.user),
+            "notifications_sse_enabled": settings.NOTIFICATIONS_SSE_ENABLED,
         }
     return {}
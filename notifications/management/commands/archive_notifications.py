@@ -0,0 +1,92 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from notifications.models import Notification, NotificationArchive
+from notifications.utils import invalidate_unread_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves old notifications into NotificationArchive in batches: "
+        "read direct notifications and broadcasts older than --days."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=90,
+            help="Archive notifications older than this many days (default 90).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows moved per transaction (default 1000).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many rows would be archived.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - datetime.timedelta(days=options["days"])
+        batch_size = options["batch_size"]
+
+        # Unread direct notifications stay; broadcasts go by age alone
+        # (their read state is per user).
+        candidates = Notification.objects.filter(
+            Q(user__isnull=False, is_read=True) | Q(user__isnull=True),
+            created_at__lt=cutoff,
+        )
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"{candidates.count()} notification(s) older than "
+                f"{cutoff:%d %b %Y} would be archived."
+            )
+            return
+
+        moved = 0
+        moved_broadcasts = False
+        while True:
+            batch = list(
+                candidates.order_by("id").values(
+                    "id", "user_id", "title", "message", "url", "created_at"
+                )[:batch_size]
+            )
+            if not batch:
+                break
+
+            with transaction.atomic():
+                NotificationArchive.objects.bulk_create(
+                    [
+                        NotificationArchive(
+                            original_id=row["id"],
+                            user_id=row["user_id"],
+                            title=row["title"],
+                            message=row["message"],
+                            url=row["url"],
+                            created_at=row["created_at"],
+                        )
+                        for row in batch
+                    ]
+                )
+                Notification.objects.filter(
+                    pk__in=[row["id"] for row in batch]
+                ).delete()
+
+            moved += len(batch)
+            moved_broadcasts |= any(row["user_id"] is None for row in batch)
+            self.stdout.write(f"Archived {moved} notification(s)...")
+
+        # Archived broadcasts may have been unread for someone
+        if moved_broadcasts:
+            invalidate_unread_counts()
+
+        self.stdout.write(self.style.SUCCESS(f"Done. {moved} notification(s) archived."))
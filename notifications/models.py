@@ -4,12 +4,24 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 class Notification(models.Model):
+    # Empty user = broadcast: one row shown to every user (see utils.py)
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,
         related_name="notifications"
     )
 
+    # Who triggered a broadcast — they don't get notified about it
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+
     title = models.CharField(max_length=255)
     message = models.TextField()
 
@@ -19,12 +31,90 @@ class Notification(models.Model):
         help_text="URL to redirect when notification is clicked"
     )
 
+    # Only used for direct (per-user) notifications
     is_read = models.BooleanField(default=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "is_read", "created_at"]),
+            models.Index(fields=["created_at", "id"]),
+        ]
+
+    @property
+    def is_broadcast(self):
+        return self.user_id is None
 
     def __str__(self):
+        if self.is_broadcast:
+            return f"{self.title} → everyone"
         return f"{self.title} → {self.user.username}"
+
+
+class BroadcastRead(models.Model):
+    """A user has read one broadcast notification."""
+
+    notification = models.ForeignKey(
+        Notification,
+        on_delete=models.CASCADE,
+        related_name="reads"
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="broadcast_reads"
+    )
+    read_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("notification", "user")
+
+
+class NotificationCursor(models.Model):
+    """
+    Per-user read cursor: every broadcast with an id up to
+    `last_read_broadcast_id` counts as read ("mark all as read" is
+    one write instead of one marker per broadcast).
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="notification_cursor"
+    )
+    last_read_broadcast_id = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user.username} read broadcasts ≤ #{self.last_read_broadcast_id}"
+
+
+class NotificationArchive(models.Model):
+    """
+    Old notifications moved out of the live table by the
+    `archive_notifications` management command. Same content, no read
+    tracking; an empty user means it was a broadcast.
+    """
+
+    original_id = models.PositiveBigIntegerField()
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="archived_notifications"
+    )
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    url = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["user", "created_at"])]
+
+    def __str__(self):
+        return f"[archived] {self.title}"
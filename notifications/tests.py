@@ -1,3 +1,162 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from .context_processors import unread_notification_count
+from .utils import (
+    mark_all_read,
+    mark_read,
+    notification_stamp,
+    notifications_for,
+    notify_all,
+    notify_user,
+    unread_count,
+)
+
+User = get_user_model()
+
+
+class NotificationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("planner", password="x")
+        self.other = User.objects.create_user("designer", password="x")
+
+
+class NotificationPagingTests(NotificationTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(7):
+            notify_user(self.user, f"n{i}", "")
+        notify_all("maintenance", "")
+        notify_user(self.other, "not mine", "")
+        self.expected = list(
+            notifications_for(self.user).order_by("-id").values_list("pk", flat=True)
+        )
+        self.api_url = reverse("notifications:notifications_list_api")
+        self.client.force_login(self.user)
+
+    def test_api_pages_cover_every_row_once(self):
+        seen = []
+        params = {"limit": 3}
+        while True:
+            data = self.client.get(self.api_url, params).json()
+            seen.extend(n["id"] for n in data["notifications"])
+            if data["next_cursor"] is None:
+                break
+            params["after"] = data["next_cursor"]
+
+        self.assertEqual(seen, self.expected)
+
+    def test_list_page_and_api_share_the_order(self):
+        page = self.client.get(reverse("notifications:notification_list")).context[
+            "notifications"
+        ]
+        data = self.client.get(self.api_url).json()
+
+        self.assertEqual([n.pk for n in page], self.expected)
+        self.assertEqual([n["id"] for n in data["notifications"]], self.expected)
+        self.assertIsNone(data["next_cursor"])
+
+
+class UnreadCountTests(NotificationTestCase):
+    def test_count_follows_notify_and_mark_read(self):
+        self.assertEqual(unread_count(self.user), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first = notify_user(self.user, "a", "")
+            notify_user(self.user, "b", "")
+        self.assertEqual(unread_count(self.user), 2)
+
+        # Cached until the next change
+        with self.assertNumQueries(1):
+            unread_count(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_read(self.user, notifications_for(self.user).get(pk=first.pk))
+        self.assertEqual(unread_count(self.user), 1)
+
+    def test_broadcast_reaches_every_user(self):
+        unread_count(self.user)
+        unread_count(self.other)
+        stamp = notification_stamp(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_all("maintenance", "", actor=self.other)
+
+        self.assertNotEqual(notification_stamp(self.user.pk), stamp)
+        self.assertEqual(unread_count(self.user), 1)
+        self.assertEqual(unread_count(self.other), 0)
+
+    def test_mark_all_read_clears_direct_and_broadcasts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_user(self.user, "a", "")
+            notify_all("maintenance", "")
+        self.assertEqual(unread_count(self.user), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_all_read(self.user)
+
+        self.assertEqual(unread_count(self.user), 0)
+        self.assertEqual(unread_count(self.other), 1)
+
+    def test_context_processor_reads_count_only_when_rendered(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_user(self.user, "a", "")
+        request = RequestFactory().get("/")
+        request.user = self.user
+
+        with self.assertNumQueries(0):
+            context = unread_notification_count(request)
+
+        self.assertEqual(int(context["unread_notification_count"]), 1)
+
+
+class UnreadHeaderTests(NotificationTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_unchanged_header_answers_not_modified(self):
+        url = reverse("notifications:unread_notifications_api")
+        first = self.client.get(url)
+        etag = first["ETag"]
+        self.assertEqual(first.json(), {"count": 0, "notifications": []})
+
+        # Only the stamp is read (plus the session and user lookups)
+        with self.assertNumQueries(3):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_user(self.user, "a", "ready")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["count"], 1)
+
+    @override_settings(NOTIFICATIONS_SSE_ENABLED=True)
+    def test_stream_opens_with_the_unread_payload(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify_user(self.user, "a", "ready")
+
+        response = self.client.get(reverse("notifications:unread_notifications_stream"))
+        self.addCleanup(response.close)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        chunks = iter(response.streaming_content)
+        self.assertEqual(next(chunks), b"retry: 3000\n\n")
+        event_id, event, data = next(chunks).decode().rstrip("\n").split("\n")
+        self.assertEqual(event_id, f"id: {notification_stamp(self.user.pk)}")
+        self.assertEqual(event, "event: unread")
+        payload = json.loads(data.removeprefix("data: "))
+        self.assertEqual(payload["count"], 1)
+        self.assertEqual(payload["notifications"][0]["message"], "ready")
+
+    @override_settings(NOTIFICATIONS_SSE_ENABLED=False)
+    def test_disabled_stream_is_not_found(self):
+        response = self.client.get(reverse("notifications:unread_notifications_stream"))
+        self.assertEqual(response.status_code, 404)
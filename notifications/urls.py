@@ -8,5 +8,21 @@ urlpatterns = [
     path("read/<int:pk>/", views.mark_as_read, name="mark_read"),
     path("read-all/", views.mark_all_as_read, name="mark_all_read"),
     path("unread/", views.unread_notifications_api, name="unread_notifications_api"),
+    path(
+        "unread/stream/",
+        views.unread_notifications_stream,
+        name="unread_notifications_stream",
+    ),
+    path("api/", views.notifications_list_api, name="notifications_list_api"),
+    path(
+        "api/<int:pk>/read/",
+        views.notification_mark_read_api,
+        name="notification_mark_read_api",
+    ),
+    path(
+        "api/read-all/",
+        views.notification_mark_all_read_api,
+        name="notification_mark_all_read_api",
+    ),
 
 ]
@@ -0,0 +1,201 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import (
+    BooleanField,
+    Case,
+    Exists,
+    F,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+
+from master.versions import bump_versions, get_versions
+
+from .models import BroadcastRead, Notification, NotificationCursor
+
+UNREAD_COUNT_TIMEOUT = 60 * 60
+
+# DataVersion labels (master.versions): a global one bumped by every
+# broadcast, and one per user bumped by their direct notifications and
+# mark-read. They live in the database, so every worker sees a bump.
+_BROADCAST_VERSION = "notifications.broadcast"
+_USER_VERSION = "notifications.user.{}"
+
+
+def _versions(user_id):
+    """(broadcast version, user version) — one indexed query."""
+    user_label = _USER_VERSION.format(user_id)
+    versions = get_versions([_BROADCAST_VERSION, user_label])
+    return versions[_BROADCAST_VERSION], versions[user_label]
+
+
+def _bump_user_version(user_id):
+    bump_versions(_USER_VERSION.format(user_id))
+
+
+# ======================================================
+# UNREAD COUNTER (cache)
+# Each user's unread count is cached under a key made of both versions:
+# a new broadcast bumps the global version (one write) and every user's
+# count is recomputed once on their next read; a direct notification
+# or mark-read bumps only that user's version. Bumps run after the
+# surrounding transaction commits. The versions are read from the
+# database, so a worker never serves a count another worker outdated.
+# ======================================================
+def _bump_broadcast_version():
+    bump_versions(_BROADCAST_VERSION)
+
+
+def invalidate_unread_counts():
+    """Forces every user's cached count to be recomputed on next read."""
+    _bump_broadcast_version()
+
+
+def notification_stamp(user_id):
+    """
+    Changes whenever anything in the user's notification header could
+    have changed (a broadcast, a direct notification, a mark-read).
+    Built from the DataVersion rows — one indexed query, the same in
+    every worker — and used for ETags and the event stream.
+    """
+    return "{}.{}.{}".format(user_id, *_versions(user_id))
+
+
+def unread_count(user):
+    """The user's unread count: a cache hit, or one COUNT after a change."""
+    key = "notifications:unread:{}:{}.{}".format(user.pk, *_versions(user.pk))
+    count = cache.get(key)
+    if count is None:
+        count = unread_notifications_for(user).count()
+        cache.set(key, count, UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+# ======================================================
+# CREATE
+# ======================================================
+def notify_user(user, title, message, url=""):
+    """Direct notification for one user."""
+    notification = Notification.objects.create(
+        user=user, title=title, message=message, url=url
+    )
+    transaction.on_commit(lambda: _bump_user_version(user.pk))
+    return notification
+
+
+def notify_all(title, message, url="", actor=None):
+    """
+    Broadcast to every user (except `actor`) with a single row.
+    Who has read it is tracked per user on read, not on create.
+    """
+    notification = Notification.objects.create(
+        user=None, actor=actor, title=title, message=message, url=url
+    )
+    transaction.on_commit(_bump_broadcast_version)
+    return notification
+
+
+# ======================================================
+# READ
+# ======================================================
+def _broadcasts_for(user):
+    # Broadcasts made after the user joined, not triggered by them
+    return Q(user__isnull=True, created_at__gte=user.date_joined) & ~Q(actor=user)
+
+
+def notifications_for(user):
+    """
+    Every notification the user can see — their own plus broadcasts —
+    annotated with `read` for this user. One query, no per-user rows.
+    """
+    cursor = Coalesce(
+        Subquery(
+            NotificationCursor.objects.filter(user=user).values(
+                "last_read_broadcast_id"
+            )[:1]
+        ),
+        Value(0),
+    )
+
+    return Notification.objects.filter(Q(user=user) | _broadcasts_for(user)).annotate(
+        read=Case(
+            When(user=user, then=F("is_read")),
+            When(pk__lte=cursor, then=Value(True)),
+            When(
+                Exists(
+                    BroadcastRead.objects.filter(notification=OuterRef("pk"), user=user)
+                ),
+                then=Value(True),
+            ),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+    )
+
+
+def unread_notifications_for(user):
+    return notifications_for(user).filter(read=False)
+
+
+# ======================================================
+# MARK AS READ
+# ======================================================
+def mark_read(user, notification):
+    """
+    `notification` should come from notifications_for(user), so that its
+    `read` flag tells whether the unread count has to drop.
+    """
+    was_unread = not getattr(notification, "read", notification.is_read)
+
+    if notification.is_broadcast:
+        BroadcastRead.objects.bulk_create(
+            [BroadcastRead(notification=notification, user=user)],
+            ignore_conflicts=True,
+        )
+    elif not notification.is_read:
+        Notification.objects.filter(pk=notification.pk).update(is_read=True)
+        notification.is_read = True
+
+    if was_unread:
+        notification.read = True
+        transaction.on_commit(lambda: _bump_user_version(user.pk))
+
+
+def mark_all_read(user):
+    """
+    Direct notifications are flagged; broadcasts are covered by moving
+    the user's cursor to the newest one (markers below it are dropped).
+    """
+    with transaction.atomic():
+        transaction.on_commit(lambda: _bump_user_version(user.pk))
+
+        user.notifications.filter(is_read=False).update(is_read=True)
+
+        latest = Notification.objects.filter(_broadcasts_for(user)).aggregate(
+            latest=Max("pk")
+        )["latest"]
+        if latest is None:
+            return
+
+        cursor, _ = NotificationCursor.objects.select_for_update().get_or_create(
+            user=user
+        )
+        if latest > cursor.last_read_broadcast_id:
+            cursor.last_read_broadcast_id = latest
+            cursor.save(update_fields=["last_read_broadcast_id"])
+        BroadcastRead.objects.filter(
+            user=user, notification_id__lte=latest
+        ).delete()
+
+
+# ======================================================
+# NOTIFICATIONS API PAGE SIZE
+# Pages come from suntech_erp.pagination.keyset_page, as on the list page.
+# ======================================================
+NOTIFICATIONS_PAGE_SIZE = 50
+NOTIFICATIONS_MAX_PAGE_SIZE = 100
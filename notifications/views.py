@@ -1,9 +1,23 @@
+import json
+import time
+
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
-from django.core.paginator import Paginator
-from .models import Notification
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_POST
+from suntech_erp.pagination import keyset_page
+from .utils import (
+    notifications_for,
+    unread_notifications_for,
+    unread_count,
+    notification_stamp,
+    NOTIFICATIONS_PAGE_SIZE,
+    NOTIFICATIONS_MAX_PAGE_SIZE,
+    mark_read,
+    mark_all_read,
+)
 
 
 # ======================================================
@@ -11,15 +25,9 @@ from .models import Notification
 # ======================================================
 @login_required
 def notification_list(request):
-    # Latest 100 notifications only
-    qs = (
-        request.user.notifications
-        .order_by("-created_at")[:100]
-    )
-
-    # Paginate: 20 per page
-    paginator = Paginator(qs, 20)
-    page_obj = paginator.get_page(request.GET.get("page"))
+    # Keyset-paged, newest first: ?after= / ?before= seek on the id index,
+    # so any page costs the same and the list is not capped
+    page_obj = keyset_page(request, notifications_for(request.user), 20)
 
     return render(
         request,
@@ -35,9 +43,8 @@ def notification_list(request):
 # ======================================================
 @login_required
 def mark_as_read(request, pk):
-    notification = get_object_or_404(Notification, pk=pk, user=request.user)
-    notification.is_read = True
-    notification.save()
+    notification = get_object_or_404(notifications_for(request.user), pk=pk)
+    mark_read(request.user, notification)
     return redirect(notification.url or "notifications:notification_list")
 
 
@@ -46,19 +53,26 @@ def mark_as_read(request, pk):
 # ======================================================
 @login_required
 def mark_all_as_read(request):
-    request.user.notifications.filter(is_read=False).update(is_read=True)
+    mark_all_read(request.user)
     return redirect("notifications:notification_list")
 
 
 # ======================================================
 # EXISTING: Unread Notifications API (Header Polling)
+# Supports If-None-Match: the ETag is the user's notification stamp
+# (two DataVersion rows), so an unchanged header costs a 304 and one
+# indexed query.
 # ======================================================
-@login_required
-def unread_notifications_api(request):
-    qs = request.user.notifications.filter(is_read=False).order_by("-created_at")
+def _unread_payload(user):
+    count = unread_count(user)
+
+    # Only hit the table when there is something unread to list
+    latest = []
+    if count:
+        latest = unread_notifications_for(user).order_by("-created_at")[:5]
 
-    data = {
-        "count": qs.count(),
+    return {
+        "count": count,
         "notifications": [
             {
                 "id": n.id,
@@ -66,10 +80,60 @@ def unread_notifications_api(request):
                 "url": n.url,
                 "created": n.created_at.strftime("%d %b %Y %H:%M"),
             }
-            for n in qs[:5]
+            for n in latest
         ],
     }
-    return JsonResponse(data)
+
+
+def _unread_etag(request):
+    return notification_stamp(request.user.pk)
+
+
+@login_required
+@condition(etag_func=_unread_etag)
+def unread_notifications_api(request):
+    response = JsonResponse(_unread_payload(request.user))
+    # Let the browser keep the body but revalidate every poll
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+# ======================================================
+# Unread Notifications Stream (Server-Sent Events)
+# Pushes the unread payload whenever the user's stamp changes. The
+# stamp is one indexed query; notifications are only read on change.
+# Each stream ends after NOTIFICATIONS_STREAM_TIMEOUT seconds and the
+# browser reconnects, so a worker is never held indefinitely.
+# ======================================================
+def _event_stream(user):
+    deadline = time.monotonic() + settings.NOTIFICATIONS_STREAM_TIMEOUT
+    last_stamp = None
+
+    yield "retry: 3000\n\n"
+
+    while time.monotonic() < deadline:
+        stamp = notification_stamp(user.pk)
+        if stamp != last_stamp:
+            last_stamp = stamp
+            payload = json.dumps(_unread_payload(user))
+            yield f"id: {stamp}\nevent: unread\ndata: {payload}\n\n"
+        else:
+            # Comment line keeps proxies from closing an idle connection
+            yield ": keep-alive\n\n"
+        time.sleep(settings.NOTIFICATIONS_STREAM_INTERVAL)
+
+
+@login_required
+def unread_notifications_stream(request):
+    if not settings.NOTIFICATIONS_SSE_ENABLED:
+        raise Http404("Notification stream is disabled.")
+
+    response = StreamingHttpResponse(
+        _event_stream(request.user), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 
 # ======================================================
@@ -77,7 +141,17 @@ def unread_notifications_api(request):
 # ======================================================
 @login_required
 def notifications_list_api(request):
-    qs = request.user.notifications.all().order_by("-created_at")
+    """
+    Keyset-paged like the list page, newest first:
+    ?after=<next_cursor from the previous page>&limit=50.
+    """
+    try:
+        limit = int(request.GET.get("limit", NOTIFICATIONS_PAGE_SIZE))
+    except ValueError:
+        limit = NOTIFICATIONS_PAGE_SIZE
+    limit = max(1, min(limit, NOTIFICATIONS_MAX_PAGE_SIZE))
+
+    page = keyset_page(request, notifications_for(request.user), limit)
 
     return JsonResponse(
         {
@@ -85,12 +159,13 @@ def notifications_list_api(request):
                 {
                     "id": n.id,
                     "message": n.message,
-                    "is_read": n.is_read,
+                    "is_read": n.read,
                     "url": n.url,
                     "created": n.created_at.strftime("%d %b %Y %H:%M"),
                 }
-                for n in qs
-            ]
+                for n in page
+            ],
+            "next_cursor": page.next_cursor,
         }
     )
 
@@ -101,13 +176,8 @@ def notifications_list_api(request):
 @login_required
 @require_POST
 def notification_mark_read_api(request, pk):
-    notification = get_object_or_404(
-        Notification,
-        pk=pk,
-        user=request.user,
-    )
-    notification.is_read = True
-    notification.save(update_fields=["is_read"])
+    notification = get_object_or_404(notifications_for(request.user), pk=pk)
+    mark_read(request.user, notification)
 
     return JsonResponse({"success": True})
 
@@ -118,5 +188,5 @@ def notification_mark_read_api(request, pk):
 @login_required
 @require_POST
 def notification_mark_all_read_api(request):
-    request.user.notifications.filter(is_read=False).update(is_read=True)
+    mark_all_read(request.user)
     return JsonResponse({"success": True})
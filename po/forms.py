@@ -10,6 +10,8 @@ from .models import (
     MONTH_CHOICES,
 )
 from master.models import CompanyMaster, ProcessStatusMaster
+from master.cache import get_completed_status
+from suntech_erp.widgets import LookupSelect
 import datetime
 from django.forms import BaseInlineFormSet
 
@@ -54,12 +56,13 @@ class PurchaseOrderForm(forms.ModelForm):
                     "type": "date",
                 }
             ),
-            # company rendered as select — select2 applied via JS
-            "company": forms.Select(
+            # company picker — searched via master:company_lookup (select2)
+            "company": LookupSelect(
+                "master:company_lookup",
                 attrs={
                     "class": "form-control",
                     "id": "id_company",
-                }
+                },
             ),
             "department": forms.Select(
                 attrs={
@@ -264,10 +267,7 @@ def auto_set_process_status(po_process):
             break
 
     if all_completed:
-        completed_status = ProcessStatusMaster.objects.filter(
-            is_completed=True,
-            is_active=True,
-        ).first()
+        completed_status = get_completed_status()
         if completed_status:
             po_process.current_status = completed_status
             po_process.save(update_fields=["current_status"])
@@ -374,7 +374,9 @@ class POTargetForm(forms.Form):
     purchase_order = forms.ModelChoiceField(
         queryset=PurchaseOrder.objects.order_by("-id"),
         empty_label="— Select PO —",
-        widget=forms.Select(attrs={"class": "form-control", "id": "id_po_select"}),
+        widget=LookupSelect(
+            "po:po_lookup", attrs={"class": "form-control", "id": "id_po_select"}
+        ),
     )
     month = forms.ChoiceField(
         choices=[("", "— Select Month —")] + list(MONTH_CHOICES),
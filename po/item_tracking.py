@@ -0,0 +1,246 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+
+from master.cache import get_completed_status
+from suntech_erp.report_cache import schedule_data_version_bump
+
+from .models import (
+    POProcess,
+    POProcessHistory,
+    POProcessItemHistory,
+    POProcessItemStatus,
+    PurchaseOrderItem,
+)
+from .utils import defer_on_commit
+
+
+def _count(queryset, outer_field):
+    """Correlated COUNT(*) of `queryset` rows grouped by `outer_field`."""
+    counted = (
+        queryset.order_by()
+        .values(outer_field)
+        .annotate(result=Count("*"))
+        .values("result")
+    )
+    return Coalesce(Subquery(counted), Value(0), output_field=IntegerField())
+
+
+def _qty_full():
+    """qty_completed >= item quantity, treating NULL as zero on both sides."""
+    zero = Value(Decimal("0"))
+    return GreaterThanOrEqual(
+        Coalesce(F("qty_completed"), zero),
+        Coalesce(F("po_item__quantity_value"), zero),
+    )
+
+
+# ------------------------------
+# PO ITEM STATUS (across tracking processes)
+# ------------------------------
+def recompute_item_statuses(po_item_ids):
+    """
+    Recalculates PurchaseOrderItem.status for many items at once.
+
+    Rules (per item, over its PO's item-tracking processes):
+      No tracking processes exist               → leave untouched
+      No POProcessItemStatus for item           → PENDING
+      At least one exists, not all done         → INPROCESS
+      ALL tracking processes: status completed
+        AND qty_completed >= quantity_value      → COMPLETED
+
+    One read query computes the counts for every item; changed items are
+    then written with at most one UPDATE per resulting status.
+    """
+    if not po_item_ids:
+        return
+
+    tracking_statuses = POProcessItemStatus.objects.filter(
+        po_item=OuterRef("pk"),
+        po_process__department_process__has_item_tracking=True,
+    )
+
+    rows = (
+        PurchaseOrderItem.objects.filter(pk__in=po_item_ids)
+        .order_by()
+        .annotate(
+            tracking_processes=_count(
+                POProcess.objects.filter(
+                    purchase_order=OuterRef("purchase_order_id"),
+                    department_process__has_item_tracking=True,
+                ),
+                "purchase_order",
+            ),
+            tracked=_count(tracking_statuses, "po_item"),
+            fully_done=_count(
+                tracking_statuses.filter(_qty_full(), status__is_completed=True),
+                "po_item",
+            ),
+        )
+        .values_list("pk", "status", "tracking_processes", "tracked", "fully_done")
+    )
+
+    changes = {}
+    for pk, status, tracking_processes, tracked, fully_done in rows:
+        if not tracking_processes:
+            continue
+
+        if not tracked:
+            new_status = "PENDING"
+        elif fully_done == tracking_processes:
+            new_status = "COMPLETED"
+        else:
+            new_status = "INPROCESS"
+
+        if status != new_status:
+            changes.setdefault(new_status, []).append(pk)
+
+    for new_status, pks in changes.items():
+        PurchaseOrderItem.objects.filter(pk__in=pks).update(status=new_status)
+    if changes:
+        # update() sends no post_save for the report cache
+        schedule_data_version_bump(PurchaseOrderItem)
+
+
+def schedule_item_status_recompute(po_item_id):
+    """
+    Marks a PO item's status as stale. Every item touched during the
+    transaction is recomputed together, once, when it commits.
+    """
+    if po_item_id:
+        defer_on_commit(recompute_item_statuses, po_item_id)
+
+
+# ------------------------------
+# BATCHED ITEM PROGRESS UPDATE
+# ------------------------------
+def update_item_progress(po_process, entries, selected_status, remark, user):
+    """
+    Applies qty deltas for many items of one item-tracking process.
+
+    `entries` is a list of (PurchaseOrderItem, qty_entered) — qty_entered
+    may be negative for returns. The process and its item statuses are
+    locked once, quantities are validated against the locked values, and
+    statuses/history are written with bulk inserts/updates. Item, process
+    and PO status are recomputed once at the end.
+
+    Returns a list of error messages; nothing is written when it is
+    non-empty.
+    """
+    from .forms import auto_set_process_status, check_and_update_po_status
+
+    completed_status = get_completed_status()
+
+    item_ids = [item.id for item, _ in entries]
+
+    with transaction.atomic():
+        # Serialises concurrent updates of the same process, including
+        # ones that would create new item status rows.
+        POProcess.objects.select_for_update().filter(pk=po_process.pk).exists()
+
+        existing = {
+            s.po_item_id: s
+            for s in POProcessItemStatus.objects.select_for_update().filter(
+                po_process=po_process, po_item_id__in=item_ids
+            )
+        }
+
+        now = timezone.now()
+        errors = []
+        to_create = []
+        to_update = []
+        history = []
+
+        for item, qty_entered in entries:
+            total_qty = item.quantity_value or Decimal("0")
+
+            current = existing.get(item.id)
+            already_done = (
+                (current.qty_completed or Decimal("0")) if current else Decimal("0")
+            )
+
+            # Apply delta (can be negative for returns)
+            new_qty = already_done + qty_entered
+
+            if new_qty < Decimal("0"):
+                errors.append(
+                    f"{item.material_description[:30]}: "
+                    f"return qty {qty_entered} exceeds completed qty {already_done}."
+                )
+                continue
+
+            if new_qty > total_qty:
+                errors.append(
+                    f"{item.material_description[:30]}: "
+                    f"qty {new_qty} exceeds total {total_qty}."
+                )
+                continue
+
+            if new_qty >= total_qty:
+                final_status = completed_status or selected_status
+            else:
+                final_status = selected_status
+
+            if current is None:
+                to_create.append(
+                    POProcessItemStatus(
+                        po_process=po_process,
+                        po_item=item,
+                        status=final_status,
+                        qty_completed=new_qty,
+                        updated_by=user,
+                    )
+                )
+            else:
+                current.status = final_status
+                current.qty_completed = new_qty
+                current.updated_by = user
+                # bulk_update() skips auto_now
+                current.updated_at = now
+                to_update.append(current)
+
+            # Append to history (never overwrite)
+            history.append(
+                POProcessItemHistory(
+                    po_process=po_process,
+                    po_item=item,
+                    status=final_status,
+                    qty_completed=qty_entered,
+                    remark=remark,
+                    changed_by=user,
+                )
+            )
+
+        if errors:
+            return errors
+
+        if to_update:
+            POProcessItemStatus.objects.bulk_update(
+                to_update, ["status", "qty_completed", "updated_by", "updated_at"]
+            )
+        if to_create:
+            POProcessItemStatus.objects.bulk_create(to_create)
+        POProcessItemHistory.objects.bulk_create(history)
+        schedule_data_version_bump(POProcessItemStatus)
+
+        # Save process-level history
+        POProcessHistory.objects.create(
+            po_process=po_process,
+            status=selected_status,
+            remark=remark,
+            changed_by=user,
+        )
+
+        po_process.last_updated_by = user
+        po_process.save(update_fields=["last_updated_by"])
+
+        # Bulk writes send no signals — recompute everything once here
+        recompute_item_statuses(item_ids)
+        auto_set_process_status(po_process)
+        check_and_update_po_status(po_process.purchase_order)
+
+    return []
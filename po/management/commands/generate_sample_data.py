@@ -0,0 +1,535 @@
+import datetime
+import random
+import string
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from bom.models import BOM, BOMItem
+from indent.models import Indent, IndentItem, IndentSubItem
+from master.cache import bump_version
+from master.models import CompanyMaster, DepartmentProcessMaster, ProcessStatusMaster
+from notifications.models import Notification
+from notifications.utils import invalidate_unread_counts
+from po.item_tracking import recompute_item_statuses
+from po.models import (
+    POProcess,
+    POProcessHistory,
+    POProcessItemHistory,
+    POProcessItemStatus,
+    POTarget,
+    POTargetItem,
+    PurchaseOrder,
+    PurchaseOrderItem,
+)
+from po.rollup import rebuild_po_summary, refresh_po_rollups
+from po.search import reindex_purchase_orders
+from po.utils import bulk_create_po_processes
+from suntech_erp.report_cache import bump_data_version
+
+User = get_user_model()
+
+DEPARTMENTS = ["Design", "Production", "Production", "Quality", "Logistics"]
+MATERIALS = ["MS", "SS304", "SS316", "GI", "ALU", "CI", "EN8", "PVC"]
+PARTS = ["Plate", "Flange", "Shaft", "Bracket", "Pipe", "Bolt", "Gasket", "Cover"]
+UOMS = ["NOS", "SET", "KG", "MTR"]
+
+
+def _letters(number):
+    """0 → "A", 25 → "Z", 26 → "BA" (company codes may only hold letters)."""
+    letters = ""
+    while True:
+        number, rest = divmod(number, 26)
+        letters = string.ascii_uppercase[rest] + letters
+        if not number:
+            return letters
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills the database with a synthetic, production-sized dataset "
+        "(companies, POs with items and process history, BOMs, indents, "
+        "targets, notifications) for load testing and benchmarks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--companies", type=int, default=50)
+        parser.add_argument("--pos", type=int, default=1000)
+        parser.add_argument("--items", type=int, default=10, help="Items per PO.")
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=8,
+            help="Minimum number of active department processes (missing ones are created).",
+        )
+        parser.add_argument(
+            "--history",
+            type=int,
+            default=3,
+            help="Item-status updates per item on each item-tracking process.",
+        )
+        parser.add_argument("--boms", type=int, default=1, help="BOMs per PO.")
+        parser.add_argument(
+            "--bom-items", type=int, default=3, help="BOM items per PO item."
+        )
+        parser.add_argument("--indents", type=int, default=1, help="Indents per PO.")
+        parser.add_argument(
+            "--targets", type=int, default=2, help="Monthly targets per PO."
+        )
+        parser.add_argument("--notifications", type=int, default=2000)
+        parser.add_argument(
+            "--prefix",
+            default="SYN",
+            help="Upper-case letters put in front of every generated number and code.",
+        )
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Allow running with DEBUG off.",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["force"]:
+            raise CommandError(
+                "DEBUG is off — this looks like a real database. Use --force to continue."
+            )
+
+        prefix = options["prefix"].upper()
+        if not prefix.isalpha():
+            raise CommandError("--prefix may only contain letters.")
+        if PurchaseOrder.objects.filter(po_number__startswith=f"{prefix}/").exists():
+            raise CommandError(
+                f"Data with prefix {prefix} already exists; pick another --prefix."
+            )
+
+        self.prefix = prefix
+        self.options = options
+        self.batch_size = options["batch_size"]
+        self.random = random.Random(options["seed"])
+        self.user = (
+            User.objects.filter(is_superuser=True).order_by("pk").first()
+            or User.objects.order_by("pk").first()
+        )
+        if self.user is None:
+            raise CommandError("Create a user first (createsuperuser).")
+
+        self.statuses = self._ensure_statuses()
+        processes = self._ensure_processes(options["processes"])
+        companies = self._create_companies(options["companies"])
+
+        total = options["pos"]
+        done = 0
+        while done < total:
+            count = min(self.batch_size, total - done)
+            with transaction.atomic():
+                pos = self._create_purchase_orders(done, count, companies)
+                items = self._create_items(pos, options["items"])
+                bulk_create_po_processes(pos, batch_size=self.batch_size)
+                self._create_process_history(pos, processes)
+                self._create_item_history(pos, items, options["history"])
+                bom_items = self._create_boms(pos, items, options["boms"], options["bom_items"])
+                self._create_indents(pos, items, bom_items, options["indents"])
+                self._create_targets(pos, items, options["targets"])
+
+                # Bulk inserts skip the signals that maintain these
+                po_ids = [po.pk for po in pos]
+                recompute_item_statuses([item.pk for item in items])
+                refresh_po_rollups(po_ids)
+                reindex_purchase_orders(po_ids, batch_size=self.batch_size)
+
+            done += count
+            self.stdout.write(f"Created {done}/{total} purchase order(s)...")
+
+        rebuild_po_summary()
+        # Cached report results were computed without the new rows
+        bump_data_version(
+            PurchaseOrder,
+            PurchaseOrderItem,
+            POProcess,
+            POProcessItemStatus,
+            POTarget,
+            POTargetItem,
+            BOM,
+            BOMItem,
+            Indent,
+            CompanyMaster,
+        )
+        self._create_notifications(options["notifications"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done. {total} PO(s) with prefix {prefix} across "
+                f"{len(companies)} new compan(y/ies)."
+            )
+        )
+
+    # ------------------------------
+    # MASTERS
+    # ------------------------------
+    def _ensure_statuses(self):
+        statuses = {}
+        for name, color, completed in [
+            ("PENDING", "#6c757d", False),
+            ("IN PROGRESS", "#ffc107", False),
+            ("COMPLETED", "#28a745", True),
+        ]:
+            statuses[name], _ = ProcessStatusMaster.objects.get_or_create(
+                name=name, defaults={"color_code": color, "is_completed": completed}
+            )
+        return statuses
+
+    def _ensure_processes(self, minimum):
+        processes = list(DepartmentProcessMaster.objects.filter(is_active=True))
+        sequence = DepartmentProcessMaster.objects.aggregate(last=Max("sequence"))["last"] or 0
+        has_tracking = any(p.has_item_tracking for p in processes)
+
+        while len(processes) < minimum:
+            sequence += 1
+            department = DEPARTMENTS[len(processes) % len(DEPARTMENTS)]
+            tracking = department == "Production" and not has_tracking
+            has_tracking |= tracking
+            processes.append(
+                DepartmentProcessMaster.objects.create(
+                    department=department,
+                    name=f"{self.prefix} {department} step {sequence}",
+                    sequence=sequence,
+                    has_item_tracking=tracking,
+                    code=_letters(sequence)[:10] if department == "Production" else "",
+                )
+            )
+        return processes
+
+    def _create_companies(self, count):
+        if CompanyMaster.objects.filter(code__startswith=f"{self.prefix}-").exists():
+            return list(CompanyMaster.objects.filter(code__startswith=f"{self.prefix}-"))
+
+        numeric = [
+            int(code)
+            for code in CompanyMaster.objects.values_list("code2", flat=True)
+            if code.isdigit()
+        ]
+        start = max(numeric, default=0) + 1
+
+        CompanyMaster.objects.bulk_create(
+            [
+                CompanyMaster(
+                    code=f"{self.prefix}-{_letters(n)}",
+                    code2=str(start + n),
+                    name=f"{self.random.choice(PARTS)} Industries {self.prefix} {n + 1}",
+                    contact_person=f"Contact {n + 1}",
+                )
+                for n in range(count)
+            ],
+            batch_size=self.batch_size,
+        )
+        # bulk_create() skips the signal that refreshes the workers' copies
+        bump_version(CompanyMaster)
+        return list(CompanyMaster.objects.filter(code__startswith=f"{self.prefix}-"))
+
+    # ------------------------------
+    # PURCHASE ORDERS
+    # ------------------------------
+    def _create_purchase_orders(self, offset, count, companies):
+        today = timezone.localdate()
+        numbers = [f"{self.prefix}/PO/{n:07d}" for n in range(offset, offset + count)]
+        rows = []
+        for n, po_number in zip(range(offset, offset + count), numbers):
+            po_date = today - datetime.timedelta(days=self.random.randint(0, 730))
+            rows.append(
+                PurchaseOrder(
+                    po_number=po_number,
+                    oa_number=f"{self.prefix}-OA-{n:07d}",
+                    po_date=po_date,
+                    delivery_date=po_date + datetime.timedelta(days=self.random.randint(15, 120)),
+                    company=self.random.choice(companies),
+                    department=self.random.choice(DEPARTMENTS),
+                    po_status="COMPLETED" if self.random.random() < 0.3 else "PENDING",
+                    created_by=self.user,
+                )
+            )
+        PurchaseOrder.objects.bulk_create(rows, batch_size=self.batch_size)
+        # Re-read: MySQL does not return ids from bulk inserts
+        return list(PurchaseOrder.objects.filter(po_number__in=numbers).order_by("pk"))
+
+    def _create_items(self, pos, per_po):
+        rows = []
+        for po in pos:
+            for n in range(per_po):
+                quantity = self.random.randint(1, 50)
+                rows.append(
+                    PurchaseOrderItem(
+                        purchase_order=po,
+                        material_code=f"{self.prefix}-M{self.random.randint(1, 5000):05d}",
+                        material_description=(
+                            f"{self.random.choice(PARTS)} {self.random.choice(MATERIALS)} "
+                            f"{self.random.randint(10, 500)}mm"
+                        ),
+                        quantity=str(quantity),
+                        quantity_value=quantity,
+                        uom=self.random.choice(UOMS),
+                        material_value=Decimal(self.random.randint(500, 500000)),
+                    )
+                )
+        PurchaseOrderItem.objects.bulk_create(rows, batch_size=self.batch_size)
+        return list(
+            PurchaseOrderItem.objects.filter(purchase_order__in=pos).order_by("pk")
+        )
+
+    def _create_process_history(self, pos, processes):
+        """Moves each PO a random number of steps along its processes."""
+        completed = self.statuses["COMPLETED"]
+        in_progress = self.statuses["IN PROGRESS"]
+        order = {p.pk: p.sequence for p in processes}
+
+        by_po = {}
+        for process in POProcess.objects.filter(purchase_order__in=pos):
+            by_po.setdefault(process.purchase_order_id, []).append(process)
+
+        to_update = []
+        history = []
+        for po in pos:
+            steps = sorted(
+                by_po.get(po.pk, []), key=lambda p: order.get(p.department_process_id, 0)
+            )
+            reached = len(steps) if po.po_status == "COMPLETED" else self.random.randint(0, len(steps))
+            for index, process in enumerate(steps[:reached + 1]):
+                status = completed if index < reached else in_progress
+                process.current_status = status
+                to_update.append(process)
+                history.append(
+                    POProcessHistory(
+                        po_process=process,
+                        status=status,
+                        remark="Synthetic update",
+                        changed_by=self.user,
+                    )
+                )
+
+        POProcess.objects.bulk_update(to_update, ["current_status"], batch_size=self.batch_size)
+        POProcessHistory.objects.bulk_create(history, batch_size=self.batch_size)
+
+    def _create_item_history(self, pos, items, updates):
+        tracked = list(
+            POProcess.objects.filter(
+                purchase_order__in=pos, department_process__has_item_tracking=True
+            )
+        )
+        if not tracked or not updates:
+            return
+
+        items_by_po = {}
+        for item in items:
+            items_by_po.setdefault(item.purchase_order_id, []).append(item)
+
+        statuses = []
+        history = []
+        for process in tracked:
+            for item in items_by_po.get(process.purchase_order_id, []):
+                # Some items are untouched, some partly done, some finished
+                if self.random.random() < 0.3:
+                    continue
+                done = 0
+                target = int(item.quantity_value)
+                for _ in range(updates):
+                    step = self.random.randint(0, max(target - done, 0))
+                    if not step:
+                        break
+                    done += step
+                    history.append(
+                        POProcessItemHistory(
+                            po_process=process,
+                            po_item=item,
+                            status=self.statuses["IN PROGRESS"],
+                            qty_completed=step,
+                            remark="Synthetic update",
+                            changed_by=self.user,
+                        )
+                    )
+                if not done:
+                    continue
+                statuses.append(
+                    POProcessItemStatus(
+                        po_process=process,
+                        po_item=item,
+                        status=self.statuses["COMPLETED" if done >= target else "IN PROGRESS"],
+                        qty_completed=done,
+                        updated_by=self.user,
+                    )
+                )
+
+        POProcessItemHistory.objects.bulk_create(history, batch_size=self.batch_size)
+        POProcessItemStatus.objects.bulk_create(statuses, batch_size=self.batch_size)
+
+    # ------------------------------
+    # BOM / INDENT / TARGET
+    # ------------------------------
+    def _create_boms(self, pos, items, per_po, per_item):
+        if not per_po:
+            return {}
+
+        boms = []
+        for po in pos:
+            for bom_no in BOM.generate_bom_nos(po, per_po):
+                boms.append(
+                    BOM(bom_no=bom_no, po=po, bom_date=po.po_date, created_by=self.user)
+                )
+        BOM.objects.bulk_create(boms, batch_size=self.batch_size)
+        boms = list(BOM.objects.filter(po__in=pos).order_by("pk"))
+
+        items_by_po = {}
+        for item in items:
+            items_by_po.setdefault(item.purchase_order_id, []).append(item)
+
+        rows = []
+        for bom in boms:
+            for item in items_by_po.get(bom.po_id, []):
+                for _ in range(per_item):
+                    rows.append(
+                        BOMItem(
+                            bom=bom,
+                            po_item=item,
+                            item=self.random.choice(PARTS),
+                            size=f"{self.random.randint(5, 200)}mm",
+                            quantity=self.random.randint(1, 20),
+                            material=self.random.choice(MATERIALS),
+                        )
+                    )
+        BOMItem.objects.bulk_create(rows, batch_size=self.batch_size)
+
+        bom_items = {}
+        for bom_item in BOMItem.objects.filter(bom__in=boms).order_by("pk"):
+            bom_items.setdefault(bom_item.po_item_id, []).append(bom_item)
+        return bom_items
+
+    def _create_indents(self, pos, items, bom_items, per_po):
+        processes = {
+            process.purchase_order_id: process
+            for process in POProcess.objects.filter(
+                purchase_order__in=pos, department_process__department="Production"
+            )
+            .exclude(department_process__code="")
+            .select_related("department_process")
+        }
+        if not per_po or not processes:
+            return
+
+        indents = []
+        for po in pos:
+            process = processes.get(po.pk)
+            if process is None:
+                continue
+            for number in Indent.generate_indent_numbers(po, process, per_po):
+                indents.append(
+                    Indent(
+                        indent_number=number,
+                        indent_date=po.po_date + datetime.timedelta(days=7),
+                        purchase_order=po,
+                        po_process=process,
+                        created_by=self.user,
+                    )
+                )
+        Indent.objects.bulk_create(indents, batch_size=self.batch_size)
+        indents = list(Indent.objects.filter(purchase_order__in=pos).order_by("pk"))
+
+        items_by_po = {}
+        for item in items:
+            items_by_po.setdefault(item.purchase_order_id, []).append(item)
+
+        rows = []
+        for indent in indents:
+            for item in items_by_po.get(indent.purchase_order_id, []):
+                rows.append(
+                    IndentItem(
+                        indent=indent,
+                        purchase_order_item=item,
+                        required_quantity=item.quantity_value,
+                        uom=item.uom,
+                    )
+                )
+        IndentItem.objects.bulk_create(rows, batch_size=self.batch_size)
+
+        sub_items = []
+        for indent_item in IndentItem.objects.filter(indent__in=indents):
+            for bom_item in bom_items.get(indent_item.purchase_order_item_id, []):
+                sub_items.append(
+                    IndentSubItem(
+                        indent_item=indent_item,
+                        bom_item=bom_item,
+                        item=bom_item.item,
+                        size=bom_item.size,
+                        quantity=bom_item.quantity,
+                        material=bom_item.material,
+                    )
+                )
+        IndentSubItem.objects.bulk_create(sub_items, batch_size=self.batch_size)
+
+    def _create_targets(self, pos, items, per_po):
+        if not per_po:
+            return
+
+        items_by_po = {}
+        for item in items:
+            items_by_po.setdefault(item.purchase_order_id, []).append(item)
+
+        targets = []
+        chosen = {}
+        for po in pos:
+            po_items = items_by_po.get(po.pk, [])
+            if not po_items:
+                continue
+            month, year = po.po_date.month, po.po_date.year
+            for _ in range(per_po):
+                selected = self.random.sample(po_items, self.random.randint(1, len(po_items)))
+                chosen[(po.pk, month, year)] = selected
+                targets.append(
+                    POTarget(
+                        purchase_order=po,
+                        month=month,
+                        year=year,
+                        target_value=sum(item.material_value for item in selected),
+                    )
+                )
+                month, year = (1, year + 1) if month == 12 else (month + 1, year)
+        POTarget.objects.bulk_create(targets, batch_size=self.batch_size)
+
+        POTargetItem.objects.bulk_create(
+            [
+                POTargetItem(po_target=target, po_item=item)
+                for target in POTarget.objects.filter(purchase_order__in=pos)
+                for item in chosen.get(
+                    (target.purchase_order_id, target.month, target.year), []
+                )
+            ],
+            batch_size=self.batch_size,
+        )
+
+    # ------------------------------
+    # NOTIFICATIONS
+    # ------------------------------
+    def _create_notifications(self, count):
+        if not count:
+            return
+
+        user_ids = list(User.objects.values_list("pk", flat=True)[:50])
+        rows = []
+        for n in range(count):
+            # One in five is a broadcast
+            user_id = None if n % 5 == 0 else self.random.choice(user_ids)
+            rows.append(
+                Notification(
+                    user_id=user_id,
+                    actor=self.user if user_id is None else None,
+                    title=f"{self.prefix} update {n + 1}",
+                    message="Synthetic notification.",
+                    is_read=user_id is not None and self.random.random() < 0.6,
+                )
+            )
+        Notification.objects.bulk_create(rows, batch_size=self.batch_size)
+        invalidate_unread_counts()
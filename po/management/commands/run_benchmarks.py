@@ -0,0 +1,136 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from suntech_erp import benchmarks
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the hot views and Excel exports (median wall time, query "
+        "count, peak memory) and compares them with a stored baseline. "
+        "Run it against data from generate_sample_data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Timed runs per case, after one warm-up (default 5).",
+        )
+        parser.add_argument(
+            "--only",
+            nargs="+",
+            metavar="CASE",
+            help="Run only these cases.",
+        )
+        parser.add_argument(
+            "--baseline",
+            default=str(Path(settings.BASE_DIR) / "benchmarks" / "baseline.json"),
+            help="Baseline file (default benchmarks/baseline.json).",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Store this run as the new baseline.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed slowdown against the baseline (default 0.25 = 25%%).",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit with an error if any case regressed.",
+        )
+        parser.add_argument(
+            "--user",
+            help="Username to run as (default: the first superuser).",
+        )
+        parser.add_argument(
+            "--list",
+            action="store_true",
+            help="List the available cases and exit.",
+        )
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for case in benchmarks.CASES:
+                self.stdout.write(f"{case.name} ({case.method.upper()})")
+            return
+
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1.")
+
+        names = {case.name for case in benchmarks.CASES}
+        unknown = set(options["only"] or []) - names
+        if unknown:
+            raise CommandError(f"Unknown case(s): {', '.join(sorted(unknown))}")
+
+        if options["user"]:
+            user = User.objects.filter(username=options["user"]).first()
+        else:
+            user = User.objects.filter(is_superuser=True).order_by("pk").first()
+        if user is None:
+            raise CommandError("No user to run as — pass --user or create a superuser.")
+
+        results = benchmarks.run(
+            user,
+            repeat=options["repeat"],
+            only=options["only"],
+            log=self.stdout.write,
+        )
+
+        baseline_path = Path(options["baseline"])
+        baseline = {}
+        if baseline_path.exists():
+            baseline = json.loads(baseline_path.read_text()).get("cases", {})
+
+        regressed = self._print_comparison(
+            benchmarks.compare(results, baseline, options["tolerance"])
+        )
+
+        if options["save_baseline"]:
+            cases = dict(baseline)
+            cases.update({name: result.as_dict() for name, result in results.items()})
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(
+                json.dumps({"repeat": options["repeat"], "cases": cases}, indent=2)
+            )
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {baseline_path}."))
+
+        if regressed and options["fail_on_regression"]:
+            raise CommandError(f"{len(regressed)} case(s) regressed: {', '.join(regressed)}")
+
+    def _print_comparison(self, rows):
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'case':32} {'median ms':>10} {'base ms':>10} {'queries':>8} "
+            f"{'base q':>7} {'peak KB':>8}"
+        )
+
+        regressed = []
+        for name, result, previous, regressions in rows:
+            line = (
+                f"{name:32} {result.median_ms:>10} "
+                f"{previous['median_ms'] if previous else '—':>10} "
+                f"{result.queries:>8} "
+                f"{previous['queries'] if previous else '—':>7} "
+                f"{result.peak_kb:>8}"
+            )
+            if regressions:
+                regressed.append(name)
+                self.stdout.write(
+                    self.style.ERROR(f"{line}  REGRESSED ({', '.join(regressions)})")
+                )
+            else:
+                self.stdout.write(line)
+        return regressed
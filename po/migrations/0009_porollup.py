@@ -0,0 +1,114 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Exists, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_rollups(apps, schema_editor):
+    PurchaseOrder = apps.get_model("po", "PurchaseOrder")
+    PurchaseOrderItem = apps.get_model("po", "PurchaseOrderItem")
+    PORollup = apps.get_model("po", "PORollup")
+    PONote = apps.get_model("po", "PONote")
+    POTask = apps.get_model("po", "POTask")
+    POComment = apps.get_model("po", "POComment")
+    BOM = apps.get_model("bom", "BOM")
+    Indent = apps.get_model("indent", "Indent")
+
+    def child(model, aggregate, output_field):
+        qs = (
+            model.objects.filter(purchase_order=OuterRef("pk"))
+            .order_by()
+            .values("purchase_order")
+            .annotate(result=aggregate)
+            .values("result")
+        )
+        return Coalesce(Subquery(qs), Value(0), output_field=output_field)
+
+    qty_field = models.DecimalField(max_digits=12, decimal_places=3)
+    value_field = models.DecimalField(max_digits=15, decimal_places=2)
+    count_field = models.IntegerField()
+
+    rows = (
+        PurchaseOrder.objects.order_by()
+        .annotate(
+            r_total_quantity=child(
+                PurchaseOrderItem, Sum("quantity_value"), qty_field
+            ),
+            r_total_value=child(
+                PurchaseOrderItem,
+                Sum(
+                    F("quantity_value") * F("material_value"),
+                    output_field=value_field,
+                ),
+                value_field,
+            ),
+            r_has_bom=Exists(BOM.objects.filter(po=OuterRef("pk"))),
+            r_has_indent=Exists(Indent.objects.filter(purchase_order=OuterRef("pk"))),
+            r_notes_count=child(PONote, Count("id"), count_field),
+            r_tasks_count=child(POTask, Count("id"), count_field),
+            r_comments_count=child(POComment, Count("id"), count_field),
+        )
+        .values(
+            "pk",
+            "r_total_quantity",
+            "r_total_value",
+            "r_has_bom",
+            "r_has_indent",
+            "r_notes_count",
+            "r_tasks_count",
+            "r_comments_count",
+        )
+    )
+
+    batch = []
+    for row in rows.iterator(chunk_size=1000):
+        batch.append(
+            PORollup(
+                purchase_order_id=row["pk"],
+                total_quantity=row["r_total_quantity"],
+                total_value=row["r_total_value"],
+                has_bom=row["r_has_bom"],
+                has_indent=row["r_has_indent"],
+                notes_count=row["r_notes_count"],
+                tasks_count=row["r_tasks_count"],
+                comments_count=row["r_comments_count"],
+            )
+        )
+        if len(batch) >= 1000:
+            PORollup.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        PORollup.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('po', '0008_poprocessitemstatus_qty_completed_and_more'),
+        ('bom', '0003_alter_bomitem_options_bomitem_po_item_and_more'),
+        ('indent', '0002_remove_indent_status_alter_indent_indent_number_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PORollup',
+            fields=[
+                ('purchase_order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='po.purchaseorder')),
+                ('total_quantity', models.DecimalField(decimal_places=3, default=0, max_digits=12)),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('has_bom', models.BooleanField(default=False)),
+                ('has_indent', models.BooleanField(default=False)),
+                ('notes_count', models.PositiveIntegerField(default=0)),
+                ('tasks_count', models.PositiveIntegerField(default=0)),
+                ('comments_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'PO Rollup',
+                'verbose_name_plural': 'PO Rollups',
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('po', '0009_porollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='POSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_po_count', models.PositiveIntegerField(default=0)),
+                ('completed_po_count', models.PositiveIntegerField(default=0)),
+                ('total_po_value', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('dispatched_po_value', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'PO Summary',
+                'verbose_name_plural': 'PO Summary',
+            },
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:06
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_search_tokens(apps, schema_editor):
+    PurchaseOrder = apps.get_model("po", "PurchaseOrder")
+    PurchaseOrderItem = apps.get_model("po", "PurchaseOrderItem")
+    POSearchToken = apps.get_model("po", "POSearchToken")
+
+    # Same tokenisation as po.search.document_tokens, frozen here
+    word_re = re.compile(r"[0-9a-z]+")
+
+    def words(text):
+        return word_re.findall((text or "").lower())
+
+    def code(text):
+        return "".join((text or "").lower().split())
+
+    po_ids = list(PurchaseOrder.objects.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(po_ids), 500):
+        batch_ids = po_ids[start : start + 500]
+
+        items_by_po = {}
+        for po_id, material_code, description in PurchaseOrderItem.objects.filter(
+            purchase_order_id__in=batch_ids
+        ).values_list("purchase_order_id", "material_code", "material_description"):
+            items_by_po.setdefault(po_id, []).append((material_code, description))
+
+        rows = []
+        for po_id, po_number, oa_number, company_name in PurchaseOrder.objects.filter(
+            pk__in=batch_ids
+        ).values_list("pk", "po_number", "oa_number", "company__name"):
+            tokens = set()
+            for number in (po_number, oa_number):
+                tokens.add(code(number))
+                tokens.update(words(number))
+            tokens.update(words(company_name))
+            for material_code, description in items_by_po.get(po_id, []):
+                tokens.add(code(material_code))
+                tokens.update(words(material_code))
+                tokens.update(words(description))
+            tokens.discard("")
+            rows.extend(
+                POSearchToken(purchase_order_id=po_id, token=token[:64])
+                for token in {token[:64] for token in tokens}
+            )
+
+        POSearchToken.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('po', '0010_posummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='POSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('purchase_order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='po.purchaseorder')),
+            ],
+            options={
+                'verbose_name': 'PO Search Token',
+                'verbose_name_plural': 'PO Search Tokens',
+                'indexes': [models.Index(fields=['token', 'purchase_order'], name='po_posearch_token_76dfe5_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_search_tokens, migrations.RunPython.noop),
+    ]
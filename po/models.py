@@ -479,3 +479,88 @@ class POTask(models.Model):
 
     def __str__(self):
         return f"{self.purchase_order.po_number} | {self.task[:50]}"
+
+
+class PORollup(models.Model):
+    """
+    Denormalised per-PO totals and child counts.
+    One row per PurchaseOrder — kept in sync by signals (see po/rollup.py)
+    so list/report views don't have to GROUP BY across every child table.
+    """
+
+    purchase_order = models.OneToOneField(
+        PurchaseOrder,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="rollup",
+    )
+    total_quantity = models.DecimalField(
+        max_digits=12,
+        decimal_places=3,
+        default=0,
+    )
+    total_value = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=0,
+    )
+    has_bom = models.BooleanField(default=False)
+    has_indent = models.BooleanField(default=False)
+    notes_count = models.PositiveIntegerField(default=0)
+    tasks_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "PO Rollup"
+        verbose_name_plural = "PO Rollups"
+
+    def __str__(self):
+        return f"Rollup for PO #{self.purchase_order_id}"
+
+
+class POSummary(models.Model):
+    """
+    Order-book KPIs for the PO report header.
+    Single row (pk=1), adjusted by deltas from po/rollup.py whenever a PO
+    is created, deleted, changes status or its item totals change.
+    """
+
+    total_po_count = models.PositiveIntegerField(default=0)
+    completed_po_count = models.PositiveIntegerField(default=0)
+    total_po_value = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    dispatched_po_value = models.DecimalField(
+        max_digits=18, decimal_places=2, default=0
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "PO Summary"
+        verbose_name_plural = "PO Summary"
+
+    def __str__(self):
+        return f"{self.total_po_count} POs | ₹{self.total_po_value}"
+
+
+class POSearchToken(models.Model):
+    """
+    Search index for the PO list: one row per distinct lower-cased token
+    of a PO's numbers, company name and item codes/descriptions.
+    Rebuilt by signals (see po/search.py); matched with an indexed
+    prefix lookup instead of icontains over the joined items table.
+    """
+
+    purchase_order = models.ForeignKey(
+        PurchaseOrder,
+        on_delete=models.CASCADE,
+        related_name="search_tokens",
+    )
+    token = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [models.Index(fields=["token", "purchase_order"])]
+        verbose_name = "PO Search Token"
+        verbose_name_plural = "PO Search Tokens"
+
+    def __str__(self):
+        return f"{self.token} → PO #{self.purchase_order_id}"
@@ -0,0 +1,164 @@
+from decimal import Decimal
+
+from django.db.models import (
+    DecimalField,
+    F,
+    OuterRef,
+    Prefetch,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
+
+from .models import POTarget, POTargetItem, PurchaseOrderItem
+
+SHORT_MONTHS = [
+    "Jan",
+    "Feb",
+    "Mar",
+    "Apr",
+    "May",
+    "Jun",
+    "Jul",
+    "Aug",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dec",
+]
+
+
+def _percentage(achieved, target):
+    return round(achieved / target * 100, 2) if target > 0 else 0
+
+
+def _line_total():
+    return Coalesce(
+        F("quantity_value") * F("material_value"),
+        Value(0),
+        output_field=DecimalField(max_digits=15, decimal_places=2),
+    )
+
+
+# ------------------------------
+# TARGET vs ACHIEVED — PER TARGET
+# ------------------------------
+def target_report_queryset(month, year):
+    """
+    POTargets of one month, each annotated with `achieved` — the value of
+    its COMPLETED items — via a correlated subquery, so the whole list is
+    one query. Target items are prefetched in one more query with their
+    `line_total` computed by the database.
+    """
+    value_field = DecimalField(max_digits=15, decimal_places=2)
+
+    achieved = (
+        POTargetItem.objects.filter(
+            po_target=OuterRef("pk"),
+            po_item__status="COMPLETED",
+        )
+        .order_by()
+        .values("po_target")
+        .annotate(
+            total=Sum(
+                F("po_item__quantity_value") * F("po_item__material_value"),
+                output_field=value_field,
+            )
+        )
+        .values("total")
+    )
+
+    return (
+        POTarget.objects.select_related("purchase_order", "purchase_order__company")
+        .filter(month=month, year=year)
+        .annotate(
+            achieved=Coalesce(Subquery(achieved), Value(0), output_field=value_field)
+        )
+        .prefetch_related(
+            "target_items",
+            Prefetch(
+                "target_items__po_item",
+                queryset=PurchaseOrderItem.objects.annotate(line_total=_line_total()),
+            ),
+        )
+    )
+
+
+# ------------------------------
+# TARGET vs ACHIEVED — MONTH-WISE
+# ------------------------------
+def monthly_target_report(year_from, year_to=None):
+    """
+    Month-wise target vs achieved for every month from Jan `year_from`
+    to Dec `year_to` (defaults to a single year).
+
+    Two grouped queries cover the whole range, whatever its length:
+    target totals per (year, month), and the value of COMPLETED target
+    items per (year, month). Months without targets are filled with zero.
+    Shared by the HTML report and its Excel export.
+    """
+    year_to = year_to or year_from
+    if year_to < year_from:
+        year_from, year_to = year_to, year_from
+
+    value_field = DecimalField(max_digits=15, decimal_places=2)
+
+    targets = {
+        (row["year"], row["month"]): row["total"]
+        for row in POTarget.objects.filter(year__range=(year_from, year_to))
+        .order_by()
+        .values("year", "month")
+        .annotate(total=Sum("target_value"))
+    }
+
+    # An item belongs to one PO and a PO has one target per month,
+    # so each item is counted at most once per month here.
+    achieved = {
+        (row["po_target__year"], row["po_target__month"]): row["total"]
+        for row in POTargetItem.objects.filter(
+            po_target__year__range=(year_from, year_to),
+            po_item__status="COMPLETED",
+        )
+        .order_by()
+        .values("po_target__year", "po_target__month")
+        .annotate(
+            total=Sum(
+                F("po_item__quantity_value") * F("po_item__material_value"),
+                output_field=value_field,
+            )
+        )
+    }
+
+    multi_year = year_from != year_to
+    data = []
+    total_target = Decimal("0")
+    total_achieved = Decimal("0")
+
+    for year in range(year_from, year_to + 1):
+        for month_num in range(1, 13):
+            month_target = targets.get((year, month_num)) or Decimal("0")
+            month_achieved = achieved.get((year, month_num)) or Decimal("0")
+
+            total_target += month_target
+            total_achieved += month_achieved
+
+            month_name = SHORT_MONTHS[month_num - 1]
+            data.append(
+                {
+                    "month_num": month_num,
+                    "month_name": month_name,
+                    "label": f"{month_name} {year}" if multi_year else month_name,
+                    "year": year,
+                    "target": month_target,
+                    "achieved": month_achieved,
+                    "percentage": _percentage(month_achieved, month_target),
+                }
+            )
+
+    return {
+        "data": data,
+        "total_target": total_target,
+        "total_achieved": total_achieved,
+        "overall_percentage": _percentage(total_achieved, total_target),
+    }
@@ -0,0 +1,339 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (
+    Count,
+    Q,
+    DecimalField,
+    Exists,
+    F,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    BooleanField,
+)
+from django.db.models.functions import Coalesce
+
+from .models import (
+    PurchaseOrder,
+    PurchaseOrderItem,
+    PORollup,
+    POSummary,
+    PONote,
+    POTask,
+    POComment,
+)
+from .utils import defer_on_commit
+from suntech_erp.report_cache import schedule_data_version_bump
+
+ROLLUP_FIELDS = [
+    "total_quantity",
+    "total_value",
+    "has_bom",
+    "has_indent",
+    "notes_count",
+    "tasks_count",
+    "comments_count",
+]
+
+
+def _child_aggregate(model, fk, aggregate, output_field):
+    """
+    Correlated subquery returning `aggregate` over the children of one PO.
+    Each child table is scanned on its own, so there is no row explosion.
+    """
+    qs = (
+        model.objects.filter(**{fk: OuterRef("pk")})
+        .order_by()
+        .values(fk)
+        .annotate(result=aggregate)
+        .values("result")
+    )
+    return Coalesce(Subquery(qs), Value(0), output_field=output_field)
+
+
+def compute_rollups(po_ids):
+    """
+    Returns {po_id: {field: value}} computed from the child tables,
+    plus the PO's current "po_status" (used for the summary deltas).
+    POs that no longer exist are simply absent from the result.
+    """
+    from bom.models import BOM
+    from indent.models import Indent
+
+    count_field = IntegerField()
+
+    rows = (
+        PurchaseOrder.objects.filter(pk__in=po_ids)
+        .order_by()
+        .annotate(
+            total_quantity=_child_aggregate(
+                PurchaseOrderItem,
+                "purchase_order",
+                Sum("quantity_value"),
+                DecimalField(max_digits=12, decimal_places=3),
+            ),
+            total_value=_child_aggregate(
+                PurchaseOrderItem,
+                "purchase_order",
+                Sum(
+                    F("quantity_value") * F("material_value"),
+                    output_field=DecimalField(max_digits=15, decimal_places=2),
+                ),
+                DecimalField(max_digits=15, decimal_places=2),
+            ),
+            has_bom=Exists(BOM.objects.filter(po=OuterRef("pk"))),
+            has_indent=Exists(Indent.objects.filter(purchase_order=OuterRef("pk"))),
+            notes_count=_child_aggregate(
+                PONote, "purchase_order", Count("id"), count_field
+            ),
+            tasks_count=_child_aggregate(
+                POTask, "purchase_order", Count("id"), count_field
+            ),
+            comments_count=_child_aggregate(
+                POComment, "purchase_order", Count("id"), count_field
+            ),
+        )
+        .values("pk", "po_status", *ROLLUP_FIELDS)
+    )
+
+    return {row.pop("pk"): row for row in rows}
+
+
+def refresh_po_rollups(po_ids):
+    """
+    Recomputes PORollup rows for the given POs and moves the summary
+    totals by the change in each PO's value.
+
+    The rollup rows are locked before anything is computed, so two
+    refreshes of the same PO (requests committing at the same time)
+    run one after the other and each diffs against the value the other
+    wrote — a change is never counted twice in the summary. One locking
+    read, one read query and one bulk update; new POs add one insert.
+    """
+    po_ids = list(po_ids)
+    if not po_ids:
+        return
+
+    with transaction.atomic():
+        locked = PORollup.objects.select_for_update()
+        existing = locked.in_bulk(po_ids)
+
+        missing = [pk for pk in po_ids if pk not in existing]
+        if missing:
+            # Empty rows first, so new POs are locked like the others;
+            # a row another refresh just inserted is kept as it is
+            PORollup.objects.bulk_create(
+                [
+                    PORollup(purchase_order_id=pk)
+                    for pk in PurchaseOrder.objects.filter(pk__in=missing)
+                    .order_by()
+                    .values_list("pk", flat=True)
+                ],
+                ignore_conflicts=True,
+            )
+            existing.update(locked.in_bulk(missing))
+
+        if not existing:
+            return
+
+        to_update = []
+        value_delta = Decimal("0")
+        dispatched_delta = Decimal("0")
+        for po_id, values in compute_rollups(list(existing)).items():
+            po_status = values.pop("po_status")
+            rollup = existing[po_id]
+
+            delta = (values["total_value"] or Decimal("0")) - rollup.total_value
+            value_delta += delta
+            if po_status == "COMPLETED":
+                dispatched_delta += delta
+
+            for field, value in values.items():
+                setattr(rollup, field, value)
+            to_update.append(rollup)
+
+        if to_update:
+            PORollup.objects.bulk_update(to_update, ROLLUP_FIELDS)
+
+        apply_summary_delta(
+            total_po_value=value_delta,
+            dispatched_po_value=dispatched_delta,
+        )
+        schedule_data_version_bump(PORollup)
+
+
+def schedule_rollup_refresh(po_id):
+    """
+    Marks a PO's rollup as stale. The refresh runs once per PO
+    when the surrounding transaction commits.
+    """
+    if po_id:
+        defer_on_commit(refresh_po_rollups, po_id)
+
+
+def annotate_rollup(queryset):
+    """
+    Exposes the rollup columns on a PurchaseOrder queryset under their
+    usual names (po.total_value, po.has_bom, ...). A plain one-to-one join,
+    so no GROUP BY or DISTINCT is needed.
+    """
+    return queryset.annotate(
+        total_quantity=Coalesce(
+            F("rollup__total_quantity"),
+            Value(0),
+            output_field=DecimalField(max_digits=12, decimal_places=3),
+        ),
+        total_value=Coalesce(
+            F("rollup__total_value"),
+            Value(0),
+            output_field=DecimalField(max_digits=15, decimal_places=2),
+        ),
+        has_bom=Coalesce(
+            F("rollup__has_bom"), Value(False), output_field=BooleanField()
+        ),
+        has_indent=Coalesce(
+            F("rollup__has_indent"), Value(False), output_field=BooleanField()
+        ),
+        notes_count=Coalesce(
+            F("rollup__notes_count"), Value(0), output_field=IntegerField()
+        ),
+        tasks_count=Coalesce(
+            F("rollup__tasks_count"), Value(0), output_field=IntegerField()
+        ),
+        comments_count=Coalesce(
+            F("rollup__comments_count"), Value(0), output_field=IntegerField()
+        ),
+    )
+
+
+# ------------------------------
+# GLOBAL PO SUMMARY
+# ------------------------------
+SUMMARY_PK = 1
+
+
+def _po_value(purchase_order_id):
+    return (
+        PORollup.objects.filter(pk=purchase_order_id)
+        .values_list("total_value", flat=True)
+        .first()
+    ) or Decimal("0")
+
+
+def rebuild_po_summary():
+    """
+    Recomputes the summary row from scratch. One aggregate over
+    PurchaseOrder ⟕ PORollup — used when the row doesn't exist yet.
+    """
+    value_field = DecimalField(max_digits=18, decimal_places=2)
+    agg = PurchaseOrder.objects.aggregate(
+        total_po_count=Count("pk"),
+        completed_po_count=Count("pk", filter=Q(po_status="COMPLETED")),
+        total_po_value=Coalesce(
+            Sum("rollup__total_value"), Value(0), output_field=value_field
+        ),
+        dispatched_po_value=Coalesce(
+            Sum("rollup__total_value", filter=Q(po_status="COMPLETED")),
+            Value(0),
+            output_field=value_field,
+        ),
+    )
+    summary, _ = POSummary.objects.update_or_create(pk=SUMMARY_PK, defaults=agg)
+    return summary
+
+
+def apply_summary_delta(**deltas):
+    """
+    Adjusts the summary counters in place, e.g.
+    apply_summary_delta(total_po_count=1). If the row doesn't exist yet
+    it is left alone — the next read rebuilds it from the tables.
+    """
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if changes:
+        POSummary.objects.filter(pk=SUMMARY_PK).update(**changes)
+
+
+def on_po_created(po):
+    completed = po.po_status == "COMPLETED"
+    apply_summary_delta(total_po_count=1, completed_po_count=int(completed))
+
+
+def on_po_status_changed(po, old_status):
+    if (old_status == "COMPLETED") == (po.po_status == "COMPLETED"):
+        return
+    sign = 1 if po.po_status == "COMPLETED" else -1
+    apply_summary_delta(
+        completed_po_count=sign,
+        dispatched_po_value=sign * _po_value(po.pk),
+    )
+
+
+def on_po_deleted(po):
+    completed = po.po_status == "COMPLETED"
+    value = _po_value(po.pk)
+    apply_summary_delta(
+        total_po_count=-1,
+        completed_po_count=-int(completed),
+        total_po_value=-value,
+        dispatched_po_value=-value if completed else 0,
+    )
+
+
+def get_po_summary():
+    """
+    Global (unfiltered) KPIs for the PO report — a single-row read.
+    """
+    summary = POSummary.objects.filter(pk=SUMMARY_PK).first() or rebuild_po_summary()
+
+    total_value = summary.total_po_value
+    dispatched_value = summary.dispatched_po_value
+    dispatch_percentage = (
+        (dispatched_value / total_value) * 100 if total_value > 0 else 0
+    )
+
+    return {
+        "total_po_count": summary.total_po_count,
+        "completed_po_count": summary.completed_po_count,
+        "pending_po_count": summary.total_po_count - summary.completed_po_count,
+        "total_po_value": total_value,
+        "dispatched_po_value": dispatched_value,
+        "pending_po_value": total_value - dispatched_value,
+        "dispatch_percentage": round(dispatch_percentage, 2),
+    }
+
+
+def get_filtered_po_summary(po_qs):
+    """
+    Counts and values for a filtered PurchaseOrder queryset in one query,
+    reading item totals from PORollup instead of joining the items table.
+    """
+    value_field = DecimalField(max_digits=18, decimal_places=2)
+    agg = po_qs.order_by().aggregate(
+        total_count=Count("pk"),
+        completed_count=Count("pk", filter=Q(po_status="COMPLETED")),
+        total_value=Coalesce(
+            Sum("rollup__total_value"), Value(0), output_field=value_field
+        ),
+        dispatched_value=Coalesce(
+            Sum("rollup__total_value", filter=Q(po_status="COMPLETED")),
+            Value(0),
+            output_field=value_field,
+        ),
+    )
+
+    total_value = agg["total_value"]
+    dispatched_value = agg["dispatched_value"]
+    dispatch_pct = (dispatched_value / total_value) * 100 if total_value > 0 else 0
+
+    return {
+        "total_count": agg["total_count"],
+        "completed_count": agg["completed_count"],
+        "pending_count": agg["total_count"] - agg["completed_count"],
+        "total_value": total_value,
+        "dispatched_value": dispatched_value,
+        "pending_value": total_value - dispatched_value,
+        "dispatch_percentage": round(dispatch_pct, 2),
+    }
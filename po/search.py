@@ -0,0 +1,154 @@
+import re
+
+from django.db import transaction
+from django.db.models import Q
+
+from master.models import CompanyMaster
+
+from .models import POSearchToken, PurchaseOrder, PurchaseOrderItem
+from .utils import defer_on_commit
+
+TOKEN_MAX_LENGTH = 64
+
+_WORD_RE = re.compile(r"[0-9a-z]+")
+
+
+def _words(text):
+    return _WORD_RE.findall((text or "").lower())
+
+
+def _code(text):
+    """A whole number/code as one token, e.g. "sun/24-25/001"."""
+    return "".join((text or "").lower().split())
+
+
+def document_tokens(po_number, oa_number, company_name, items):
+    """
+    Set of search tokens for one PO. `items` is an iterable of
+    (material_code, material_description) pairs.
+
+    Numbers and codes are indexed whole (so "SUN/24-25" prefix-matches
+    "SUN/24-25/001") and split into words; names and descriptions as words.
+    """
+    tokens = set()
+    for code in (po_number, oa_number):
+        tokens.add(_code(code))
+        tokens.update(_words(code))
+    tokens.update(_words(company_name))
+    for material_code, material_description in items:
+        tokens.add(_code(material_code))
+        tokens.update(_words(material_code))
+        tokens.update(_words(material_description))
+    tokens.discard("")
+    return {token[:TOKEN_MAX_LENGTH] for token in tokens}
+
+
+# ------------------------------
+# INDEXING
+# ------------------------------
+def reindex_purchase_orders(po_ids, batch_size=1000):
+    """
+    Rebuilds the search tokens of the given POs: two reads, one delete,
+    bulk inserts. POs that no longer exist just lose their tokens.
+    """
+    po_ids = list(po_ids)
+    if not po_ids:
+        return
+
+    items_by_po = {}
+    for po_id, code, description in PurchaseOrderItem.objects.filter(
+        purchase_order_id__in=po_ids
+    ).values_list("purchase_order_id", "material_code", "material_description"):
+        items_by_po.setdefault(po_id, []).append((code, description))
+
+    rows = []
+    for po_id, po_number, oa_number, company_name in PurchaseOrder.objects.filter(
+        pk__in=po_ids
+    ).values_list("pk", "po_number", "oa_number", "company__name"):
+        tokens = document_tokens(
+            po_number, oa_number, company_name, items_by_po.get(po_id, [])
+        )
+        rows.extend(
+            POSearchToken(purchase_order_id=po_id, token=token) for token in tokens
+        )
+
+    with transaction.atomic():
+        POSearchToken.objects.filter(purchase_order_id__in=po_ids).delete()
+        POSearchToken.objects.bulk_create(rows, batch_size=batch_size)
+
+
+def schedule_search_reindex(po_id):
+    """Re-tokenises a PO once, when the surrounding transaction commits."""
+    if po_id:
+        defer_on_commit(reindex_purchase_orders, po_id)
+
+
+# ------------------------------
+# QUERYING
+# ------------------------------
+def search_purchase_orders(queryset, query):
+    """
+    Filters a PurchaseOrder queryset to POs matching `query`.
+
+    Every word of the query must prefix-match one of the PO's tokens
+    ("acme pump" → company Acme with a pump item); alternatively the whole
+    query may prefix-match a PO/OA number or material code as typed.
+    Each condition is an indexed `token LIKE 'x%'` subquery, so no join
+    on items and no DISTINCT are needed.
+    """
+    def matching(prefix):
+        return Q(
+            pk__in=POSearchToken.objects.filter(
+                token__istartswith=prefix[:TOKEN_MAX_LENGTH]
+            ).values("purchase_order_id")
+        )
+
+    whole = _code(query)
+    if not whole:
+        return queryset
+
+    condition = matching(whole)
+
+    words = _words(query)
+    if words:
+        all_words = Q()
+        for word in dict.fromkeys(words):
+            all_words &= matching(word)
+        condition |= all_words
+
+    return queryset.filter(condition)
+
+
+# ------------------------------
+# TYPEAHEAD LOOKUP
+# ------------------------------
+LOOKUP_LIMIT = 20
+
+
+def lookup_purchase_orders(term, limit=LOOKUP_LIMIT):
+    """
+    PO picker search: POs whose PO number, OA number, or company
+    code/name starts with `term`, newest first.
+
+    Every branch is a prefix match on an indexed column (unique PO/OA
+    numbers, company code and name), and at most `limit` + 1 rows are
+    read. Returns (purchase_orders, more).
+    """
+    term = (term or "").strip()[:100]
+    if not term:
+        return [], False
+
+    companies = CompanyMaster.objects.filter(
+        Q(code__istartswith=term) | Q(name__istartswith=term)
+    ).values("pk")
+
+    purchase_orders = list(
+        PurchaseOrder.objects.select_related("company")
+        .filter(
+            Q(po_number__istartswith=term)
+            | Q(oa_number__istartswith=term)
+            | Q(company__in=companies)
+        )
+        .order_by("-id")[: limit + 1]
+    )
+    return purchase_orders[:limit], len(purchase_orders) > limit
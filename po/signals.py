@@ -1,55 +1,47 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
-from django.db import transaction
 
 from .models import (
+    POProcess,
     POProcessItemStatus,
     PurchaseOrder,
-    POProcess,
     POProcessHistory,
     PurchaseOrderItem,
+    PONote,
+    POTask,
+    POComment,
+    PORollup,
+    POTarget,
+    POTargetItem,
 )
-from master.models import DepartmentProcessMaster, ProcessStatusMaster
+from .utils import bulk_create_po_processes
+from .item_tracking import schedule_item_status_recompute
+from .search import schedule_search_reindex
+from .rollup import (
+    schedule_rollup_refresh,
+    on_po_created,
+    on_po_status_changed,
+    on_po_deleted,
+)
+from master.models import CompanyMaster
+from suntech_erp.report_cache import schedule_data_version_bump
+
+# PurchaseOrder fields that feed the search index
+SEARCHED_PO_FIELDS = ("po_number", "oa_number", "company_id")
 
 
 @receiver(post_save, sender=PurchaseOrder)
 def create_po_processes(sender, instance, created, **kwargs):
     """
     Auto-create POProcess and POProcessHistory rows
-    when a new PurchaseOrder is created.
+    when a new PurchaseOrder is created (bulk inserts).
     Production-safe.
     """
 
     if not created:
         return
 
-    pending_status = ProcessStatusMaster.objects.filter(
-        name__iexact="PENDING", is_active=True
-    ).first()
-
-    # Do not crash production if master data is missing
-    if not pending_status:
-        return
-
-    department_processes = DepartmentProcessMaster.objects.filter(is_active=True)
-    if not department_processes.exists():
-        return
-
-    with transaction.atomic():
-        for dp in department_processes:
-            po_process = POProcess.objects.create(
-                purchase_order=instance,
-                department_process=dp,
-                current_status=pending_status,
-                last_updated_by=instance.created_by,
-            )
-
-            POProcessHistory.objects.create(
-                po_process=po_process,
-                status=pending_status,
-                remark="Auto-created on PO creation",
-                changed_by=instance.created_by,
-            )
+    bulk_create_po_processes([instance])
 
 
 @receiver(post_delete, sender=PurchaseOrder)
@@ -61,59 +53,116 @@ def cleanup_po_process_history(sender, instance, **kwargs):
     POProcessHistory.objects.filter(po_process__purchase_order=instance).delete()
 
 
-def _update_po_item_status(po_item):
-    """
-    Recalculates PurchaseOrderItem.status based on all
-    POProcessItemStatus records across all item-tracking processes.
-
-    Rules:
-      No tracking processes exist               → leave untouched (stay PENDING)
-      No POProcessItemStatus for item           → PENDING
-      At least one exists, not all done         → INPROCESS
-      ALL tracking processes: status completed
-        AND qty_completed >= quantity_value      → COMPLETED
-    """
-    from decimal import Decimal
+@receiver(post_save, sender=POProcessItemStatus)
+def on_process_item_status_save(sender, instance, **kwargs):
+    schedule_item_status_recompute(instance.po_item_id)
 
-    tracking_processes = po_item.purchase_order.processes.filter(
-        department_process__has_item_tracking=True
-    )
 
-    if not tracking_processes.exists():
-        return
+@receiver(post_delete, sender=POProcessItemStatus)
+def on_process_item_status_delete(sender, instance, **kwargs):
+    schedule_item_status_recompute(instance.po_item_id)
 
-    item_statuses = POProcessItemStatus.objects.filter(
-        po_item=po_item,
-        po_process__in=tracking_processes,
-    ).select_related("status", "po_item")
 
-    if not item_statuses.exists():
-        new_status = "PENDING"
-    else:
-        tracking_process_ids = set(tracking_processes.values_list("id", flat=True))
-        total_qty = po_item.quantity_value or Decimal("0")
+# ------------------------------
+# PO ROLLUP & SUMMARY MAINTENANCE
+# ------------------------------
+@receiver(pre_save, sender=PurchaseOrder)
+def remember_previous_po_status(sender, instance, **kwargs):
+    if instance.pk:
+        previous = (
+            PurchaseOrder.objects.filter(pk=instance.pk)
+            .values_list("po_status", *SEARCHED_PO_FIELDS)
+            .first()
+        )
+        if previous:
+            instance._previous_po_status = previous[0]
+            instance._previous_search_fields = previous[1:]
 
-        fully_done_process_ids = set()
-        for item_status in item_statuses:
-            status_done = item_status.status.is_completed
-            qty_done = item_status.qty_completed or Decimal("0")
-            if status_done and qty_done >= total_qty:
-                fully_done_process_ids.add(item_status.po_process_id)
 
-        if tracking_process_ids == fully_done_process_ids:
-            new_status = "COMPLETED"
-        else:
-            new_status = "INPROCESS"
+@receiver(post_save, sender=PurchaseOrder)
+def update_po_summary_on_save(sender, instance, created, **kwargs):
+    if created:
+        on_po_created(instance)
+        schedule_rollup_refresh(instance.pk)
+        return
 
-    if po_item.status != new_status:
-        PurchaseOrderItem.objects.filter(pk=po_item.pk).update(status=new_status)
+    previous_status = getattr(instance, "_previous_po_status", None)
+    if previous_status and previous_status != instance.po_status:
+        on_po_status_changed(instance, previous_status)
 
 
-@receiver(post_save, sender=POProcessItemStatus)
-def on_process_item_status_save(sender, instance, **kwargs):
-    _update_po_item_status(instance.po_item)
+@receiver(post_save, sender=PurchaseOrder)
+def reindex_po_search_on_save(sender, instance, created, **kwargs):
+    current = tuple(getattr(instance, field) for field in SEARCHED_PO_FIELDS)
+    if created or getattr(instance, "_previous_search_fields", None) != current:
+        schedule_search_reindex(instance.pk)
+
+
+@receiver(pre_delete, sender=PurchaseOrder)
+def update_po_summary_on_delete(sender, instance, **kwargs):
+    # Runs before the cascade removes the PO's rollup row
+    on_po_deleted(instance)
+
+
+@receiver(post_save, sender=PurchaseOrderItem)
+@receiver(post_delete, sender=PurchaseOrderItem)
+@receiver(post_save, sender=PONote)
+@receiver(post_delete, sender=PONote)
+@receiver(post_save, sender=POTask)
+@receiver(post_delete, sender=POTask)
+@receiver(post_save, sender=POComment)
+@receiver(post_delete, sender=POComment)
+def refresh_rollup_on_child_change(sender, instance, **kwargs):
+    schedule_rollup_refresh(instance.purchase_order_id)
+
+
+# ------------------------------
+# PO SEARCH INDEX MAINTENANCE
+# ------------------------------
+@receiver(post_save, sender=PurchaseOrderItem)
+@receiver(post_delete, sender=PurchaseOrderItem)
+def reindex_po_search_on_item_change(sender, instance, **kwargs):
+    schedule_search_reindex(instance.purchase_order_id)
+
+
+@receiver(pre_save, sender=CompanyMaster)
+def remember_previous_company_name(sender, instance, **kwargs):
+    if instance.pk:
+        instance._previous_name = (
+            CompanyMaster.objects.filter(pk=instance.pk)
+            .values_list("name", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=CompanyMaster)
+def reindex_po_search_on_company_rename(sender, instance, created, **kwargs):
+    previous_name = getattr(instance, "_previous_name", None)
+    if created or previous_name is None or previous_name == instance.name:
+        return
 
+    for po_id in PurchaseOrder.objects.filter(company=instance).values_list(
+        "pk", flat=True
+    ):
+        schedule_search_reindex(po_id)
 
+
+# ------------------------------
+# REPORT CACHE INVALIDATION
+# ------------------------------
+@receiver(post_save, sender=PurchaseOrder)
+@receiver(post_delete, sender=PurchaseOrder)
+@receiver(post_save, sender=PurchaseOrderItem)
+@receiver(post_delete, sender=PurchaseOrderItem)
+@receiver(post_save, sender=POProcess)
+@receiver(post_delete, sender=POProcess)
+@receiver(post_save, sender=POProcessItemStatus)
 @receiver(post_delete, sender=POProcessItemStatus)
-def on_process_item_status_delete(sender, instance, **kwargs):
-    _update_po_item_status(instance.po_item)
+@receiver(post_save, sender=PORollup)
+@receiver(post_delete, sender=PORollup)
+@receiver(post_save, sender=POTarget)
+@receiver(post_delete, sender=POTarget)
+@receiver(post_save, sender=POTargetItem)
+@receiver(post_delete, sender=POTargetItem)
+def invalidate_cached_reports(sender, **kwargs):
+    schedule_data_version_bump(sender)
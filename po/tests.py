@@ -1,3 +1,762 @@
-from django.test import TestCase
+import datetime
+import io
+import re
+import threading
+import zipfile
+from decimal import Decimal
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import (
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.urls import reverse
+
+from master import cache as master_cache
+from master.models import CompanyMaster, DepartmentProcessMaster, ProcessStatusMaster
+from master.versions import get_version, model_label
+from suntech_erp.exports import XLSX_CONTENT_TYPE
+from suntech_erp.middleware import QueryRecorder
+from suntech_erp.pagination import keyset_page, paginate_list
+
+from .item_tracking import update_item_progress
+from .models import (
+    POComment,
+    PONote,
+    POProcess,
+    POProcessItemStatus,
+    PORollup,
+    POSummary,
+    POTarget,
+    POTargetItem,
+    PurchaseOrder,
+    PurchaseOrderItem,
+)
+from .reports import monthly_target_report, target_report_queryset
+from .rollup import SUMMARY_PK, rebuild_po_summary, refresh_po_rollups
+from .search import document_tokens, search_purchase_orders
+from .utils import bulk_create_po_processes
+from .views import _po_report_items, _po_report_pos, _process_report_rows
+
+User = get_user_model()
+
+
+class POTestCase(TestCase):
+    """
+    Master data, a company and a user. Writes are made inside
+    captureOnCommitCallbacks(execute=True), so the rollup, search and
+    cache hooks that run on commit fire as they would in a request.
+    """
+
+    def setUp(self):
+        cache.clear()
+        master_cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pending = ProcessStatusMaster.objects.create(name="PENDING")
+            self.completed = ProcessStatusMaster.objects.create(
+                name="COMPLETED", is_completed=True
+            )
+            self.cutting = DepartmentProcessMaster.objects.create(
+                department="Production",
+                name="Cutting",
+                sequence=1,
+                has_item_tracking=True,
+                code="RAW",
+            )
+            self.company = CompanyMaster.objects.create(
+                code="ACM", code2="1", name="Acme Pumps"
+            )
+            self.user = User.objects.create_user("planner", password="x")
+        self.today = datetime.date.today()
+
+    def create_po(self, number, items=(), **fields):
+        """A PO with `items` as (material_code, description, qty, value)."""
+        with self.captureOnCommitCallbacks(execute=True):
+            po = PurchaseOrder.objects.create(
+                po_number=number,
+                oa_number=f"OA-{number}",
+                company=fields.pop("company", self.company),
+                po_date=fields.pop("po_date", self.today),
+                created_by=self.user,
+                **fields,
+            )
+            for code, description, qty, value in items:
+                PurchaseOrderItem.objects.create(
+                    purchase_order=po,
+                    material_code=code,
+                    material_description=description,
+                    quantity=str(qty),
+                    quantity_value=qty,
+                    material_value=value,
+                )
+        return po
+
+    def version(self, model):
+        return get_version(model_label(model))
+
+
+class PORollupTests(POTestCase):
+    def test_rollup_follows_item_changes(self):
+        po = self.create_po("P1", [("M1", "Pipe", 2, 10), ("M2", "Valve", 3, 5)])
+
+        rollup = PORollup.objects.get(purchase_order=po)
+        self.assertEqual(rollup.total_quantity, Decimal("5"))
+        self.assertEqual(rollup.total_value, Decimal("35"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            po.items.get(material_code="M1").delete()
+            PONote.objects.create(purchase_order=po, note="n", created_by=self.user)
+
+        rollup.refresh_from_db()
+        self.assertEqual(rollup.total_quantity, Decimal("3"))
+        self.assertEqual(rollup.total_value, Decimal("15"))
+        self.assertEqual(rollup.notes_count, 1)
+
+
+class POSummaryTests(POTestCase):
+    def test_summary_deltas_match_a_rebuild(self):
+        rebuild_po_summary()
+
+        first = self.create_po("P1", [("M1", "Pipe", 2, 10)])
+        second = self.create_po("P2", [("M1", "Pipe", 1, 7)])
+        self.create_po("P3", [("M1", "Pipe", 4, 1)], po_status="COMPLETED")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.po_status = "COMPLETED"
+            first.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            PurchaseOrderItem.objects.create(
+                purchase_order=first,
+                material_code="M2",
+                material_description="Valve",
+                quantity="1",
+                quantity_value=1,
+                material_value=100,
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+
+        fields = (
+            "total_po_count",
+            "completed_po_count",
+            "total_po_value",
+            "dispatched_po_value",
+        )
+        maintained = POSummary.objects.filter(pk=SUMMARY_PK).values(*fields).get()
+        rebuilt = rebuild_po_summary()
+
+        self.assertEqual(maintained, {field: getattr(rebuilt, field) for field in fields})
+        self.assertEqual(maintained["total_po_count"], 2)
+        self.assertEqual(maintained["completed_po_count"], 2)
+        self.assertEqual(maintained["dispatched_po_value"], Decimal("124"))
+
+    def test_back_to_back_refreshes_count_a_change_once(self):
+        po = self.create_po("P1", [("M1", "Pipe", 2, 10)], po_status="COMPLETED")
+        rebuild_po_summary()
+
+        # Written without signals, then refreshed twice — the second
+        # refresh must diff against what the first one wrote
+        po.items.update(material_value=15)
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_po_rollups([po.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_po_rollups({po.pk})
+
+        summary = POSummary.objects.get(pk=SUMMARY_PK)
+        self.assertEqual(summary.total_po_value, Decimal("30"))
+        self.assertEqual(summary.dispatched_po_value, Decimal("30"))
+
+    def test_refresh_creates_missing_rollups(self):
+        po = self.create_po("P1", [("M1", "Pipe", 2, 10)])
+        PORollup.objects.filter(pk=po.pk).delete()
+        rebuild_po_summary()
+
+        refresh_po_rollups([po.pk, 0])
+
+        self.assertEqual(PORollup.objects.get(pk=po.pk).total_value, Decimal("20"))
+        self.assertEqual(
+            POSummary.objects.get(pk=SUMMARY_PK).total_po_value, Decimal("20")
+        )
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class PORollupConcurrencyTests(TransactionTestCase):
+    def test_concurrent_refreshes_count_a_change_once(self):
+        company = CompanyMaster.objects.create(code="ACM", code2="1", name="Acme")
+        po = PurchaseOrder.objects.create(
+            po_number="P1",
+            oa_number="OA-P1",
+            company=company,
+            po_date=datetime.date.today(),
+        )
+        PurchaseOrderItem.objects.create(
+            purchase_order=po,
+            material_code="M1",
+            material_description="Pipe",
+            quantity="2",
+            quantity_value=2,
+            material_value=10,
+        )
+        rebuild_po_summary()
+        po.items.update(material_value=15)
+
+        barrier = threading.Barrier(2)
+
+        def refresh():
+            try:
+                barrier.wait()
+                refresh_po_rollups([po.pk])
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=refresh) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(
+            POSummary.objects.get(pk=SUMMARY_PK).total_po_value, Decimal("30")
+        )
+
+
+class POSearchTests(POTestCase):
+    def search(self, query):
+        return list(
+            search_purchase_orders(PurchaseOrder.objects.all(), query).values_list(
+                "po_number", flat=True
+            )
+        )
+
+    def test_document_tokens(self):
+        tokens = document_tokens(
+            "SUN/24-25/001", "OA 7", "Acme Pumps", [("MC-1", "Steel pipe")]
+        )
+        self.assertTrue(
+            {"sun/24-25/001", "sun", "001", "oa7", "acme", "mc-1", "steel", "pipe"}
+            <= tokens
+        )
+
+    def test_index_follows_po_item_and_company_changes(self):
+        po = self.create_po("SUN/001", [("MC-1", "Steel pipe", 1, 1)])
+        self.create_po("SUN/002", [("MC-2", "Brass valve", 1, 1)])
+
+        self.assertEqual(self.search("acme pipe"), ["SUN/001"])
+        self.assertEqual(self.search("sun/00"), ["SUN/002", "SUN/001"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item = po.items.get()
+            item.material_description = "Gate valve"
+            item.save()
+        self.assertEqual(self.search("pipe"), [])
+        self.assertEqual(self.search("gate"), ["SUN/001"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            po.po_number = "NEW/001"
+            po.save()
+        self.assertEqual(self.search("new/0"), ["NEW/001"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.name = "Zenith Works"
+            self.company.save()
+        self.assertEqual(self.search("zenith"), ["SUN/002", "NEW/001"])
+        self.assertEqual(self.search("acme"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            po.items.get().delete()
+        self.assertEqual(self.search("gate"), [])
+
+
+class KeysetPaginationTests(POTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pos = [self.create_po(f"P{i:02}") for i in range(25)]
+        self.newest_first = [po.pk for po in reversed(self.pos)]
+        self.factory = RequestFactory()
+
+    def page(self, **params):
+        return keyset_page(
+            self.factory.get("/", params),
+            PurchaseOrder.objects.all(),
+            per_page=10,
+            count_queryset=PurchaseOrder.objects.filter(po_status="PENDING"),
+        )
+
+    def test_next_and_previous_cursors(self):
+        first = self.page()
+        self.assertEqual([po.pk for po in first], self.newest_first[:10])
+        self.assertTrue(first.has_next())
+        self.assertFalse(first.has_previous())
+        self.assertIsNone(first.previous_cursor)
+
+        second = self.page(after=first.next_cursor, start=first.next_start)
+        self.assertEqual([po.pk for po in second], self.newest_first[10:20])
+        self.assertEqual(second.start_index(), 11)
+        self.assertTrue(second.has_previous())
+
+        last = self.page(after=second.next_cursor, start=second.next_start)
+        self.assertEqual([po.pk for po in last], self.newest_first[20:])
+        self.assertFalse(last.has_next())
+        self.assertEqual(last.end_index(), 25)
+
+        back = self.page(before=last.previous_cursor, start=last.start_index())
+        self.assertEqual([po.pk for po in back], self.newest_first[10:20])
+        self.assertEqual(back.start_index(), 11)
+
+        home = self.page(before=back.previous_cursor, start=back.start_index())
+        self.assertEqual([po.pk for po in home], self.newest_first[:10])
+        self.assertFalse(home.has_previous())
+        self.assertEqual(home.start_index(), 1)
+
+        self.assertEqual(first.approximate_count, 25)
+
+    def test_invalid_cursor_shows_first_page(self):
+        page = self.page(after="abc", start="-4")
+        self.assertEqual([po.pk for po in page], self.newest_first[:10])
+        self.assertEqual(page.start_index(), 1)
+
+    @override_settings(KEYSET_PAGINATION=False)
+    def test_numbered_pages_when_disabled(self):
+        page = paginate_list(
+            self.factory.get("/", {"page": 3}),
+            PurchaseOrder.objects.order_by("-id"),
+            per_page=10,
+        )
+        self.assertFalse(getattr(page, "is_keyset", False))
+        self.assertEqual([po.pk for po in page], self.newest_first[20:])
+
+
+@override_settings(REPORT_CACHE_TIMEOUT=60)
+class POReportCacheTests(POTestCase):
+    def filters(self, **values):
+        return {
+            "date_from": str(self.today),
+            "date_to": str(self.today),
+            "po_number": "",
+            "oa_number": "",
+            "company": "",
+            "po_status": "",
+            "department": "",
+            **values,
+        }
+
+    def test_result_is_reused_until_a_po_is_saved_or_deleted(self):
+        first = self.create_po("P1", [("M1", "Pipe", 2, 10)])
+        self.assertEqual(_po_report_pos(self.filters())["ids"], [first.pk])
+
+        # Hit: only the data versions are read
+        with self.assertNumQueries(1):
+            _po_report_pos(self.filters())
+
+        second = self.create_po("P2", [("M1", "Pipe", 1, 5)])
+        result = _po_report_pos(self.filters())
+        self.assertEqual(result["ids"], [first.pk, second.pk])
+        self.assertEqual(result["summary"]["total_value"], Decimal("25"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(_po_report_pos(self.filters())["ids"], [second.pk])
+
+    def test_item_edit_invalidates_item_totals(self):
+        po = self.create_po("P1", [("M1", "Pipe", 2, 10)])
+        self.assertEqual(
+            _po_report_items(self.filters())["totals"]["total_value"], Decimal("20")
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item = po.items.get()
+            item.material_value = 1
+            item.save()
+
+        self.assertEqual(
+            _po_report_items(self.filters())["totals"]["total_value"], Decimal("2")
+        )
+
+    def test_blank_filters_share_an_entry(self):
+        self.create_po("P1")
+        _po_report_pos(self.filters())
+
+        with self.assertNumQueries(1):
+            _po_report_pos(self.filters(po_number="  ", company=None))
+
+    @override_settings(REPORT_CACHE_TIMEOUT=0)
+    def test_zero_timeout_disables_the_cache(self):
+        self.create_po("P1")
+        _po_report_pos(self.filters())
+
+        with self.assertNumQueries(2):
+            _po_report_pos(self.filters())
+
+    def test_bulk_rollup_refresh_bumps_version(self):
+        po = self.create_po("P1", [("M1", "Pipe", 2, 10)])
+        PurchaseOrderItem.objects.filter(purchase_order=po).update(material_value=3)
+        version = self.version(PORollup)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_po_rollups([po.pk])
+
+        self.assertEqual(self.version(PORollup), version + 1)
+
+    def test_bulk_process_creation_bumps_version(self):
+        po = self.create_po("P1")
+        POProcess.objects.filter(purchase_order=po).delete()
+        version = self.version(POProcess)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_create_po_processes([po])
+
+        self.assertEqual(POProcess.objects.filter(purchase_order=po).count(), 1)
+        self.assertEqual(self.version(POProcess), version + 1)
+
+    def test_item_progress_bumps_status_and_item_versions(self):
+        po = self.create_po("P1", [("M1", "Pipe", 2, 10)])
+        process = POProcess.objects.get(purchase_order=po)
+        item = po.items.get()
+        versions = self.version(POProcessItemStatus), self.version(PurchaseOrderItem)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            errors = update_item_progress(
+                process, [(item, Decimal("2"))], self.completed, "", self.user
+            )
+
+        self.assertEqual(errors, [])
+        item.refresh_from_db()
+        self.assertEqual(item.status, "COMPLETED")
+        self.assertEqual(self.version(POProcessItemStatus), versions[0] + 1)
+        self.assertEqual(self.version(PurchaseOrderItem), versions[1] + 1)
+
+
+class ProcessReportRowsTests(POTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.inspection = DepartmentProcessMaster.objects.create(
+                department="Quality", name="Inspection", sequence=2, code="QC"
+            )
+            self.on_hold = ProcessStatusMaster.objects.create(name="ON HOLD")
+        self.processes = [self.cutting.pk, self.inspection.pk]
+
+        self.first = self.create_po("P1", [("M1", "Pipe", 2, 10), ("M2", "Flange", 1, 5)])
+        self.second = self.create_po("P2", [("M3", "Valve", 1, 7)])
+        self.bare = self.create_po("P3", [("M4", "Gasket", 4, 1)])
+        with self.captureOnCommitCallbacks(execute=True):
+            POProcess.objects.filter(purchase_order=self.bare).delete()
+
+            # First PO: one tracked item completed, the other untouched;
+            # second PO's inspection is on hold
+            cutting = self.first.processes.get(department_process=self.cutting)
+            POProcessItemStatus.objects.create(
+                po_process=cutting,
+                po_item=self.first.items.get(material_code="M1"),
+                status=self.completed,
+            )
+            self.second.processes.filter(department_process=self.inspection).update(
+                current_status=self.on_hold
+            )
+
+    def old_rows(self, processes, po_ids=(), status_ids=()):
+        """The rows as the per-PO Python loop used to build them."""
+        process_qs = POProcess.objects.filter(
+            department_process_id__in=processes
+        ).order_by("purchase_order__id", "department_process__sequence")
+        if po_ids:
+            process_qs = process_qs.filter(purchase_order_id__in=po_ids)
+
+        rows = []
+        for process in process_qs:
+            po = process.purchase_order
+            status_map = {s.po_item_id: s for s in process.item_statuses.all()}
+            for item in po.items.all():
+                if process.department_process.has_item_tracking:
+                    item_status = status_map.get(item.id)
+                    status = item_status.status if item_status else None
+                    status_name = status.name if status else item.status
+                else:
+                    status = process.current_status
+                    status_name = status.name
+                rows.append(
+                    {
+                        "po_id": po.id,
+                        "po_number": po.po_number,
+                        "process": process.department_process.name,
+                        "process_status": process.current_status.name,
+                        "item_description": item.material_description,
+                        "row_status": status_name,
+                        "status_id": status.id if status else None,
+                    }
+                )
+        if status_ids:
+            wanted = {str(s) for s in status_ids}
+            rows = [r for r in rows if str(r["status_id"]) in wanted]
+        return rows
+
+    def new_rows(self, *args, **kwargs):
+        """The columns old_rows() builds, from _process_report_rows()."""
+        keys = [
+            "po_id",
+            "po_number",
+            "process",
+            "process_status",
+            "item_description",
+            "row_status",
+            "status_id",
+        ]
+        return [
+            {key: row[key] for key in keys}
+            for row in _process_report_rows(*args, **kwargs)
+        ]
+
+    def test_rows_match_per_po_output(self):
+        rows = self.new_rows(self.processes)
+
+        self.assertEqual(rows, self.old_rows(self.processes))
+        self.assertEqual(
+            [(r["po_number"], r["process"], r["row_status"]) for r in rows],
+            [
+                ("P1", "CUTTING", "COMPLETED"),
+                ("P1", "CUTTING", "PENDING"),
+                ("P1", "INSPECTION", "PENDING"),
+                ("P1", "INSPECTION", "PENDING"),
+                ("P2", "CUTTING", "PENDING"),
+                ("P2", "INSPECTION", "ON HOLD"),
+            ],
+        )
+
+    def test_status_filter_matches_per_po_output(self):
+        for status in (self.completed, self.on_hold, self.pending):
+            with self.subTest(status=status.name):
+                self.assertEqual(
+                    self.new_rows(self.processes, status_ids=[status.pk]),
+                    self.old_rows(self.processes, status_ids=[status.pk]),
+                )
+
+    def test_po_without_processes_has_no_rows(self):
+        self.assertEqual(self.new_rows(self.processes, po_ids=[self.bare.pk]), [])
+        self.assertEqual(
+            self.new_rows([self.inspection.pk], po_ids=[self.second.pk]),
+            self.old_rows([self.inspection.pk], po_ids=[self.second.pk]),
+        )
+
+
+class TargetReportTests(POTestCase):
+    def setUp(self):
+        super().setUp()
+        first = self.create_po("P1", [("M1", "Pipe", 2, 10), ("M2", "Flange", 1, 5)])
+        second = self.create_po("P2", [("M3", "Valve", 3, 7)])
+        with self.captureOnCommitCallbacks(execute=True):
+            first.items.filter(material_code="M1").update(status="COMPLETED")
+            self.add_target(first, 3, 2025, first.items.all())
+            self.add_target(second, 3, 2025, second.items.all())
+            self.add_target(second, 11, 2026, second.items.all())
+
+    def add_target(self, po, month, year, items):
+        target = POTarget.objects.create(
+            purchase_order=po,
+            month=month,
+            year=year,
+            target_value=sum(i.quantity_value * i.material_value for i in items),
+        )
+        POTargetItem.objects.bulk_create(
+            POTargetItem(po_target=target, po_item=item) for item in items
+        )
+
+    def test_queryset_annotates_achieved_and_line_totals(self):
+        with self.assertNumQueries(3):
+            targets = {
+                t.purchase_order.po_number: (
+                    t.achieved,
+                    [ti.po_item.line_total for ti in t.target_items.all()],
+                )
+                for t in target_report_queryset(3, 2025)
+            }
+
+        self.assertEqual(
+            targets,
+            {
+                "P1": (Decimal("20"), [Decimal("20"), Decimal("5")]),
+                "P2": (Decimal("0"), [Decimal("21")]),
+            },
+        )
+        self.assertEqual(list(target_report_queryset(4, 2025)), [])
+
+    def test_monthly_report_single_year(self):
+        with self.assertNumQueries(2):
+            report = monthly_target_report(2025)
+
+        self.assertEqual(len(report["data"]), 12)
+        march = report["data"][2]
+        self.assertEqual(
+            (march["label"], march["target"], march["achieved"], march["percentage"]),
+            ("Mar", Decimal("46"), Decimal("20"), Decimal("43.48")),
+        )
+        self.assertEqual(report["data"][3]["target"], Decimal("0"))
+        self.assertEqual(report["total_target"], Decimal("46"))
+
+    def test_monthly_report_range_in_either_order(self):
+        report = monthly_target_report(2026, 2025)
+
+        self.assertEqual(len(report["data"]), 24)
+        self.assertEqual(report["data"][0]["label"], "Jan 2025")
+        self.assertEqual(report["data"][22]["label"], "Nov 2026")
+        self.assertEqual(report["total_target"], Decimal("67"))
+
+    def test_monthly_report_without_targets(self):
+        report = monthly_target_report(2030)
+
+        self.assertEqual(
+            {(row["target"], row["achieved"], row["percentage"]) for row in report["data"]},
+            {(Decimal("0"), Decimal("0"), 0)},
+        )
+        self.assertEqual(report["overall_percentage"], 0)
+
+
+class TargetYearlyReportRangeTests(POTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user.is_superuser = True
+        self.user.save()
+        self.client.force_login(self.user)
+
+    def get(self, name, **params):
+        return self.client.get(reverse(f"po:{name}"), params)
+
+    def test_years_within_bounds_are_reported(self):
+        for year, year_to, months in (
+            ("2020", "", 12),
+            ("2099", "", 12),
+            ("2020", "2024", 60),
+            ("2099", "2095", 60),
+        ):
+            with self.subTest(year=year, year_to=year_to):
+                response = self.get("po_target_yearly_report", year=year, year_to=year_to)
+                self.assertEqual(len(response.context["data"]), months)
+                self.assertFalse(list(response.context["messages"]))
+
+    def test_out_of_range_years_show_an_error(self):
+        for year, year_to, error in (
+            ("2019", "", "Years must be between 2020 and 2099."),
+            ("2099", "2100", "Years must be between 2020 and 2099."),
+            ("2020", "2025", "The report covers at most 5 years at a time."),
+        ):
+            with self.subTest(year=year, year_to=year_to):
+                response = self.get("po_target_yearly_report", year=year, year_to=year_to)
+                self.assertFalse(response.context["filter_used"])
+                self.assertEqual(
+                    [str(m) for m in response.context["messages"]], [error]
+                )
+
+                export = self.get(
+                    "po_target_yearly_report_excel", year=year, year_to=year_to
+                )
+                self.assertEqual(export.status_code, 400)
+                self.assertEqual(export.content.decode(), error)
+
+    def test_missing_year_gives_an_empty_report(self):
+        response = self.get("po_target_yearly_report", year="abc")
+
+        self.assertFalse(response.context["filter_used"])
+        self.assertEqual(response.context["data"], [])
+        self.assertEqual(
+            self.get("po_target_yearly_report_excel", year="").status_code, 200
+        )
+
+
+class POCommentsExportTests(POTestCase):
+    XLSX_NS = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+    def sheet_rows(self, response):
+        """The sheet's rows as lists of cell text, title and headers included."""
+        data = b"".join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            root = ElementTree.fromstring(zf.read("xl/worksheets/sheet1.xml"))
+        return [
+            ["".join(c.itertext()) for c in row.findall("x:c", self.XLSX_NS)]
+            for row in root.iterfind("x:sheetData/x:row", self.XLSX_NS)
+        ]
+
+    def test_every_po_gets_rows(self):
+        first = self.create_po("P1", [("M1", "Pipe", 1, 10)])
+        self.create_po("P2")
+        with self.captureOnCommitCallbacks(execute=True):
+            PONote.objects.create(purchase_order=first, note="Call buyer")
+            POComment.objects.create(
+                purchase_order=first,
+                po_item=first.items.get(),
+                comment="Short by one",
+                commented_by=self.user,
+            )
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("po:po_comments_report_excel"))
+
+        self.assertEqual(response["Content-Type"], XLSX_CONTENT_TYPE)
+        title, blank, headers, *rows = self.sheet_rows(response)
+        self.assertEqual(headers[:3], ["#", "PO Number", "OA Number"])
+        self.assertEqual(
+            [(row[0], row[1], row[6], row[9]) for row in rows],
+            [
+                ("1", "P2", "—", "No notes, tasks or item comments for this PO."),
+                ("2", "P1", "Note", "Call buyer"),
+                ("2", "P1", "Item Comment", "Short by one"),
+            ],
+        )
+
+
+@override_settings(REQUEST_TIMING=True)
+class RequestTimingTests(POTestCase):
+    def setUp(self):
+        super().setUp()
+        for number in ("P1", "P2", "P3"):
+            self.create_po(number, [("M1", "Pipe", 1, 10)])
+        self.client.force_login(self.user)
+
+    def get_list(self):
+        return self.client.get(reverse("po:po_list"))
+
+    def test_server_timing_header_and_log(self):
+        with self.assertLogs("suntech_erp.timing", "INFO") as logs:
+            response = self.get_list()
+
+        match = re.fullmatch(
+            r'total;dur=[\d.]+, db;dur=[\d.]+;desc="(\d+) queries, (\d+) duplicate", '
+            r"app;dur=-?[\d.]+",
+            response["Server-Timing"],
+        )
+        self.assertIsNotNone(match, response["Server-Timing"])
+        (record,) = logs.records
+        self.assertEqual(record.timing["view"], "po:po_list")
+        self.assertEqual(record.timing["queries"], int(match[1]))
+        self.assertEqual(record.timing["duplicate_queries"], int(match[2]))
+
+    def test_po_list_stays_within_its_budget(self):
+        with self.assertNoLogs("suntech_erp.timing", "WARNING"):
+            response = self.get_list()
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(REQUEST_QUERY_BUDGETS={"po:po_list": 1})
+    def test_over_budget_view_logs_a_warning(self):
+        with self.assertLogs("suntech_erp.timing", "WARNING") as logs:
+            self.get_list()
+
+        (record,) = logs.records
+        self.assertTrue(record.getMessage().startswith("po:po_list ran "))
+        self.assertEqual(record.timing["budget"], 1)
+
+    @override_settings(REQUEST_TIMING=False)
+    def test_disabled_timing_adds_no_header(self):
+        self.assertNotIn("Server-Timing", self.get_list())
+
+    def test_recorder_counts_repeated_statements(self):
+        recorder = QueryRecorder()
+        for sql in ("SELECT 1", "SELECT 2", "SELECT 1", "SELECT 1"):
+            recorder(lambda *args: None, sql, (), False, {})
+
+        self.assertEqual(recorder.count, 4)
+        self.assertEqual(recorder.duplicates, 2)
+        self.assertEqual(recorder.most_repeated(), [("SELECT 1", 3)])
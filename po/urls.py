@@ -24,6 +24,7 @@ urlpatterns = [
     ),
     path("<int:pk>/print/", views.po_print, name="po_print"),
     path("<int:pk>/ajax-items/", views.ajax_po_items_list, name="ajax_po_items_list"),
+    path("lookup/", views.po_lookup, name="po_lookup"),
     # ------------------------------
     # PO PROCESS ROUTES
     # ------------------------------
@@ -0,0 +1,88 @@
+from django.db import transaction
+
+
+def defer_on_commit(handler, key, using=None):
+    """
+    Queue `key` and call `handler(keys)` once when the current transaction
+    commits, with every key queued for that handler in the meantime.
+    Outside a transaction the handler runs immediately.
+
+    Keys are kept in a set, so touching the same PO / item many times inside
+    one request only costs a single recompute.
+    """
+    connection = transaction.get_connection(using)
+    queues = connection.__dict__.setdefault("_deferred_on_commit", {})
+    queues.setdefault(handler, set()).add(key)
+
+    def flush():
+        keys = queues.pop(handler, None)
+        if keys:
+            handler(keys)
+
+    transaction.on_commit(flush, using=using)
+
+
+def bulk_create_po_processes(purchase_orders, batch_size=1000):
+    """
+    Creates the POProcess rows (one per active DepartmentProcessMaster,
+    starting PENDING) and their initial POProcessHistory rows for newly
+    created POs, using bulk inserts instead of two inserts per process.
+
+    Used by the PurchaseOrder post_save signal and by bulk imports —
+    pass every imported PO at once (they must already have primary keys).
+    Does nothing if the PENDING status or active processes are missing.
+    """
+    from master.cache import get_active_processes, get_pending_status
+    from suntech_erp.report_cache import schedule_data_version_bump
+    from .models import POProcess, POProcessHistory
+
+    purchase_orders = [po for po in purchase_orders if po.pk]
+    if not purchase_orders:
+        return
+
+    pending_status = get_pending_status()
+
+    # Do not crash production if master data is missing
+    if not pending_status:
+        return
+
+    department_process_ids = [p.id for p in get_active_processes()]
+    if not department_process_ids:
+        return
+
+    with transaction.atomic():
+        processes = POProcess.objects.bulk_create(
+            [
+                POProcess(
+                    purchase_order_id=po.pk,
+                    department_process_id=dp_id,
+                    current_status=pending_status,
+                    last_updated_by_id=po.created_by_id,
+                )
+                for po in purchase_orders
+                for dp_id in department_process_ids
+            ],
+            batch_size=batch_size,
+        )
+
+        # Backends that don't return ids from bulk inserts (MySQL): read
+        # them back. The POs are new, so all their processes are too.
+        if any(p.pk is None for p in processes):
+            processes = POProcess.objects.filter(
+                purchase_order_id__in=[po.pk for po in purchase_orders]
+            ).only("id", "purchase_order_id", "last_updated_by_id")
+
+        POProcessHistory.objects.bulk_create(
+            [
+                POProcessHistory(
+                    po_process_id=process.pk,
+                    status=pending_status,
+                    remark="Auto-created on PO creation",
+                    changed_by_id=process.last_updated_by_id,
+                )
+                for process in processes
+            ],
+            batch_size=batch_size,
+        )
+        # Bulk inserts send no post_save for the report cache
+        schedule_data_version_bump(POProcess)
@@ -1,7 +1,6 @@
 from decimal import Decimal
 from django.db.models import (
     F,
-    Q,
     Count,
     ExpressionWrapper,
     Value,
@@ -11,13 +10,18 @@ from django.db.models import (
     Sum,
     DecimalField,
     Prefetch,
+    Case,
+    When,
+    IntegerField,
 )
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from suntech_erp.permissions import admin_required, can_view_value, is_admin
 from django.contrib.auth.decorators import login_required as login_required_view
+from django.conf import settings
 from django.db import transaction, IntegrityError
 
+from django.db.models.lookups import GreaterThanOrEqual
 from django.db.models.functions import Concat, Coalesce, TruncMonth
 from .models import (
     PurchaseOrder,
@@ -25,30 +29,53 @@ from .models import (
     POProcess,
     POProcessHistory,
     POProcessItemStatus,
-    POProcessItemHistory,
     POTarget,
     POTargetItem,
     POComment,
     PONote,
+    PORollup,
     POTask,
 )
+from .item_tracking import update_item_progress
+from .reports import monthly_target_report, target_report_queryset
+from .search import lookup_purchase_orders, search_purchase_orders
+from .rollup import annotate_rollup, get_po_summary, get_filtered_po_summary
 from .forms import (
     PurchaseOrderForm,
     PurchaseOrderItemFormSet,
     POProcessUpdateForm,
     POTargetForm,
 )
-from master.models import CompanyMaster, ProcessStatusMaster, DepartmentProcessMaster
+from master.models import CompanyMaster, DepartmentProcessMaster, ProcessStatusMaster
+from master.cache import (
+    get_active_processes_by_department,
+    get_status,
+    get_statuses,
+)
 from datetime import datetime
-from django.http import HttpResponseForbidden, HttpResponse, JsonResponse
-from django.template.loader import render_to_string
+from django.http import HttpResponseBadRequest, HttpResponseForbidden, JsonResponse
+from django.template.defaultfilters import pluralize
+from suntech_erp.exports import stream_export, export_format, iter_queryset
+from jobs.utils import background_export
+from suntech_erp.pagination import paginate_list
+from suntech_erp.report_cache import cached_report, paginate_ids
+from suntech_erp.widgets import selected_choices
 import json
 from django.core.paginator import Paginator
-from notifications.models import Notification
+from notifications.utils import notify_all
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# POs read per query when streaming the process report export
+PROCESS_REPORT_PO_BATCH = 200
+
+# Years the yearly target report accepts (as in the target form), and the
+# longest range one request may cover
+TARGET_YEAR_MIN = 2020
+TARGET_YEAR_MAX = 2099
+YEARLY_REPORT_MAX_YEARS = 5
+
 
 # ------------------------------
 # PO CREATE (header + items)
@@ -67,18 +94,13 @@ def po_create(request):
                     formset.instance = po
                     formset.save()
                 messages.success(request, "Purchase Order created successfully.")
-                users = User.objects.filter(is_active=True).exclude(id=request.user.id)
-
-                Notification.objects.bulk_create(
-                    [
-                        Notification(
-                            user=user,
-                            title="New Purchase Order Created",
-                            message=f"PO {po.po_number} has been created.",
-                            url=f"/po/{po.id}/processes/",
-                        )
-                        for user in users
-                    ]
+
+                # One broadcast row for everyone, not one row per user
+                notify_all(
+                    title="New Purchase Order Created",
+                    message=f"PO {po.po_number} has been created.",
+                    url=f"/po/{po.id}/processes/",
+                    actor=request.user,
                 )
                 return redirect("po:po_list")
             except IntegrityError:
@@ -91,7 +113,6 @@ def po_create(request):
         "form": form,
         "formset": formset,
         "title": "Create Purchase Order",
-        "companies": CompanyMaster.objects.order_by("name"),
     }
     return render(request, "po/po_form.html", context)
 
@@ -124,7 +145,6 @@ def po_edit(request, pk):
         "formset": formset,
         "title": f"Edit PO {po.po_number}",
         "po": po,
-        "companies": CompanyMaster.objects.order_by("name"),
     }
 
     return render(request, "po/po_form.html", context)
@@ -151,6 +171,107 @@ def po_delete(request, pk):
     return redirect("po:po_list")
 
 
+# Tables each report reads: a change to any of them invalidates its
+# cached results (see suntech_erp/report_cache.py)
+PO_REPORT_MODELS = (PurchaseOrder, PurchaseOrderItem, PORollup)
+PROCESS_REPORT_MODELS = (
+    PurchaseOrder,
+    PurchaseOrderItem,
+    POProcess,
+    POProcessItemStatus,
+    CompanyMaster,
+    DepartmentProcessMaster,
+    ProcessStatusMaster,
+)
+TARGET_REPORT_MODELS = (
+    POTarget,
+    POTargetItem,
+    PurchaseOrder,
+    PurchaseOrderItem,
+    CompanyMaster,
+)
+
+
+# ==============================================================
+# PO REPORT FILTERS & CACHED RESULTS (shared by the page and exports)
+# ==============================================================
+def _po_report_filters(request):
+    """The PO report filters from the query string; dates default to today."""
+    today = datetime.today().date().strftime("%Y-%m-%d")
+    return {
+        "date_from": request.GET.get("date_from") or today,
+        "date_to": request.GET.get("date_to") or today,
+        "po_number": request.GET.get("po_number", ""),
+        "oa_number": request.GET.get("oa_number", ""),
+        "company": request.GET.get("company", ""),
+        "po_status": request.GET.get("po_status", ""),
+        "department": request.GET.get("department", ""),
+    }
+
+
+def _po_report_lookups(filters, prefix=""):
+    """ORM lookups for `filters`; `prefix` reaches the PO from another model."""
+    lookups = {f"{prefix}po_date__range": [filters["date_from"], filters["date_to"]]}
+
+    if filters["po_number"]:
+        lookups[f"{prefix}po_number__icontains"] = filters["po_number"]
+    if filters["oa_number"]:
+        lookups[f"{prefix}oa_number__icontains"] = filters["oa_number"]
+    if filters["company"]:
+        lookups[f"{prefix}company_id"] = filters["company"]
+    if filters["po_status"]:
+        lookups[f"{prefix}po_status"] = filters["po_status"]
+    if filters["department"]:
+        lookups[f"{prefix}department"] = filters["department"]
+
+    return lookups
+
+
+def _po_report_pos(filters):
+    """Ids of the matching POs (by id) and their summary, cached per filter set."""
+
+    def compute():
+        pos = PurchaseOrder.objects.filter(**_po_report_lookups(filters))
+        return {
+            "ids": list(pos.order_by("id").values_list("pk", flat=True)),
+            "summary": get_filtered_po_summary(pos),
+        }
+
+    return cached_report("po_report_pos", filters, PO_REPORT_MODELS, compute)
+
+
+def _po_report_items(filters):
+    """Ids of the matching PO items (by PO, then id) and their grand totals."""
+
+    def compute():
+        items = PurchaseOrderItem.objects.filter(
+            **_po_report_lookups(filters, "purchase_order__")
+        )
+        totals = items.aggregate(
+            total_quantity=Coalesce(
+                Sum("quantity_value"),
+                Value(0),
+                output_field=DecimalField(max_digits=12, decimal_places=3),
+            ),
+            total_value=Coalesce(
+                Sum(
+                    F("quantity_value") * F("material_value"),
+                    output_field=DecimalField(max_digits=15, decimal_places=2),
+                ),
+                Value(0),
+                output_field=DecimalField(max_digits=15, decimal_places=2),
+            ),
+        )
+        return {
+            "ids": list(
+                items.order_by("purchase_order_id", "id").values_list("pk", flat=True)
+            ),
+            "totals": totals,
+        }
+
+    return cached_report("po_report_items", filters, PO_REPORT_MODELS, compute)
+
+
 # ==============================================================
 # PO REPORT VIEW (MAIN)
 # ==============================================================
@@ -163,47 +284,14 @@ def po_report(request):
 
     # ------------------------------
     # 🔹 GLOBAL SUMMARY (NOT FILTERED — always shows overall picture)
+    # Maintained incrementally by signals — a single-row read.
     # ------------------------------
-    all_pos = PurchaseOrder.objects.all()
-
-    total_po_count = all_pos.count()
-    completed_po_count = all_pos.filter(po_status="COMPLETED").count()
-    pending_po_count = total_po_count - completed_po_count
-
-    total_po_value = all_pos.aggregate(
-        total=Coalesce(
-            Sum(
-                F("items__quantity_value") * F("items__material_value"),
-                output_field=DecimalField(max_digits=15, decimal_places=2),
-            ),
-            Value(0),
-            output_field=DecimalField(max_digits=15, decimal_places=2),
-        )
-    )["total"]
-
-    dispatched_po_value = all_pos.filter(po_status="COMPLETED").aggregate(
-        total=Coalesce(
-            Sum(
-                F("items__quantity_value") * F("items__material_value"),
-                output_field=DecimalField(max_digits=15, decimal_places=2),
-            ),
-            Value(0),
-            output_field=DecimalField(max_digits=15, decimal_places=2),
-        )
-    )["total"]
-
-    pending_po_value = total_po_value - dispatched_po_value
-
-    dispatch_percentage = (
-        (dispatched_po_value / total_po_value) * 100 if total_po_value > 0 else 0
-    )
+    summary = get_po_summary()
 
     # ------------------------------
     # FILTERS
     # ------------------------------
-    today = datetime.today().date()
-    date_from = request.GET.get("date_from") or today.strftime("%Y-%m-%d")
-    date_to = request.GET.get("date_to") or today.strftime("%Y-%m-%d")
+    filters = _po_report_filters(request)
 
     filter_used = any(
         key in request.GET
@@ -217,145 +305,50 @@ def po_report(request):
         ]
     )
 
-    # Build PO-level filters
-    base_filters = {"po_date__range": [date_from, date_to]}
-
-    if request.GET.get("po_number"):
-        base_filters["po_number__icontains"] = request.GET["po_number"]
-
-    if request.GET.get("oa_number"):
-        base_filters["oa_number__icontains"] = request.GET["oa_number"]
-
-    if request.GET.get("company"):
-        base_filters["company_id"] = request.GET["company"]
-
-    if request.GET.get("po_status"):
-        base_filters["po_status"] = request.GET["po_status"]
-
-    if request.GET.get("department"):
-        base_filters["department"] = request.GET["department"]
-
-    # ------------------------------
-    # FILTERED PO QUERYSET
-    # ------------------------------
-    po_qs = PurchaseOrder.objects.none()
-
-    if filter_used:
-        po_qs = (
-            PurchaseOrder.objects.select_related("created_by", "company")
-            .prefetch_related("items")
-            .filter(**base_filters)
-            .annotate(
-                total_quantity=Coalesce(
-                    Sum("items__quantity_value"),
-                    Value(0),
-                    output_field=DecimalField(max_digits=12, decimal_places=3),
-                ),
-                total_value=Coalesce(
-                    Sum(
-                        F("items__quantity_value") * F("items__material_value"),
-                        output_field=DecimalField(max_digits=15, decimal_places=2),
-                    ),
-                    Value(0),
-                    output_field=DecimalField(max_digits=15, decimal_places=2),
-                ),
-                has_bom=Count("boms", distinct=True),
-                has_indent=Count("indents", distinct=True),
-            )
-            .order_by("id")
-        )
-
     # ------------------------------
-    # 🔹 FILTERED SUMMARY (shows stats for current filter selection)
+    # 🔹 FILTERED SUMMARY + PAGINATION (Summary view — paginate POs)
+    # The matching ids and the summary are cached per filter set, so
+    # turning a page only reads that page's POs.
     # ------------------------------
     filtered_summary = None
+    page_obj = None
 
     if filter_used:
-        total_count = po_qs.count()
-        completed_count = po_qs.filter(po_status="COMPLETED").count()
-        pending_count = total_count - completed_count
-
-        agg = PurchaseOrder.objects.filter(**base_filters).aggregate(
-            total_value=Coalesce(
-                Sum(
-                    F("items__quantity_value") * F("items__material_value"),
-                    output_field=DecimalField(max_digits=15, decimal_places=2),
-                ),
-                Value(0),
-                output_field=DecimalField(max_digits=15, decimal_places=2),
-            ),
-            dispatched_value=Coalesce(
-                Sum(
-                    F("items__quantity_value") * F("items__material_value"),
-                    filter=Q(po_status="COMPLETED"),
-                    output_field=DecimalField(max_digits=15, decimal_places=2),
+        result = _po_report_pos(filters)
+        filtered_summary = result["summary"]
+
+        if view_mode == "summary":
+            page_obj = paginate_ids(
+                request,
+                result["ids"],
+                annotate_rollup(
+                    PurchaseOrder.objects.select_related(
+                        "created_by", "company"
+                    ).prefetch_related("items")
                 ),
-                Value(0),
-                output_field=DecimalField(max_digits=15, decimal_places=2),
-            ),
-        )
-
-        total_value = agg["total_value"]
-        dispatched_value = agg["dispatched_value"]
-        pending_value = total_value - dispatched_value
-
-        dispatch_pct = (dispatched_value / total_value) * 100 if total_value > 0 else 0
-
-        filtered_summary = {
-            "total_count": total_count,
-            "completed_count": completed_count,
-            "pending_count": pending_count,
-            "total_value": total_value,
-            "dispatched_value": dispatched_value,
-            "pending_value": pending_value,
-            "dispatch_percentage": round(dispatch_pct, 2),
-        }
-
-    # ------------------------------
-    # PAGINATION (Summary view — paginate POs)
-    # ------------------------------
-    page_obj = None
-    if filter_used and view_mode == "summary":
-        paginator = Paginator(po_qs, 10)
-        page_obj = paginator.get_page(request.GET.get("page"))
+                10,
+            )
 
     # ------------------------------
     # ITEM VIEW (FILTERED)
     # ------------------------------
-    items = None
     grand_totals = None
     items_page_obj = None
 
     if view_mode == "items" and filter_used:
-        items_qs = (
+        result = _po_report_items(filters)
+        grand_totals = result["totals"]
+        items_page_obj = paginate_ids(
+            request,
+            result["ids"],
             PurchaseOrderItem.objects.select_related(
                 "purchase_order",
                 "purchase_order__company",
                 "purchase_order__created_by",
-            )
-            .filter(purchase_order__in=po_qs)
-            .order_by("purchase_order__id")
-        )
-
-        grand_totals = items_qs.aggregate(
-            total_quantity=Coalesce(
-                Sum("quantity_value"),
-                Value(0),
-                output_field=DecimalField(max_digits=12, decimal_places=3),
-            ),
-            total_value=Coalesce(
-                Sum(
-                    F("quantity_value") * F("material_value"),
-                    output_field=DecimalField(max_digits=15, decimal_places=2),
-                ),
-                Value(0),
-                output_field=DecimalField(max_digits=15, decimal_places=2),
             ),
+            30,
         )
 
-        paginator = Paginator(items_qs, 30)
-        items_page_obj = paginator.get_page(request.GET.get("page"))
-
     # ------------------------------
     # CONTEXT
     # ------------------------------
@@ -363,26 +356,18 @@ def po_report(request):
         # View mode
         "view": view_mode,
         # Global Summary (unfiltered)
-        "summary": {
-            "total_po_count": total_po_count,
-            "completed_po_count": completed_po_count,
-            "pending_po_count": pending_po_count,
-            "total_po_value": total_po_value,
-            "dispatched_po_value": dispatched_po_value,
-            "pending_po_value": pending_po_value,
-            "dispatch_percentage": round(dispatch_percentage, 2),
-        },
+        "summary": summary,
         # Filtered Summary
         "filtered_summary": filtered_summary,
         # Data
-        "pos": po_qs,
         "page_obj": page_obj,
         "items_page_obj": items_page_obj,
         "grand_totals": grand_totals,
         # Filter state
         "filter_used": filter_used,
-        "companies": CompanyMaster.objects.order_by("name"),
-        "po_list": PurchaseOrder.objects.order_by("-id"),
+        "selected_companies": selected_choices(
+            CompanyMaster.objects.all(), filters["company"]
+        ),
         "departments": [
             "Marketing",
             "Design",
@@ -391,15 +376,7 @@ def po_report(request):
             "Admin",
             "Logistics",
         ],
-        "filters": {
-            "po_number": request.GET.get("po_number", ""),
-            "oa_number": request.GET.get("oa_number", ""),
-            "company": request.GET.get("company", ""),
-            "po_status": request.GET.get("po_status", ""),
-            "date_from": date_from,
-            "date_to": date_to,
-            "department": request.GET.get("department", ""),
-        },
+        "filters": filters,
         # Permissions
         "can_view_value": can_view_value(request.user),
     }
@@ -411,24 +388,11 @@ def po_report(request):
 # PO REPORT SUMMARY EXCEL (updated with department filter)
 # ==============================================================
 @login_required_view
+@background_export
 def po_report_summary_excel(request):
-
-    today = datetime.today().date()
-    date_from = request.GET.get("date_from") or today.strftime("%Y-%m-%d")
-    date_to = request.GET.get("date_to") or today.strftime("%Y-%m-%d")
-
-    base_filters = {"po_date__range": [date_from, date_to]}
-
-    if request.GET.get("po_number"):
-        base_filters["po_number__icontains"] = request.GET["po_number"]
-    if request.GET.get("oa_number"):
-        base_filters["oa_number__icontains"] = request.GET["oa_number"]
-    if request.GET.get("company"):
-        base_filters["company_id"] = request.GET["company"]
-    if request.GET.get("po_status"):
-        base_filters["po_status"] = request.GET["po_status"]
-    if request.GET.get("department"):
-        base_filters["department"] = request.GET["department"]
+    filters = _po_report_filters(request)
+    date_from = filters["date_from"]
+    date_to = filters["date_to"]
 
     # Annotate items with line_total
     items_with_total = PurchaseOrderItem.objects.annotate(
@@ -441,91 +405,104 @@ def po_report_summary_excel(request):
     pos = (
         PurchaseOrder.objects.select_related("created_by", "company")
         .prefetch_related(Prefetch("items", queryset=items_with_total))
-        .filter(**base_filters)
-        .annotate(
-            total_quantity=Coalesce(
-                Sum("items__quantity_value"),
-                Value(0),
-                output_field=DecimalField(max_digits=12, decimal_places=3),
-            ),
-            total_value=Coalesce(
-                Sum(
-                    F("items__quantity_value") * F("items__material_value"),
-                    output_field=DecimalField(max_digits=15, decimal_places=2),
-                ),
-                Value(0),
-                output_field=DecimalField(max_digits=15, decimal_places=2),
-            ),
-        )
+        .filter(**_po_report_lookups(filters))
         .order_by("id")
     )
 
-    # Compute grand totals for template
-    agg = pos.aggregate(
-        total_qty=Coalesce(
-            Sum("items__quantity_value"),
-            Value(0),
-            output_field=DecimalField(max_digits=12, decimal_places=3),
-        ),
-        total_value=Coalesce(
-            Sum(
-                F("items__quantity_value") * F("items__material_value"),
-                output_field=DecimalField(max_digits=15, decimal_places=2),
-            ),
-            Value(0),
-            output_field=DecimalField(max_digits=15, decimal_places=2),
-        ),
-    )
+    show_value = can_view_value(request.user)
 
-    html = render_to_string(
-        "po/po_report_summary_excel.html",
-        {
-            "pos": pos,
-            "total_qty": agg["total_qty"],
-            "total_value": agg["total_value"],
-            "can_view_value": can_view_value(request.user),
-        },
-    )
+    headers = [
+        "#",
+        "PO Number",
+        "OA Number",
+        "Company",
+        "Department",
+        "PO Date",
+        "Delivery Date",
+        "PO Status",
+        "Material Code",
+        "Material Description",
+        "Qty",
+        "UOM",
+    ]
+    if show_value:
+        headers.append("Value (₹)")
+    headers.append("Item Status")
+
+    def rows():
+        po_count = 0
+        total_qty = Decimal("0")
+        total_value = Decimal("0")
+
+        # The same ids the report page showed, when still cached
+        pos_ids = _po_report_pos(filters)["ids"]
+        for po_no, po in enumerate(iter_queryset(pos, pks=pos_ids), start=1):
+            po_count += 1
+            po_cells = [
+                po.po_number,
+                po.oa_number,
+                po.company.name,
+                po.department or "—",
+                po.po_date,
+                po.delivery_date,
+                po.get_po_status_display(),
+            ]
+            items = po.items.all()
 
-    response = HttpResponse(html)
-    response["Content-Type"] = "application/vnd.ms-excel"
-    response["Content-Disposition"] = (
-        f'attachment; filename="PO_Summary_{date_from}_to_{date_to}.xls"'
+            # PO with no items — still show PO row so it's not invisible
+            if not items:
+                yield [str(po_no), *po_cells, "No items"]
+                continue
+
+            for item_no, item in enumerate(items, start=1):
+                total_qty += item.quantity_value or 0
+                total_value += item.line_total or 0
+
+                row = [
+                    f"{po_no}.{item_no}",
+                    *po_cells,
+                    item.material_code or "—",
+                    item.material_description,
+                    item.quantity_value,
+                    item.uom,
+                ]
+                if show_value:
+                    row.append(item.line_total)
+                row.append(item.get_status_display())
+                yield row
+
+        if po_count:
+            total_row = [f"GRAND TOTAL ({po_count} PO{pluralize(po_count)}):"]
+            total_row += [""] * 9 + [total_qty, ""]
+            if show_value:
+                total_row.append(total_value)
+            yield total_row
+
+    return stream_export(
+        f"PO_Summary_{date_from}_to_{date_to}",
+        headers,
+        rows(),
+        title="PURCHASE ORDER SUMMARY REPORT — Suntech ERP",
+        fmt=export_format(request),
     )
-    response["Pragma"] = "no-cache"
-    response["Expires"] = "0"
-    return response
 
 
 # ==============================================================
 # PO REPORT ITEM EXCEL (updated with department filter)
 # ==============================================================
 @login_required_view
+@background_export
 def po_report_item_excel(request):
-    today = datetime.today().date()
-    date_from = request.GET.get("date_from") or today.strftime("%Y-%m-%d")
-    date_to = request.GET.get("date_to") or today.strftime("%Y-%m-%d")
-
-    base_filters = {"purchase_order__po_date__range": [date_from, date_to]}
-
-    if request.GET.get("po_number"):
-        base_filters["purchase_order__po_number__icontains"] = request.GET["po_number"]
-    if request.GET.get("oa_number"):
-        base_filters["purchase_order__oa_number__icontains"] = request.GET["oa_number"]
-    if request.GET.get("company"):
-        base_filters["purchase_order__company_id"] = request.GET["company"]
-    if request.GET.get("po_status"):
-        base_filters["purchase_order__po_status"] = request.GET["po_status"]
-    if request.GET.get("department"):
-        base_filters["purchase_order__department"] = request.GET["department"]
+    filters = _po_report_filters(request)
+    date_from = filters["date_from"]
+    date_to = filters["date_to"]
 
     items = (
         PurchaseOrderItem.objects.select_related(
             "purchase_order",
             "purchase_order__company",
-            "purchase_order__created_by",
         )
-        .filter(**base_filters)
+        .filter(**_po_report_lookups(filters, "purchase_order__"))
         .annotate(
             line_total=ExpressionWrapper(
                 F("quantity_value") * F("material_value"),
@@ -535,38 +512,68 @@ def po_report_item_excel(request):
         .order_by("purchase_order__id", "id")
     )
 
-    grand_totals = items.aggregate(
-        total_quantity=Coalesce(
-            Sum("quantity_value"),
-            Value(0),
-            output_field=DecimalField(max_digits=12, decimal_places=3),
-        ),
-        total_value=Coalesce(
-            Sum(
-                F("quantity_value") * F("material_value"),
-                output_field=DecimalField(max_digits=15, decimal_places=2),
-            ),
-            Value(0),
-            output_field=DecimalField(max_digits=15, decimal_places=2),
-        ),
-    )
-    html = render_to_string(
-        "po/po_report_item_excel.html",
-        {
-            "items": items,
-            "grand_totals": grand_totals,
-            "can_view_value": can_view_value(request.user),
-        },
-    )
+    show_value = can_view_value(request.user)
 
-    response = HttpResponse(html)
-    response["Content-Type"] = "application/vnd.ms-excel"
-    response["Content-Disposition"] = (
-        f'attachment; filename="PO_Items_{date_from}_to_{date_to}.xls"'
+    headers = [
+        "#",
+        "PO Number",
+        "OA Number",
+        "Company",
+        "Department",
+        "PO Date",
+        "Delivery Date",
+        "PO Status",
+        "Material Code",
+        "Material Description",
+        "Qty",
+        "UOM",
+    ]
+    if show_value:
+        headers.append("Value (₹)")
+    headers.append("Item Status")
+
+    def rows():
+        total_qty = Decimal("0")
+        total_value = Decimal("0")
+
+        # The same ids the report page showed, when still cached
+        item_ids = _po_report_items(filters)["ids"]
+        for counter, item in enumerate(iter_queryset(items, pks=item_ids), start=1):
+            po = item.purchase_order
+            total_qty += item.quantity_value or 0
+            total_value += item.line_total or 0
+
+            row = [
+                counter,
+                po.po_number,
+                po.oa_number,
+                po.company.name,
+                po.department or "—",
+                po.po_date,
+                po.delivery_date,
+                po.get_po_status_display(),
+                item.material_code or "—",
+                item.material_description,
+                item.quantity_value,
+                item.uom,
+            ]
+            if show_value:
+                row.append(item.line_total)
+            row.append(item.get_status_display())
+            yield row
+
+        total_row = ["GRAND TOTAL:"] + [""] * 9 + [total_qty, ""]
+        if show_value:
+            total_row.append(total_value)
+        yield total_row
+
+    return stream_export(
+        f"PO_Items_{date_from}_to_{date_to}",
+        headers,
+        rows(),
+        title="PURCHASE ORDER ITEM REPORT — Suntech ERP",
+        fmt=export_format(request),
     )
-    response["Pragma"] = "no-cache"
-    response["Expires"] = "0"
-    return response
 
 
 # ------------------------------
@@ -592,20 +599,44 @@ def po_process_list(request, po_id):
         .order_by("department_process__sequence")
     )
 
-    item_status_map = {}
-    for process in processes:
-        if process.department_process.has_item_tracking:
-            item_status_map[process.id] = {
-                s.po_item_id: s
-                for s in POProcessItemStatus.objects.filter(
-                    po_process=process
-                ).select_related("status")
-            }
+    processes = list(processes)
+    po_items = list(po.items.all())
+    total_items = len(po_items)
 
-    # Total PO items count
-    total_items = po.items.count()
+    tracked_process_ids = [
+        p.id for p in processes if p.department_process.has_item_tracking
+    ]
 
-    from decimal import Decimal
+    # Item statuses of every tracked process of this PO, in one query
+    item_status_map = {process_id: {} for process_id in tracked_process_ids}
+    if tracked_process_ids:
+        for s in POProcessItemStatus.objects.filter(
+            po_process_id__in=tracked_process_ids
+        ).select_related("status"):
+            item_status_map[s.po_process_id][s.po_item_id] = s
+
+    # Per tracked process: how many items are tracked, and how many of
+    # those have qty_completed >= the item quantity — grouped in the DB.
+    item_progress = {}
+    if tracked_process_ids:
+        item_progress = {
+            row["po_process_id"]: row
+            for row in POProcessItemStatus.objects.filter(
+                po_process_id__in=tracked_process_ids
+            )
+            .order_by()
+            .values("po_process_id")
+            .annotate(
+                tracked=Count("id"),
+                qty_done=Count(
+                    "id",
+                    filter=GreaterThanOrEqual(
+                        Coalesce(F("qty_completed"), Value(Decimal("0"))),
+                        Coalesce(F("po_item__quantity_value"), Value(Decimal("0"))),
+                    ),
+                ),
+            )
+        }
 
     completed_process_ids = set()
     for process in processes:
@@ -613,17 +644,12 @@ def po_process_list(request, po_id):
             continue
 
         if process.department_process.has_item_tracking:
-            item_statuses = item_status_map.get(process.id, {})
+            progress = item_progress.get(process.id, {"tracked": 0, "qty_done": 0})
             # Must have all items tracked
-            if len(item_statuses) < total_items:
+            if progress["tracked"] < total_items:
                 continue
             # Every item must have qty_completed >= quantity_value
-            all_qty_done = all(
-                (s.qty_completed or Decimal("0"))
-                >= (s.po_item.quantity_value or Decimal("0"))
-                for s in item_statuses.values()
-            )
-            if not all_qty_done:
+            if progress["qty_done"] < progress["tracked"]:
                 continue
 
         completed_process_ids.add(process.id)
@@ -636,7 +662,7 @@ def po_process_list(request, po_id):
             "processes": processes,
             "item_status_map": item_status_map,
             "total_items": total_items,
-            "po_items": po.items.all(),
+            "po_items": po_items,
             "completed_process_ids": completed_process_ids,
         },
     )
@@ -678,7 +704,7 @@ def po_process_update(request, process_id):
         ).select_related("status")
     }
 
-    status_choices = ProcessStatusMaster.objects.filter(is_active=True)
+    status_choices = get_statuses()
 
     if request.method == "POST":
         form = POProcessUpdateForm(
@@ -695,17 +721,13 @@ def po_process_update(request, process_id):
                 if not selected_status_id:
                     messages.error(request, "Please select a status.")
                 else:
-                    try:
-                        selected_status = ProcessStatusMaster.objects.get(
-                            id=selected_status_id
-                        )
-                    except ProcessStatusMaster.DoesNotExist:
+                    selected_status = get_status(selected_status_id)
+                    if selected_status is None:
                         messages.error(request, "Invalid status selected.")
-                        selected_status = None
 
                     if selected_status:
                         errors = []
-                        updates = []  # collect valid updates before saving
+                        entries = []  # (item, qty_entered) to apply
 
                         for item in po_items:
                             # Check if this item's checkbox is checked
@@ -738,101 +760,26 @@ def po_process_update(request, process_id):
                                 )
                                 continue
 
-                            total_qty = item.quantity_value or Decimal("0")
+                            entries.append((item, qty_entered))
 
-                            # Get already completed qty for this item
-                            existing = existing_statuses.get(item.id)
-                            already_done = (
-                                (existing.qty_completed or Decimal("0"))
-                                if existing
-                                else Decimal("0")
+                        if not errors and not entries:
+                            messages.error(
+                                request, "Please enter qty for at least one item."
+                            )
+                        elif not errors:
+                            # Range checks run against the locked rows
+                            errors = update_item_progress(
+                                po_process,
+                                entries,
+                                selected_status,
+                                remark,
+                                request.user,
                             )
-
-                            # Apply delta (can be negative for returns)
-                            new_qty = already_done + qty_entered
-
-                            # Clamp to 0 — can't go below zero
-                            if new_qty < Decimal("0"):
-                                errors.append(
-                                    f"{item.material_description[:30]}: "
-                                    f"return qty {qty_entered} exceeds completed qty {already_done}."
-                                )
-                                continue
-
-                            if new_qty > total_qty:
-                                errors.append(
-                                    f"{item.material_description[:30]}: "
-                                    f"qty {new_qty} exceeds total {total_qty}."
-                                )
-                                continue
-
-                            updates.append((item, new_qty))
 
                         if errors:
                             for err in errors:
                                 messages.error(request, err)
-                        elif not updates:
-                            messages.error(
-                                request, "Please enter qty for at least one item."
-                            )
-                        else:
-                            with transaction.atomic():
-                                for item, new_qty in updates:
-                                    # Determine final status for this item
-                                    total_qty = item.quantity_value or Decimal("0")
-                                    if new_qty >= total_qty:
-                                        # Get completed status
-                                        completed_status = (
-                                            ProcessStatusMaster.objects.filter(
-                                                is_completed=True, is_active=True
-                                            ).first()
-                                        )
-                                        final_status = (
-                                            completed_status or selected_status
-                                        )
-                                    else:
-                                        final_status = selected_status
-
-                                    # Update current state (POProcessItemStatus)
-                                    POProcessItemStatus.objects.update_or_create(
-                                        po_process=po_process,
-                                        po_item=item,
-                                        defaults={
-                                            "status": final_status,
-                                            "qty_completed": new_qty,
-                                            "updated_by": request.user,
-                                        },
-                                    )
-
-                                    # Append to history (never overwrite)
-                                    POProcessItemHistory.objects.create(
-                                        po_process=po_process,
-                                        po_item=item,
-                                        status=final_status,
-                                        qty_completed=qty_entered,
-                                        remark=remark,
-                                        changed_by=request.user,
-                                    )
-
-                                # Save process-level history
-                                POProcessHistory.objects.create(
-                                    po_process=po_process,
-                                    status=selected_status,
-                                    remark=remark,
-                                    changed_by=request.user,
-                                )
-
-                                po_process.last_updated_by = request.user
-                                po_process.save(update_fields=["last_updated_by"])
-
-                                from .forms import auto_set_process_status
-
-                                auto_set_process_status(po_process)
-
-                                from .forms import check_and_update_po_status
-
-                                check_and_update_po_status(po)
-
+                        elif entries:
                             messages.success(
                                 request, "Item quantities updated successfully."
                             )
@@ -906,36 +853,54 @@ def po_process_history(request, process_id):
 # PO PROCESS EXPORT TO EXCEL
 # ------------------------------
 @login_required_view
+@background_export
 def po_process_excel(request, po_id):
     po = get_object_or_404(PurchaseOrder, pk=po_id)
 
-    processes = po.processes.select_related(
-        "department_process",
-        "current_status",
-        "last_updated_by",
-    ).order_by(
-        "department_process__sequence",
+    latest_remark_subquery = (
+        POProcessHistory.objects.filter(po_process=OuterRef("pk"))
+        .order_by("-changed_at")
+        .values("remark")[:1]
+    )
+
+    processes = (
+        po.processes.select_related(
+            "department_process",
+            "current_status",
+            "last_updated_by",
+        )
+        .annotate(latest_remark=Subquery(latest_remark_subquery))
+        .order_by("department_process__sequence")
     )
 
-    filename = f"PO_{po.po_number}_processes.xls"
+    headers = [
+        "Department",
+        "Process",
+        "Status",
+        "Last Updated By",
+        "Last Updated At",
+        "Latest Remark",
+    ]
 
-    # Render HTML table
-    html = render_to_string(
-        "po/po_process_excel.html",
-        {
-            "po": po,
-            "processes": processes,
-        },
+    rows = (
+        [
+            process.department_process.department,
+            process.department_process.name,
+            process.current_status.name,
+            str(process.last_updated_by) if process.last_updated_by else "—",
+            process.last_updated_at,
+            process.latest_remark or "—",
+        ]
+        for process in processes
     )
 
-    # Excel headers (PHP-style)
-    response = HttpResponse(html)
-    response["Content-Type"] = "application/vnd.ms-excel"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    response["Pragma"] = "no-cache"
-    response["Expires"] = "0"
-
-    return response
+    return stream_export(
+        f"PO_{po.po_number}_processes",
+        headers,
+        rows,
+        title=f"PO Processes – {po.po_number} ({po.company.name})",
+        fmt=export_format(request),
+    )
 
 
 @login_required_view
@@ -947,15 +912,12 @@ def po_list(request):
     )
 
     if query:
-        qs = qs.filter(
-            Q(po_number__icontains=query)
-            | Q(oa_number__icontains=query)
-            | Q(company__name__icontains=query)
-            | Q(items__material_code__icontains=query)
-            | Q(items__material_description__icontains=query)
-        )
+        # Indexed token search over numbers, company and item lines
+        qs = search_purchase_orders(qs, query)
 
-    qs = (
+    filtered_qs = qs
+
+    qs = annotate_rollup(
         qs.annotate(
             creator_name=Coalesce(
                 Concat(
@@ -967,33 +929,10 @@ def po_list(request):
                 Value("—"),
                 output_field=CharField(),
             ),
-            total_quantity=Coalesce(
-                Sum("items__quantity_value"),
-                Value(0),
-                output_field=DecimalField(max_digits=12, decimal_places=3),
-            ),
-            total_value=Coalesce(
-                Sum(
-                    F("items__quantity_value") * F("items__material_value"),
-                    output_field=DecimalField(max_digits=15, decimal_places=2),
-                ),
-                Value(0),
-                output_field=DecimalField(max_digits=15, decimal_places=2),
-            ),
-            # True (>0) if any BOM exists for this PO
-            has_bom=Count("boms", distinct=True),
-            # True (>0) if any Indent exists for this PO
-            has_indent=Count("indents", distinct=True),
-            notes_count=Count("notes", distinct=True),
-            tasks_count=Count("tasks", distinct=True),
-            comments_count=Count("comments", distinct=True),
         )
-        .distinct()
-        .order_by("-id")
-    )
+    ).order_by("-id")
 
-    paginator = Paginator(qs, 20)
-    page_obj = paginator.get_page(request.GET.get("page"))
+    page_obj = paginate_list(request, qs, 20, count_queryset=filtered_qs)
 
     context = {
         "page_obj": page_obj,
@@ -1055,41 +994,166 @@ def ajax_po_items_list(request, pk):
     po = get_object_or_404(PurchaseOrder, pk=pk)
     show_value = can_view_value(request.user)
 
-    items_qs = po.items.values(
-        "material_code",
-        "material_description",
+    items_qs = po.items.values(
+        "material_code",
+        "material_description",
+        "quantity_value",
+        "uom",
+        "material_value",
+        "status",
+    )
+
+    # Build status display map from model choices
+    status_map = dict(PurchaseOrderItem.STATUS_CHOICES)
+
+    data = []
+    for item in items_qs:
+        row = {
+            "code": item["material_code"] or "—",
+            "description": item["material_description"],
+            "quantity": str(item["quantity_value"] or 0),
+            "uom": item["uom"],
+            "status": status_map.get(item["status"], item["status"]),
+        }
+        if show_value:
+            qty = item["quantity_value"] or 0
+            unit_price = item["material_value"] or 0
+            line_total = qty * unit_price
+            row["value"] = "{:.2f}".format(line_total)
+        data.append(row)
+
+    return JsonResponse(
+        {
+            "items": data,
+            "show_value": show_value,
+            "po_number": po.po_number,
+        }
+    )
+
+
+@login_required_view
+def po_lookup(request):
+    """
+    GET /po/lookup/?q=<prefix>
+    Typeahead for PO pickers (Select2 "results" format): prefix match on
+    PO number, OA number and company code/name.
+    """
+    purchase_orders, more = lookup_purchase_orders(request.GET.get("q", ""))
+
+    return JsonResponse(
+        {
+            "results": [
+                {
+                    "id": po.pk,
+                    "text": f"{po.po_number} / {po.oa_number} — {po.company.name}",
+                    "po_number": po.po_number,
+                    "oa_number": po.oa_number,
+                }
+                for po in purchase_orders
+            ],
+            "pagination": {"more": more},
+        }
+    )
+
+
+def _process_report_rows(processes, po_ids=None, status_ids=None, company=None):
+    """
+    One row per (PO item × selected process), built by the database.
+
+    Items are joined to their PO's processes; the row status is resolved in
+    SQL — per-item status for item-tracking processes (falling back to the
+    item's own status when untouched), the process status otherwise — so the
+    status filter, ordering and pagination all happen in the query.
+    """
+    rows = PurchaseOrderItem.objects.filter(
+        purchase_order__processes__department_process_id__in=processes
+    )
+
+    # PO FILTER (multi-select; options are searchable by PO No. or OA No.)
+    if po_ids:
+        rows = rows.filter(purchase_order_id__in=po_ids)
+
+    # COMPANY FILTER
+    if company:
+        rows = rows.filter(purchase_order__company_id=company)
+
+    # The annotations below reuse the processes join from the filter above
+    rows = rows.annotate(
+        process_id=F("purchase_order__processes__id"),
+        process=F("purchase_order__processes__department_process__name"),
+        department=F("purchase_order__processes__department_process__department"),
+        process_sequence=F("purchase_order__processes__department_process__sequence"),
+        has_item_tracking=F(
+            "purchase_order__processes__department_process__has_item_tracking"
+        ),
+        process_status_id=F("purchase_order__processes__current_status_id"),
+    )
+
+    item_status_id = POProcessItemStatus.objects.filter(
+        po_process_id=OuterRef("process_id"),
+        po_item_id=OuterRef("pk"),
+    ).values("status_id")[:1]
+
+    rows = rows.annotate(
+        status_id=Case(
+            When(has_item_tracking=True, then=Subquery(item_status_id)),
+            default=F("process_status_id"),
+            output_field=IntegerField(),
+        ),
+    )
+
+    status_name = ProcessStatusMaster.objects.filter(pk=OuterRef("status_id")).values(
+        "name"
+    )[:1]
+    process_status_name = ProcessStatusMaster.objects.filter(
+        pk=OuterRef("process_status_id")
+    ).values("name")[:1]
+
+    rows = rows.annotate(
+        row_status=Coalesce(Subquery(status_name), F("status")),
+        process_status=Subquery(process_status_name),
+    )
+
+    # STATUS FILTER (multi-select)
+    if status_ids:
+        rows = rows.filter(status_id__in=status_ids)
+
+    return rows.order_by("purchase_order_id", "process_sequence", "id").values(
+        "status_id",
+        "process",
+        "department",
+        "process_status",
+        "row_status",
         "quantity_value",
         "uom",
-        "material_value",
-        "status",
+        po_id=F("purchase_order_id"),
+        po_number=F("purchase_order__po_number"),
+        po_date=F("purchase_order__po_date"),
+        company=Coalesce(F("purchase_order__company__name"), Value("—")),
+        item_description=F("material_description"),
     )
 
-    # Build status display map from model choices
-    status_map = dict(PurchaseOrderItem.STATUS_CHOICES)
 
-    data = []
-    for item in items_qs:
-        row = {
-            "code": item["material_code"] or "—",
-            "description": item["material_description"],
-            "quantity": str(item["quantity_value"] or 0),
-            "uom": item["uom"],
-            "status": status_map.get(item["status"], item["status"]),
-        }
-        if show_value:
-            qty = item["quantity_value"] or 0
-            unit_price = item["material_value"] or 0
-            line_total = qty * unit_price
-            row["value"] = "{:.2f}".format(line_total)
-        data.append(row)
+def _cached_process_report_rows(processes, po_ids, status_ids, company):
+    """
+    The process report rows as a list, cached per filter set — or None
+    when there are more than REPORT_CACHE_MAX_ROWS of them, in which case
+    the caller pages / streams the query itself.
+    """
+    limit = getattr(settings, "REPORT_CACHE_MAX_ROWS", 0)
+    filters = {
+        "processes": processes,
+        "po_ids": po_ids,
+        "status": status_ids,
+        "company": company,
+    }
 
-    return JsonResponse(
-        {
-            "items": data,
-            "show_value": show_value,
-            "po_number": po.po_number,
-        }
-    )
+    def compute():
+        rows = _process_report_rows(processes, po_ids, status_ids, company)
+        rows = list(rows[: limit + 1])
+        return rows if len(rows) <= limit else None
+
+    return cached_report("po_process_report", filters, PROCESS_REPORT_MODELS, compute)
 
 
 @login_required_view
@@ -1108,88 +1172,15 @@ def po_process_report(request):
     # ------------------------------
     filter_used = bool(processes)
 
-    rows = []
-
-    if filter_used:
-        process_qs = POProcess.objects.select_related(
-            "purchase_order",
-            "department_process",
-            "current_status",
-            "purchase_order__company",
-        )
-
-        # PROCESS FILTER (required)
-        process_qs = process_qs.filter(department_process_id__in=processes)
-
-        # PO FILTER (multi-select; options are searchable by PO No. or OA No.)
-        if po_ids:
-            process_qs = process_qs.filter(purchase_order_id__in=po_ids)
-
-        # COMPANY FILTER
-        if company:
-            process_qs = process_qs.filter(purchase_order__company_id=company)
-
-        process_qs = (
-            process_qs.prefetch_related(
-                "purchase_order__items",
-                "item_statuses__status",
-                "item_statuses__po_item",
-            )
-            .order_by(
-                "purchase_order__id",
-                "department_process__sequence",
-            )
-            .distinct()
-        )
-
-        # BUILD ROWS
-        for process in process_qs:
-            po = process.purchase_order
-            items = po.items.all()
-
-            status_map = {s.po_item_id: s for s in process.item_statuses.all()}
-
-            for item in items:
-                item_status_obj = status_map.get(item.id)
-
-                if process.department_process.has_item_tracking:
-                    row_status_obj = item_status_obj.status if item_status_obj else None
-                    status_name = row_status_obj.name if row_status_obj else item.status
-                    status_id = row_status_obj.id if row_status_obj else None
-                else:
-                    row_status_obj = process.current_status
-                    status_name = row_status_obj.name
-                    status_id = row_status_obj.id
-
-                rows.append(
-                    {
-                        "po_id": po.id,
-                        "po_number": po.po_number,
-                        "po_date": po.po_date,
-                        "company": po.company.name if po.company else "—",
-                        "process": process.department_process.name,
-                        "department": process.department_process.department,
-                        "process_status": process.current_status.name,
-                        "item_description": item.material_description,
-                        "quantity": item.quantity_value,
-                        "uom": item.uom,
-                        "status": status_name,
-                        "status_id": status_id,
-                    }
-                )
-
-        # STATUS FILTER (multi-select)
-        # Applied after row resolution because item-tracking processes
-        # resolve status per-item rather than on the POProcess itself.
-        if status_ids:
-            status_id_set = {str(s) for s in status_ids}
-            rows = [r for r in rows if str(r["status_id"]) in status_id_set]
-
     # ------------------------------
-    # PAGINATION
+    # PAGINATION — over the cached rows, or in the database when the
+    # result is too large to cache
     # ------------------------------
     page_obj = None
     if filter_used:
+        rows = _cached_process_report_rows(processes, po_ids, status_ids, company)
+        if rows is None:
+            rows = _process_report_rows(processes, po_ids, status_ids, company)
         paginator = Paginator(rows, 50)
         page_obj = paginator.get_page(request.GET.get("page"))
 
@@ -1197,14 +1188,10 @@ def po_process_report(request):
         "rows": page_obj,
         "page_obj": page_obj,
         "filter_used": filter_used,
-        "process_list": DepartmentProcessMaster.objects.filter(is_active=True).order_by(
-            "department", "sequence"
-        ),
-        "companies": CompanyMaster.objects.order_by("name"),
-        "purchase_orders": PurchaseOrder.objects.select_related("company").order_by(
-            "-id"
-        ),
-        "status_list": ProcessStatusMaster.objects.filter(is_active=True),
+        "process_list": get_active_processes_by_department(),
+        "selected_companies": selected_choices(CompanyMaster.objects.all(), company),
+        "selected_pos": selected_choices(PurchaseOrder.objects.order_by("-id"), po_ids),
+        "status_list": get_statuses(),
         "filters": {
             "processes": processes,
             "po_ids": po_ids,
@@ -1217,87 +1204,63 @@ def po_process_report(request):
 
 
 @login_required_view
+@background_export
 def po_process_report_excel(request):
     processes = request.GET.getlist("processes")
     po_ids = request.GET.getlist("po_ids")
     status_ids = request.GET.getlist("status")  # multi-select now
     company = request.GET.get("company")
 
-    rows = []
+    headers = ["PO", "Process", "Item", "Status"]
 
-    if processes:
+    def rows():
+        if not processes:
+            return
 
-        process_qs = POProcess.objects.select_related(
-            "purchase_order",
-            "department_process",
-            "current_status",
-            "purchase_order__company",
-        ).filter(department_process_id__in=processes)
+        cached = _cached_process_report_rows(processes, po_ids, status_ids, company)
+        if cached is not None:
+            for row in cached:
+                yield [
+                    row["po_number"],
+                    row["process"],
+                    row["item_description"],
+                    row["row_status"],
+                ]
+            return
 
+        # Rows are ordered by PO first, so reading a batch of POs at a time
+        # keeps the overall order while bounding memory per query.
+        matching_po_ids = POProcess.objects.filter(
+            department_process_id__in=processes
+        )
         if po_ids:
-            process_qs = process_qs.filter(purchase_order_id__in=po_ids)
-
+            matching_po_ids = matching_po_ids.filter(purchase_order_id__in=po_ids)
         if company:
-            process_qs = process_qs.filter(purchase_order__company_id=company)
-
-        process_qs = (
-            process_qs.prefetch_related(
-                "purchase_order__items",
-                "item_statuses__status",
-                "item_statuses__po_item",
-            )
-            .order_by(
-                "purchase_order__id",
-                "department_process__sequence",
+            matching_po_ids = matching_po_ids.filter(
+                purchase_order__company_id=company
             )
+        matching_po_ids = list(
+            matching_po_ids.order_by("purchase_order_id")
+            .values_list("purchase_order_id", flat=True)
             .distinct()
         )
 
-        for process in process_qs:
-            po = process.purchase_order
-            items = po.items.all()
-
-            status_map = {s.po_item_id: s for s in process.item_statuses.all()}
-
-            for item in items:
-                item_status_obj = status_map.get(item.id)
-
-                if process.department_process.has_item_tracking:
-                    row_status_obj = item_status_obj.status if item_status_obj else None
-                    status_name = row_status_obj.name if row_status_obj else item.status
-                    status_id = row_status_obj.id if row_status_obj else None
-                else:
-                    row_status_obj = process.current_status
-                    status_name = row_status_obj.name
-                    status_id = row_status_obj.id
-
-                rows.append(
-                    {
-                        "po_number": po.po_number,
-                        "po_date": po.po_date,
-                        "company": po.company.name if po.company else "—",
-                        "process": process.department_process.name,
-                        "item_description": item.material_description,
-                        "quantity": item.quantity_value,
-                        "status": status_name,
-                        "status_id": status_id,
-                    }
-                )
-
-        if status_ids:
-            status_id_set = {str(s) for s in status_ids}
-            rows = [r for r in rows if str(r["status_id"]) in status_id_set]
-
-    # ------------------------------
-    # RENDER EXCEL
-    # ------------------------------
-    html = render_to_string("po/po_process_report_excel.html", {"rows": rows})
-
-    response = HttpResponse(html)
-    response["Content-Type"] = "application/vnd.ms-excel"
-    response["Content-Disposition"] = "attachment; filename=po_process_report.xls"
+        for start in range(0, len(matching_po_ids), PROCESS_REPORT_PO_BATCH):
+            batch = matching_po_ids[start : start + PROCESS_REPORT_PO_BATCH]
+            for row in _process_report_rows(processes, batch, status_ids):
+                yield [
+                    row["po_number"],
+                    row["process"],
+                    row["item_description"],
+                    row["row_status"],
+                ]
 
-    return response
+    return stream_export(
+        "po_process_report",
+        headers,
+        rows(),
+        fmt=export_format(request),
+    )
 
 
 # =====================================================================================
@@ -1505,61 +1468,28 @@ def po_target_delete(request, pk):
 # =====================================================================================
 # PO TARGET REPORT
 # =====================================================================================
-@login_required_view
-def po_target_report(request):
-    if not request.user.is_superuser:
-        return HttpResponseForbidden()
-
+def _target_report_data(month, year):
+    """
+    One row per target of the month with its items, plus the totals —
+    cached per (month, year) for the report page and its export.
+    """
     from .models import MONTH_CHOICES
 
-    month = request.GET.get("month")
-    year = request.GET.get("year")
-
-    filter_used = bool(month and year)
-
-    data = []
-    total_target = 0
-    total_achieved = 0
-
-    if filter_used:
-        qs = (
-            POTarget.objects.select_related("purchase_order", "purchase_order__company")
-            .prefetch_related("target_items__po_item")
-            .filter(month=month, year=year)
-        )
-
+    def compute():
         month_name_map = dict(MONTH_CHOICES)
+        data = []
+        total_target = 0
+        total_achieved = 0
 
-        for target in qs:
+        for target in target_report_queryset(month, year):
             po = target.purchase_order
-
-            achieved = PurchaseOrderItem.objects.filter(
-                id__in=target.target_items.values_list("po_item_id", flat=True),
-                status="COMPLETED",
-            ).aggregate(
-                total=Coalesce(
-                    Sum(
-                        F("quantity_value") * F("material_value"),
-                        output_field=DecimalField(max_digits=15, decimal_places=2),
-                    ),
-                    Value(0),
-                    output_field=DecimalField(max_digits=15, decimal_places=2),
-                )
-            )[
-                "total"
-            ]
+            achieved = target.achieved
 
             target_val = target.target_value or 0
             pct = (achieved / target_val * 100) if target_val > 0 else 0
 
-            # Annotate items with line_total for Excel template
-            items_with_total = []
-            for ti in target.target_items.all():
-                item = ti.po_item
-                item.line_total = (item.quantity_value or 0) * (
-                    item.material_value or 0
-                )
-                items_with_total.append(item)
+            total_target += target_val
+            total_achieved += achieved
 
             data.append(
                 {
@@ -1570,10 +1500,47 @@ def po_target_report(request):
                     "target": target_val,
                     "achieved": achieved,
                     "percentage": round(pct, 2),
-                    "items": items_with_total,
+                    # line_total is annotated by the prefetch query
+                    "items": [ti.po_item for ti in target.target_items.all()],
                 }
             )
 
+        return {
+            "data": data,
+            "total_target": total_target,
+            "total_achieved": total_achieved,
+        }
+
+    return cached_report(
+        "po_target_report",
+        {"month": month, "year": year},
+        TARGET_REPORT_MODELS,
+        compute,
+    )
+
+
+@login_required_view
+def po_target_report(request):
+    if not request.user.is_superuser:
+        return HttpResponseForbidden()
+
+    from .models import MONTH_CHOICES
+
+    month = request.GET.get("month")
+    year = request.GET.get("year")
+
+    filter_used = bool(month and year)
+
+    data = []
+    total_target = 0
+    total_achieved = 0
+
+    if filter_used:
+        report = _target_report_data(month, year)
+        data = report["data"]
+        total_target = report["total_target"]
+        total_achieved = report["total_achieved"]
+
     overall_pct = (total_achieved / total_target * 100) if total_target > 0 else 0
 
     context = {
@@ -1596,74 +1563,72 @@ def po_target_report(request):
 # PO TARGET REPORT
 # =====================================================================================
 @login_required_view
+@background_export
 def po_target_report_excel(request):
     if not request.user.is_superuser:
         return HttpResponseForbidden()
 
-    from .models import MONTH_CHOICES
-
     month = request.GET.get("month")
     year = request.GET.get("year")
 
-    data = []
-
-    if month and year:
-        qs = (
-            POTarget.objects.select_related("purchase_order", "purchase_order__company")
-            .prefetch_related("target_items__po_item")
-            .filter(month=month, year=year)
-        )
-
-        month_name_map = dict(MONTH_CHOICES)
-
-        for target in qs:
-            po = target.purchase_order
+    headers = [
+        "#",
+        "PO Number",
+        "Company",
+        "Month",
+        "Year",
+        "Target (Rs.)",
+        "Achieved (Rs.)",
+        "Achievement %",
+        "Item Code",
+        "Item Description",
+        "Qty",
+        "UOM",
+        "Item Value (Rs.)",
+        "Item Status",
+    ]
 
-            achieved = PurchaseOrderItem.objects.filter(
-                id__in=target.target_items.values_list("po_item_id", flat=True),
-                status="COMPLETED",
-            ).aggregate(
-                total=Coalesce(
-                    Sum(
-                        F("quantity_value") * F("material_value"),
-                        output_field=DecimalField(max_digits=15, decimal_places=2),
-                    ),
-                    Value(0),
-                    output_field=DecimalField(max_digits=15, decimal_places=2),
-                )
-            )[
-                "total"
+    def rows():
+        if not (month and year):
+            return
+
+        report = _target_report_data(month, year)
+
+        for counter, target in enumerate(report["data"], start=1):
+            target_cells = [
+                counter,
+                target["po_number"],
+                target["company"],
+                target["month"],
+                target["year"],
+                target["target"],
+                target["achieved"],
+                f"{target['percentage']}%",
             ]
 
-            target_val = target.target_value or 0
-            pct = (achieved / target_val * 100) if target_val > 0 else 0
-
-            data.append(
-                {
-                    "po_number": po.po_number,
-                    "company": po.company.name if po.company else "—",
-                    "month": month_name_map.get(target.month, target.month),
-                    "year": target.year,
-                    "target": target_val,
-                    "achieved": achieved,
-                    "percentage": round(pct, 2),
-                    "items": [ti.po_item for ti in target.target_items.all()],
-                }
-            )
+            items = target["items"]
+            if not items:
+                yield target_cells + ["—"]
+                continue
 
-    html = render_to_string(
-        "po/po_target_report_excel.html",
-        {"data": data},
-    )
+            for index, item in enumerate(items):
+                # Target columns only on the first item row
+                lead = target_cells if index == 0 else [""] * len(target_cells)
+                yield lead + [
+                    item.material_code or "—",
+                    item.material_description,
+                    item.quantity_value,
+                    item.uom,
+                    item.line_total,
+                    item.get_status_display(),
+                ]
 
-    response = HttpResponse(html)
-    response["Content-Type"] = "application/vnd.ms-excel"
-    response["Content-Disposition"] = (
-        f'attachment; filename="PO_Target_Report_{month}_{year}.xls"'
+    return stream_export(
+        f"PO_Target_Report_{month}_{year}",
+        headers,
+        rows(),
+        fmt=export_format(request),
     )
-    response["Pragma"] = "no-cache"
-    response["Expires"] = "0"
-    return response
 
 
 # =====================================================================================
@@ -1672,106 +1637,79 @@ def po_target_report_excel(request):
 # =====================================================================================
 
 
-@login_required_view
-def po_target_yearly_report(request):
-    if not request.user.is_superuser:
-        return HttpResponseForbidden()
-
+def _yearly_report_range(request):
+    """
+    Reads ?year= (required) and ?year_to= (optional, for a multi-year
+    range). Returns (year, year_to, year_from_int, year_to_int, error);
+    the ints are None when the input is missing or invalid, and `error`
+    says why when the years are out of range.
+    """
     year = request.GET.get("year", "").strip()
-    filter_used = bool(year)
-
-    SHORT_MONTHS = [
-        "Jan",
-        "Feb",
-        "Mar",
-        "Apr",
-        "May",
-        "Jun",
-        "Jul",
-        "Aug",
-        "Sep",
-        "Oct",
-        "Nov",
-        "Dec",
-    ]
+    year_to = request.GET.get("year_to", "").strip()
 
-    data = []
-    total_target = Decimal("0")
-    total_achieved = Decimal("0")
+    try:
+        year_from_int = int(year)
+    except ValueError:
+        return year, year_to, None, None, None
 
-    if filter_used:
-        try:
-            year_int = int(year)
-        except ValueError:
-            filter_used = False
-            year_int = None
-
-        if filter_used:
-            # Build a row for every month 1-12
-            for month_num in range(1, 13):
-                # Sum all POTarget rows for this month/year
-                targets_qs = POTarget.objects.filter(month=month_num, year=year_int)
-
-                month_target = targets_qs.aggregate(
-                    total=Coalesce(
-                        Sum("target_value"),
-                        Value(0),
-                        output_field=DecimalField(max_digits=15, decimal_places=2),
-                    )
-                )["total"]
-
-                # Sum achieved (COMPLETED items) linked to those targets
-                target_ids = targets_qs.values_list("id", flat=True)
-                item_ids = POTargetItem.objects.filter(
-                    po_target_id__in=target_ids
-                ).values_list("po_item_id", flat=True)
-
-                month_achieved = PurchaseOrderItem.objects.filter(
-                    id__in=item_ids, status="COMPLETED"
-                ).aggregate(
-                    total=Coalesce(
-                        Sum(
-                            F("quantity_value") * F("material_value"),
-                            output_field=DecimalField(max_digits=15, decimal_places=2),
-                        ),
-                        Value(0),
-                        output_field=DecimalField(max_digits=15, decimal_places=2),
-                    )
-                )[
-                    "total"
-                ]
+    try:
+        year_to_int = int(year_to) if year_to else year_from_int
+    except ValueError:
+        year_to_int = year_from_int
 
-                pct = (
-                    round(month_achieved / month_target * 100, 2)
-                    if month_target > 0
-                    else 0
-                )
+    low, high = sorted((year_from_int, year_to_int))
+    if low < TARGET_YEAR_MIN or high > TARGET_YEAR_MAX:
+        error = f"Years must be between {TARGET_YEAR_MIN} and {TARGET_YEAR_MAX}."
+        return year, year_to, None, None, error
+    if high - low + 1 > YEARLY_REPORT_MAX_YEARS:
+        error = f"The report covers at most {YEARLY_REPORT_MAX_YEARS} years at a time."
+        return year, year_to, None, None, error
+
+    return year, year_to, year_from_int, year_to_int, None
 
-                total_target += month_target
-                total_achieved += month_achieved
-
-                data.append(
-                    {
-                        "month_num": month_num,
-                        "month_name": SHORT_MONTHS[month_num - 1],
-                        "year": year_int,
-                        "target": month_target,
-                        "achieved": month_achieved,
-                        "percentage": pct,
-                    }
-                )
 
-    overall_pct = (
-        round(total_achieved / total_target * 100, 2) if total_target > 0 else 0
+def _yearly_report_label(year_from_int, year_to_int):
+    low, high = sorted((year_from_int, year_to_int))
+    return str(low) if low == high else f"{low}–{high}"
+
+
+def _yearly_report(year_from_int, year_to_int):
+    """monthly_target_report(), cached per year range for the page and export."""
+    return cached_report(
+        "po_target_yearly_report",
+        {"year_from": year_from_int, "year_to": year_to_int},
+        TARGET_REPORT_MODELS,
+        lambda: monthly_target_report(year_from_int, year_to_int),
     )
 
+
+@login_required_view
+def po_target_yearly_report(request):
+    if not request.user.is_superuser:
+        return HttpResponseForbidden()
+
+    year, year_to, year_from_int, year_to_int, error = _yearly_report_range(request)
+    if error:
+        messages.error(request, error)
+    filter_used = year_from_int is not None
+
+    report = {
+        "data": [],
+        "total_target": Decimal("0"),
+        "total_achieved": Decimal("0"),
+        "overall_percentage": 0,
+    }
+    if filter_used:
+        report = _yearly_report(year_from_int, year_to_int)
+
     context = {
-        "data": data,
+        **report,
         "filter_used": filter_used,
         "year": year,
-        "total_target": total_target,
-        "total_achieved": total_achieved,
-        "overall_percentage": overall_pct,
+        "year_to": year_to,
+        "year_label": (
+            _yearly_report_label(year_from_int, year_to_int) if filter_used else ""
+        ),
     }
 
     return render(request, "po/po_target_yearly_report.html", context)
@@ -1781,111 +1719,61 @@ def po_target_yearly_report(request):
 # PO TARGET YEARLY REPORT — EXCEL EXPORT
 # =====================================================================================
 @login_required_view
+@background_export
 def po_target_yearly_report_excel(request):
     if not request.user.is_superuser:
         return HttpResponseForbidden()
 
-    year = request.GET.get("year", "").strip()
-
-    SHORT_MONTHS = [
-        "Jan",
-        "Feb",
-        "Mar",
-        "Apr",
-        "May",
-        "Jun",
-        "Jul",
-        "Aug",
-        "Sep",
-        "Oct",
-        "Nov",
-        "Dec",
+    year, year_to, year_from_int, year_to_int, error = _yearly_report_range(request)
+    if error:
+        return HttpResponseBadRequest(error)
+
+    headers = [
+        "#",
+        "Month",
+        "Year",
+        "Target (Rs.)",
+        "Achieved (Rs.)",
+        "Achievement %",
     ]
 
-    data = []
-    total_target = Decimal("0")
-    total_achieved = Decimal("0")
-
-    if year:
-        try:
-            year_int = int(year)
-        except ValueError:
-            year_int = None
-
-        if year_int:
-            for month_num in range(1, 13):
-                targets_qs = POTarget.objects.filter(month=month_num, year=year_int)
-
-                month_target = targets_qs.aggregate(
-                    total=Coalesce(
-                        Sum("target_value"),
-                        Value(0),
-                        output_field=DecimalField(max_digits=15, decimal_places=2),
-                    )
-                )["total"]
-
-                target_ids = targets_qs.values_list("id", flat=True)
-                item_ids = POTargetItem.objects.filter(
-                    po_target_id__in=target_ids
-                ).values_list("po_item_id", flat=True)
-
-                month_achieved = PurchaseOrderItem.objects.filter(
-                    id__in=item_ids, status="COMPLETED"
-                ).aggregate(
-                    total=Coalesce(
-                        Sum(
-                            F("quantity_value") * F("material_value"),
-                            output_field=DecimalField(max_digits=15, decimal_places=2),
-                        ),
-                        Value(0),
-                        output_field=DecimalField(max_digits=15, decimal_places=2),
-                    )
-                )[
-                    "total"
-                ]
-
-                pct = (
-                    round(month_achieved / month_target * 100, 2)
-                    if month_target > 0
-                    else 0
-                )
-
-                total_target += month_target
-                total_achieved += month_achieved
-
-                data.append(
-                    {
-                        "month_name": SHORT_MONTHS[month_num - 1],
-                        "year": year_int,
-                        "target": month_target,
-                        "achieved": month_achieved,
-                        "percentage": pct,
-                    }
-                )
-
-    overall_pct = (
-        round(total_achieved / total_target * 100, 2) if total_target > 0 else 0
-    )
+    if year_from_int is None:
+        return stream_export(
+            f"Target_Revenue_Yearly_{year}", headers, [], fmt=export_format(request)
+        )
 
-    html = render_to_string(
-        "po/po_target_yearly_report_excel.html",
-        {
-            "data": data,
-            "year": year,
-            "total_target": total_target,
-            "total_achieved": total_achieved,
-            "overall_percentage": overall_pct,
-        },
+    report = _yearly_report(year_from_int, year_to_int)
+    year_label = _yearly_report_label(year_from_int, year_to_int)
+
+    rows = [
+        [
+            counter,
+            row["month_name"],
+            row["year"],
+            row["target"],
+            row["achieved"],
+            f"{row['percentage']}%",
+        ]
+        for counter, row in enumerate(report["data"], start=1)
+    ]
+    rows.append(
+        [
+            "Total",
+            "",
+            "",
+            report["total_target"],
+            report["total_achieved"],
+            f"{report['overall_percentage']}%",
+        ]
     )
 
-    response = HttpResponse(html)
-    response["Content-Type"] = "application/vnd.ms-excel"
-    response["Content-Disposition"] = (
-        f'attachment; filename="Target_Revenue_Yearly_{year}.xls"'
+    return stream_export(
+        f"Target_Revenue_Yearly_{year_label.replace('–', '_')}",
+        headers,
+        rows,
+        title=f"Yearly Target & Revenue Report — {year_label}",
+        fmt=export_format(request),
     )
-    response["Pragma"] = "no-cache"
-    response["Expires"] = "0"
-    return response
 
 
 # =====================================================================================
@@ -2178,15 +2066,9 @@ def po_comments_report(request):
     filter_used = any([po_number, oa_number, date_from, date_to])
 
     # ── Base queryset — all POs, no default date ───────────────
-    qs = (
+    qs = annotate_rollup(
         PurchaseOrder.objects.select_related("company", "created_by")
-        .annotate(
-            notes_count=Count("notes", distinct=True),
-            tasks_count=Count("tasks", distinct=True),
-            comments_count=Count("comments", distinct=True),
-        )
-        .order_by("-id")
-    )
+    ).order_by("-id")
 
     # ── Apply filters only if provided ────────────────────────
     if po_number:
@@ -2223,6 +2105,7 @@ def po_comments_report(request):
 # PO COMMENTS REPORT EXCEL
 # ==============================================================
 @login_required_view
+@background_export
 def po_comments_report_excel(request):
 
     # ── Same filters as report view ────────────────────────────
@@ -2239,7 +2122,6 @@ def po_comments_report_excel(request):
             "tasks__created_by",
             "comments__po_item",
             "comments__commented_by",
-            "items",
         )
         .order_by("-id")
     )
@@ -2258,22 +2140,101 @@ def po_comments_report_excel(request):
 
     # ── Build filename ─────────────────────────────────────────
     if date_from and date_to:
-        filename = f"PO_Comments_Report_{date_from}_to_{date_to}.xls"
+        filename = f"PO_Comments_Report_{date_from}_to_{date_to}"
     elif date_from:
-        filename = f"PO_Comments_Report_from_{date_from}.xls"
+        filename = f"PO_Comments_Report_from_{date_from}"
     elif date_to:
-        filename = f"PO_Comments_Report_to_{date_to}.xls"
+        filename = f"PO_Comments_Report_to_{date_to}"
     else:
-        filename = "PO_Comments_Report_All.xls"
+        filename = "PO_Comments_Report_All"
+
+    # ── One row per note / task / item comment, PO fields repeated ──
+    headers = [
+        "#",
+        "PO Number",
+        "OA Number",
+        "Company",
+        "PO Date",
+        "PO Status",
+        "Type",
+        "Material Code",
+        "Material Description",
+        "Text",
+        "Status",
+        "By",
+        "Date",
+    ]
 
-    html = render_to_string(
-        "po/po_comments_report_excel.html",
-        {"pos": qs},
-    )
+    def full_name(user):
+        return (user.get_full_name() if user else "") or "—"
+
+    def rows():
+        for counter, po in enumerate(iter_queryset(qs), start=1):
+            po_cells = [
+                counter,
+                po.po_number,
+                po.oa_number,
+                po.company.name,
+                po.po_date,
+                po.get_po_status_display(),
+            ]
+
+            wrote = False
+
+            for note in po.notes.all():
+                wrote = True
+                yield po_cells + [
+                    "Note",
+                    "",
+                    "",
+                    note.note,
+                    "",
+                    full_name(note.created_by),
+                    note.created_at,
+                ]
+
+            for task in po.tasks.all():
+                wrote = True
+                yield po_cells + [
+                    "Task",
+                    "",
+                    "",
+                    task.task,
+                    "Completed" if task.is_completed else "Pending",
+                    full_name(task.created_by),
+                    task.updated_at,
+                ]
+
+            for c in po.comments.all():
+                if not c.po_item:
+                    continue
+                wrote = True
+                yield po_cells + [
+                    "Item Comment",
+                    c.po_item.material_code or "—",
+                    c.po_item.material_description,
+                    c.comment or "—",
+                    "",
+                    full_name(c.commented_by),
+                    c.updated_at,
+                ]
+
+            # Keep every PO in the sheet, as the old HTML export did
+            if not wrote:
+                yield po_cells + [
+                    "—",
+                    "",
+                    "",
+                    "No notes, tasks or item comments for this PO.",
+                    "",
+                    "",
+                    "",
+                ]
 
-    response = HttpResponse(html)
-    response["Content-Type"] = "application/vnd.ms-excel"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    response["Pragma"] = "no-cache"
-    response["Expires"] = "0"
-    return response
+    return stream_export(
+        filename,
+        headers,
+        rows(),
+        title="PO COMMENTS, NOTES & TASKS REPORT — Suntech ERP",
+        fmt=export_format(request),
+    )
@@ -0,0 +1,318 @@
+"""
+Benchmarks for the hot views and exports (see the `run_benchmarks`
+management command).
+
+Each case is one request made through Django's test Client as a
+superuser, against whatever data is in the database — normally the
+output of `generate_sample_data`. For every run we record wall time,
+SQL query count (with the same execute wrapper as the timing
+middleware) and peak Python memory allocated while handling it.
+Streamed exports are read to the end inside the measurement.
+
+POST cases run inside a transaction that is rolled back, so the
+benchmark never changes the data it measures. The report result cache
+is off for every request, so each run measures the full filtering and
+aggregation rather than a cache hit left by the warm-up.
+"""
+
+import datetime
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from .middleware import QueryRecorder
+
+
+class SkipCase(Exception):
+    """The data needed for a case is missing."""
+
+
+@dataclass
+class Case:
+    name: str
+    # Returns (url, data) — called once before the runs
+    build: object
+    method: str = "get"
+
+
+@dataclass
+class Result:
+    name: str
+    status: int
+    times: list = field(default_factory=list)
+    queries: int = 0
+    peak_kb: int = 0
+
+    @property
+    def median_ms(self):
+        return round(statistics.median(self.times) * 1000, 1)
+
+    @property
+    def min_ms(self):
+        return round(min(self.times) * 1000, 1)
+
+    def as_dict(self):
+        return {
+            "status": self.status,
+            "median_ms": self.median_ms,
+            "min_ms": self.min_ms,
+            "queries": self.queries,
+            "peak_kb": self.peak_kb,
+        }
+
+
+# ------------------------------
+# CASES
+# ------------------------------
+def _report_range():
+    today = datetime.date.today()
+    return {
+        "date_from": (today - datetime.timedelta(days=730)).isoformat(),
+        "date_to": today.isoformat(),
+    }
+
+
+def _year():
+    return {"year": datetime.date.today().year - 1, "year_to": datetime.date.today().year}
+
+
+def _month():
+    today = datetime.date.today()
+    return {"month": today.month, "year": today.year}
+
+
+def _tracked_process():
+    from po.models import POProcess
+
+    process = (
+        POProcess.objects.filter(department_process__has_item_tracking=True)
+        .order_by("-purchase_order_id")
+        .first()
+    )
+    if process is None:
+        raise SkipCase("no item-tracking process")
+    return process
+
+
+def _active_process_ids():
+    from master.cache import get_active_processes
+
+    return [p.pk for p in get_active_processes()]
+
+
+def _latest_po():
+    from po.models import PurchaseOrder
+
+    po = PurchaseOrder.objects.order_by("-pk").first()
+    if po is None:
+        raise SkipCase("no purchase orders")
+    return po
+
+
+def _process_update():
+    from master.cache import get_statuses
+
+    process = _tracked_process()
+    status = next((s for s in get_statuses() if not s.is_completed), None)
+    if status is None:
+        raise SkipCase("no open status")
+
+    done = dict(process.item_statuses.values_list("po_item_id", "qty_completed"))
+    data = {
+        "current_status": process.current_status_id,
+        "remark": "Benchmark",
+        "item_status": status.pk,
+    }
+    # One more unit on every item that still has quantity left
+    for item in process.purchase_order.items.all():
+        if (done.get(item.pk) or 0) + 1 <= (item.quantity_value or 0):
+            data[f"update_item_{item.pk}"] = "on"
+            data[f"qty_completed_{item.pk}"] = "1"
+    return reverse("po:po_process_update", args=[process.pk]), data
+
+
+CASES = [
+    Case("po_list", lambda: (reverse("po:po_list"), {})),
+    Case("po_list_search", lambda: (reverse("po:po_list"), {"q": "plate"})),
+    Case("po_report", lambda: (reverse("po:po_report"), _report_range())),
+    Case(
+        "po_report_items",
+        lambda: (reverse("po:po_report"), dict(_report_range(), view="items")),
+    ),
+    Case(
+        "po_process_report",
+        lambda: (
+            reverse("po:po_process_report"),
+            {"processes": _active_process_ids()},
+        ),
+    ),
+    Case("po_target_report", lambda: (reverse("po:po_target_report"), _month())),
+    Case(
+        "po_target_yearly_report",
+        lambda: (reverse("po:po_target_yearly_report"), _year()),
+    ),
+    Case(
+        "po_process_list",
+        lambda: (reverse("po:po_process_list", args=[_latest_po().pk]), {}),
+    ),
+    Case("po_process_update", _process_update, method="post"),
+    Case("bom_list", lambda: (reverse("bom:bom_list"), {})),
+    Case("indent_list", lambda: (reverse("indent:indent_list"), {})),
+    # Exports
+    Case(
+        "po_report_summary_excel",
+        lambda: (reverse("po:po_report_summary_excel"), _report_range()),
+    ),
+    Case(
+        "po_report_item_excel",
+        lambda: (reverse("po:po_report_item_excel"), _report_range()),
+    ),
+    Case(
+        "po_process_excel",
+        lambda: (reverse("po:po_process_excel", args=[_latest_po().pk]), {}),
+    ),
+    Case(
+        "po_process_report_excel",
+        lambda: (
+            reverse("po:po_process_report_excel"),
+            {"processes": _active_process_ids()},
+        ),
+    ),
+    Case(
+        "po_target_report_excel",
+        lambda: (reverse("po:po_target_report_excel"), _month()),
+    ),
+    Case(
+        "po_target_yearly_report_excel",
+        lambda: (reverse("po:po_target_yearly_report_excel"), _year()),
+    ),
+    Case(
+        "po_comments_report_excel",
+        lambda: (reverse("po:po_comments_report_excel"), _report_range()),
+    ),
+    Case("bom_report_excel", lambda: (reverse("bom:bom_report_excel"), _report_range())),
+    Case(
+        "indent_report_excel",
+        lambda: (reverse("indent:indent_report_excel"), _report_range()),
+    ),
+]
+
+
+# ------------------------------
+# RUNNER
+# ------------------------------
+def _request(client, case, url, data):
+    response = getattr(client, case.method)(url, data)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    else:
+        response.content
+    return response
+
+
+def measure(client, case, url, data, trace_memory=False):
+    """
+    One request: (response, seconds, QueryRecorder, peak bytes or None).
+    Memory tracing slows Python down, so it is a separate, untimed run.
+    """
+    recorder = QueryRecorder()
+    if trace_memory:
+        tracemalloc.start()
+
+    try:
+        with ExitStack() as stack:
+            stack.enter_context(override_settings(REPORT_CACHE_TIMEOUT=0))
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            if case.method == "post":
+                stack.enter_context(transaction.atomic())
+            start = time.perf_counter()
+            response = _request(client, case, url, data)
+            elapsed = time.perf_counter() - start
+            if case.method == "post":
+                transaction.set_rollback(True)
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    return response, elapsed, recorder, peak
+
+
+def _host():
+    """A host name the running settings accept ("testserver" usually isn't)."""
+    for host in settings.ALLOWED_HOSTS:
+        if host != "*" and not host.startswith("."):
+            return host
+    return "localhost"
+
+
+def run(user, repeat=5, only=None, log=None):
+    """
+    Runs every case (or those named in `only`) `repeat` times after one
+    warm-up request. Returns {name: Result}; skipped cases are logged.
+    """
+    client = Client(SERVER_NAME=_host())
+    client.force_login(user)
+
+    results = {}
+    for case in CASES:
+        if only and case.name not in only:
+            continue
+        try:
+            url, data = case.build()
+        except SkipCase as e:
+            if log:
+                log(f"{case.name}: skipped ({e})")
+            continue
+
+        # Warm-up: fills the master cache, compiles templates (the report
+        # cache stays off, see measure())
+        measure(client, case, url, data)
+
+        result = None
+        for _ in range(repeat):
+            response, elapsed, recorder, _ = measure(client, case, url, data)
+            if result is None:
+                result = Result(case.name, response.status_code)
+            result.times.append(elapsed)
+            result.queries = max(result.queries, recorder.count)
+
+        peak = measure(client, case, url, data, trace_memory=True)[3]
+        result.peak_kb = peak // 1024
+
+        results[case.name] = result
+        if log:
+            log(
+                f"{case.name}: {result.median_ms} ms, {result.queries} queries, "
+                f"{result.peak_kb} KB (HTTP {result.status})"
+            )
+
+    return results
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Rows of (name, current, baseline entry or None, regressions) —
+    a regression is a median time more than `tolerance` slower, or
+    more queries than the baseline.
+    """
+    rows = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        regressions = []
+        if previous:
+            if result.median_ms > previous["median_ms"] * (1 + tolerance):
+                regressions.append("time")
+            if result.queries > previous["queries"]:
+                regressions.append("queries")
+        rows.append((name, result, previous, regressions))
+    return rows
@@ -0,0 +1,285 @@
+"""
+Shared streaming export engine for report downloads.
+
+Every *_excel view builds a list of column headers and a generator of
+rows, then hands both to `stream_export`. Rows are written one at a time
+into a real .xlsx (or .csv with ?format=csv) and streamed to the client,
+while `iter_queryset` reads the database in fixed-size chunks — so memory
+stays flat however large the date range is.
+"""
+
+import csv
+import datetime
+import re
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+EXPORT_CHUNK_SIZE = 2000
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_CONTENT_TYPE = "text/csv; charset=utf-8"
+
+# Flush the zip buffer to the client once this many bytes are pending
+_FLUSH_BYTES = 64 * 1024
+
+# Characters that are not allowed in XML 1.0 documents
+_ILLEGAL_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_EXCEL_EPOCH = datetime.datetime(1899, 12, 30)
+
+# Cell style indexes defined in _STYLES_XML
+_STYLE_DATE = 1
+_STYLE_DATETIME = 2
+_STYLE_BOLD = 3
+
+_CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" '
+    'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    "</Types>"
+)
+
+_ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+
+_WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    "</Relationships>"
+)
+
+_STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="dd-mm-yyyy hh:mm"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border/></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    "</cellXfs>"
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    "</styleSheet>"
+)
+
+
+def _workbook_xml(sheet_name):
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(sheet_name[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    )
+
+
+# ======================================================
+# QUERYSET CHUNKING
+# ======================================================
+def iter_queryset(queryset, chunk_size=EXPORT_CHUNK_SIZE, pks=None):
+    """
+    Yields the objects of `queryset` in its own order, loading at most
+    `chunk_size` rows (plus their prefetches) at a time.
+
+    Only the primary keys are read up front; each chunk is then fetched by
+    pk. This keeps memory flat even on MySQL, where the default client-side
+    cursor would otherwise buffer the whole result set.
+
+    `pks` — the ordered ids already computed for this export (e.g. from
+    the report cache) — skips the up-front read.
+    """
+    if pks is None:
+        pks = list(dict.fromkeys(queryset.values_list("pk", flat=True)))
+
+    for start in range(0, len(pks), chunk_size):
+        batch = pks[start : start + chunk_size]
+        by_pk = {obj.pk: obj for obj in queryset.order_by().filter(pk__in=batch)}
+        for pk in batch:
+            obj = by_pk.get(pk)
+            if obj is not None:
+                yield obj
+
+
+# ======================================================
+# CELL / ROW ENCODING
+# ======================================================
+def _xlsx_cell(value, style=None):
+    style_attr = f' s="{style}"' if style else ""
+
+    if value is None or value == "":
+        return "<c/>"
+
+    if isinstance(value, bool):
+        return f'<c t="b"{style_attr}><v>{int(value)}</v></c>'
+
+    if isinstance(value, (int, float, Decimal)):
+        return f"<c{style_attr}><v>{value}</v></c>"
+
+    if isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            value = timezone.make_naive(value)
+        serial = (value - _EXCEL_EPOCH).total_seconds() / 86400
+        return f'<c s="{_STYLE_DATETIME}"><v>{serial}</v></c>'
+
+    if isinstance(value, datetime.date):
+        serial = (value - _EXCEL_EPOCH.date()).days
+        return f'<c s="{_STYLE_DATE}"><v>{serial}</v></c>'
+
+    text = _ILLEGAL_XML_CHARS.sub("", str(value))
+    return (
+        f'<c t="inlineStr"{style_attr}>'
+        f'<is><t xml:space="preserve">{escape(text)}</t></is></c>'
+    )
+
+
+def _xlsx_row(values, style=None):
+    cells = "".join(_xlsx_cell(v, style) for v in values)
+    return f"<row>{cells}</row>".encode("utf-8")
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            value = timezone.make_naive(value)
+        return value.strftime("%Y-%m-%d %H:%M")
+    return value
+
+
+# ======================================================
+# STREAM WRITERS
+# ======================================================
+class _ChunkSink:
+    """Write-only file object the zip writer appends to; drained by the view."""
+
+    def __init__(self):
+        self._parts = []
+        self.size = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        self.size = 0
+        return data
+
+
+def _xlsx_stream(headers, rows, title, sheet_name):
+    sink = _ChunkSink()
+
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES_XML)
+        zf.writestr("_rels/.rels", _ROOT_RELS_XML)
+        zf.writestr("xl/workbook.xml", _workbook_xml(sheet_name))
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS_XML)
+        zf.writestr("xl/styles.xml", _STYLES_XML)
+        yield sink.drain()
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b"<sheetData>"
+            )
+            if title:
+                sheet.write(_xlsx_row([title], _STYLE_BOLD))
+                sheet.write(b"<row/>")
+            sheet.write(_xlsx_row(headers, _STYLE_BOLD))
+
+            for row in rows:
+                sheet.write(_xlsx_row(row))
+                if sink.size >= _FLUSH_BYTES:
+                    yield sink.drain()
+
+            sheet.write(b"</sheetData></worksheet>")
+
+    yield sink.drain()
+
+
+class _Echo:
+    """csv.writer target that hands each encoded line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_stream(headers, rows):
+    writer = csv.writer(_Echo())
+    # BOM so Excel opens the file as UTF-8 (₹, —, etc.)
+    yield "\ufeff" + writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow([_csv_value(v) for v in row])
+
+
+# ======================================================
+# PUBLIC API
+# ======================================================
+def export_format(request):
+    """`?format=csv` switches any export to CSV; default is xlsx."""
+    return "csv" if request.GET.get("format", "").lower() == "csv" else "xlsx"
+
+
+def stream_export(
+    filename, headers, rows, title=None, fmt="xlsx", sheet_name="Report"
+):
+    """
+    Streams `rows` (an iterable of lists, ideally a generator) as a download.
+
+    `filename` is given without extension — ".xlsx" or ".csv" is appended
+    according to `fmt`. `title`, when given, is written as a bold first line
+    of the xlsx sheet (CSV output stays strictly tabular).
+    """
+    if fmt == "csv":
+        response = StreamingHttpResponse(
+            _csv_stream(headers, rows), content_type=CSV_CONTENT_TYPE
+        )
+        filename = f"{filename}.csv"
+    else:
+        response = StreamingHttpResponse(
+            _xlsx_stream(headers, rows, title, sheet_name),
+            content_type=XLSX_CONTENT_TYPE,
+        )
+        filename = f"{filename}.xlsx"
+
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response["Pragma"] = "no-cache"
+    response["Expires"] = "0"
+    return response
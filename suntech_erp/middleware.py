@@ -0,0 +1,134 @@
+"""
+Per-request timing and query instrumentation.
+
+Enabled by settings.REQUEST_TIMING. For every request it records, keyed
+by the resolved view name (e.g. "po:po_process_report"):
+
+    total     wall time of the request, in ms
+    db        time spent in SQL, in ms
+    queries   number of SQL queries
+    duplicates  queries whose SQL (without parameters) was already run
+                in the same request — the usual sign of an N+1 loop
+
+The numbers go out as a Server-Timing header (visible in the browser's
+network panel) and as one log record on the "suntech_erp.timing" logger,
+with the values in `extra` for structured log handlers.
+
+Views listed in settings.REQUEST_QUERY_BUDGETS (or any view, with
+REQUEST_QUERY_BUDGET_DEFAULT) log a warning when they run more queries
+than their budget.
+
+Queries are captured with a database execute wrapper, so this works
+without DEBUG. Queries run while a streamed response is being sent
+(exports) are not counted.
+"""
+
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger("suntech_erp.timing")
+
+
+class QueryRecorder:
+    """Execute wrapper that counts and times every query it sees."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        return sum(n - 1 for n in self.statements.values() if n > 1)
+
+    def most_repeated(self, limit=3):
+        return [(sql, n) for sql, n in self.statements.most_common(limit) if n > 1]
+
+
+def query_budget(view_name):
+    """Allowed query count for a view, or None for no limit."""
+    budgets = getattr(settings, "REQUEST_QUERY_BUDGETS", {})
+    return budgets.get(view_name, getattr(settings, "REQUEST_QUERY_BUDGET_DEFAULT", None))
+
+
+class RequestTimingMiddleware:
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_TIMING", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        total = time.perf_counter() - start
+        self._report(request, response, recorder, total)
+        return response
+
+    def _report(self, request, response, recorder, total):
+        match = request.resolver_match
+        view_name = match.view_name if match else "<unresolved>"
+
+        total_ms = round(total * 1000, 1)
+        db_ms = round(recorder.duration * 1000, 1)
+
+        response["Server-Timing"] = ", ".join(
+            [
+                f"total;dur={total_ms}",
+                f'db;dur={db_ms};desc="{recorder.count} queries, '
+                f'{recorder.duplicates} duplicate"',
+                f"app;dur={round(total_ms - db_ms, 1)}",
+            ]
+        )
+
+        record = {
+            "view": view_name,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": total_ms,
+            "db_ms": db_ms,
+            "queries": recorder.count,
+            "duplicate_queries": recorder.duplicates,
+        }
+        logger.info(
+            "%(view)s %(method)s %(status)s total=%(total_ms)sms "
+            "db=%(db_ms)sms queries=%(queries)s duplicates=%(duplicate_queries)s",
+            record,
+            extra={"timing": record},
+        )
+
+        budget = query_budget(view_name)
+        if budget is not None and recorder.count > budget:
+            logger.warning(
+                "%s ran %s queries (budget %s); most repeated: %s",
+                view_name,
+                recorder.count,
+                budget,
+                "; ".join(
+                    f"{n}x {sql[:120]}" for sql, n in recorder.most_repeated()
+                )
+                or "none",
+                extra={"timing": dict(record, budget=budget)},
+            )
@@ -0,0 +1,161 @@
+"""
+Keyset (seek) pagination for the long, newest-first list pages.
+
+Django's Paginator runs a COUNT over the full (joined, grouped) list query
+and reads each page with OFFSET, so deep pages get slower and slower.
+Here a page is "the next N rows with id below the last one shown":
+
+    ?after=<id>   older rows (Next)
+    ?before=<id>  newer rows (Previous)
+
+Each page is one indexed range read of N + 1 rows, page 200 costs the same
+as page 1, and the total shown is an estimate instead of a COUNT.
+
+Enabled by settings.KEYSET_PAGINATION; otherwise `paginate_list` falls back
+to the regular numbered Paginator.
+"""
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connection
+
+
+def _cursor(value):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def approximate_count(queryset):
+    """
+    Row count for the "Total" label without counting the list query.
+
+    An unfiltered queryset uses the table statistics on MySQL (no scan);
+    a filtered one counts the plain filtered rows — no annotations,
+    grouping or ordering.
+    """
+    if not queryset.query.where and connection.vendor == "mysql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] is not None:
+            return row[0]
+
+    return queryset.order_by().count()
+
+
+class KeysetPage:
+    """
+    One page of rows ordered by -id. Mirrors the parts of Django's Page
+    the list templates use (iteration, has_next/has_previous, start_index),
+    plus the cursors for the Next / Previous links.
+    """
+
+    is_keyset = True
+
+    def __init__(self, rows, *, has_next, has_previous, start, count_queryset):
+        self.object_list = rows
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self._start = start
+        self._count_queryset = count_queryset
+        self._count = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def start_index(self):
+        return self._start if self.object_list else 0
+
+    def end_index(self):
+        return self._start + len(self.object_list) - 1
+
+    @property
+    def next_cursor(self):
+        return self.object_list[-1].pk if self._has_next else None
+
+    @property
+    def previous_cursor(self):
+        return self.object_list[0].pk if self._has_previous else None
+
+    @property
+    def next_start(self):
+        return self._start + len(self.object_list)
+
+    @property
+    def approximate_count(self):
+        if self._count is None:
+            self._count = approximate_count(self._count_queryset)
+        return self._count
+
+
+def keyset_page(request, queryset, per_page=20, count_queryset=None):
+    """
+    The page of `queryset` (any ordering is replaced by -id) addressed by
+    ?after= / ?before=, and ?start= for the row numbering.
+    `count_queryset` is what the total is estimated from; pass the
+    filtered queryset before its annotations.
+    """
+    if count_queryset is None:
+        count_queryset = queryset
+
+    after = _cursor(request.GET.get("after"))
+    before = None if after else _cursor(request.GET.get("before"))
+    start = _cursor(request.GET.get("start")) or 1
+
+    if before:
+        rows = list(queryset.filter(pk__gt=before).order_by("pk")[: per_page + 1])
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_next = True
+        start = max(start - per_page, 1)
+        if not has_previous:
+            start = 1
+    else:
+        if after:
+            queryset = queryset.filter(pk__lt=after)
+        rows = list(queryset.order_by("-pk")[: per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = after is not None
+        if not has_previous:
+            start = 1
+
+    return KeysetPage(
+        rows,
+        has_next=has_next,
+        has_previous=has_previous,
+        start=start,
+        count_queryset=count_queryset,
+    )
+
+
+def paginate_list(request, queryset, per_page=20, count_queryset=None):
+    """
+    Page object for a newest-first list view: keyset when
+    settings.KEYSET_PAGINATION is on, Django's numbered Paginator otherwise.
+    Templates tell them apart by `page_obj.is_keyset`.
+    """
+    if getattr(settings, "KEYSET_PAGINATION", False):
+        return keyset_page(request, queryset, per_page, count_queryset)
+
+    paginator = Paginator(queryset, per_page)
+    return paginator.get_page(request.GET.get("page"))
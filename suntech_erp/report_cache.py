@@ -0,0 +1,118 @@
+"""
+Result cache for the report pages and their exports.
+
+A report's rows depend only on its filters and on the data in a few
+tables, so the computed result — the ordered ids of the matching rows
+plus the summary aggregates, or the rows themselves for the small
+reports — is cached under a key made of:
+
+  - the report name,
+  - its filters, normalized (blank values dropped, lists sorted),
+  - the current data version of every model the report reads.
+
+Paging through a report, or exporting the view on screen, then reads the
+same entry instead of filtering and aggregating again; only the rows of
+the page (or export chunk) are fetched, by primary key.
+
+Each model's version is its DataVersion row (master.versions — shared
+with the master table cache), bumped after commit whenever one of its
+rows is saved or deleted — see the signals.py of each app — and by the
+bulk write paths that bypass model signals. The versions are read from
+the database, so a bump in one worker changes the key in all of them;
+stale entries are simply never read again and expire on their own.
+
+REPORT_CACHE_TIMEOUT (seconds) bounds how long an entry lives; 0 turns
+the cache off. With a per-process backend each worker computes its own
+copy of an entry, but never serves an outdated one.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import transaction
+
+from master.versions import bump_versions, get_versions, model_label
+
+_RESULT_KEY = "reports:result:{}:{}"
+
+
+def bump_data_version(*models):
+    """Marks every cached report that reads any of `models` as stale."""
+    bump_versions(*(model_label(model) for model in models))
+
+
+def schedule_data_version_bump(*models):
+    """
+    bump_data_version() once the current transaction commits, so no
+    request can cache the old rows under the new version. Saving many
+    rows in one transaction still bumps each model only once.
+    """
+    connection = transaction.get_connection()
+    connection.__dict__.setdefault("_pending_report_bumps", set()).update(models)
+
+    def flush():
+        stale = connection.__dict__.pop("_pending_report_bumps", None)
+        if stale:
+            bump_data_version(*stale)
+
+    transaction.on_commit(flush)
+
+
+def data_versions(models):
+    """Current version of each model, in order — one query."""
+    labels = [model_label(model) for model in models]
+    versions = get_versions(labels)
+    return [versions[label] for label in labels]
+
+
+def normalize_filters(filters):
+    """
+    Filters as a stable, hashable tuple: blank values dropped, lists
+    de-duplicated and sorted, everything compared as strings.
+    """
+    normalized = []
+    for name, value in sorted(filters.items()):
+        if isinstance(value, (list, tuple, set)):
+            value = tuple(sorted({str(v) for v in value if v not in (None, "")}))
+        elif value is not None:
+            value = str(value).strip()
+        if value:
+            normalized.append((name, value))
+    return tuple(normalized)
+
+
+def cached_report(name, filters, models, compute):
+    """
+    The result of `compute()` for report `name` under `filters`, reused
+    until a row of one of `models` changes or REPORT_CACHE_TIMEOUT passes.
+    The result must be picklable; None is cached like any other value.
+    """
+    timeout = getattr(settings, "REPORT_CACHE_TIMEOUT", 0)
+    if not timeout:
+        return compute()
+
+    signature = repr((normalize_filters(filters), data_versions(models)))
+    key = _RESULT_KEY.format(name, hashlib.sha1(signature.encode()).hexdigest())
+
+    # Wrapped in a tuple so a cached None is told apart from a miss
+    hit = cache.get(key)
+    if hit is not None:
+        return hit[0]
+
+    result = compute()
+    cache.set(key, (result,), timeout)
+    return result
+
+
+def paginate_ids(request, ids, queryset, per_page):
+    """
+    Page of a cached, ordered id list, with `object_list` replaced by the
+    rows of `queryset` for that page's ids — in the cached order.
+    Counting and slicing cost nothing; the page itself is one pk lookup.
+    """
+    page_obj = Paginator(ids, per_page).get_page(request.GET.get("page"))
+    by_pk = queryset.order_by().in_bulk(list(page_obj.object_list))
+    page_obj.object_list = [by_pk[pk] for pk in page_obj.object_list if pk in by_pk]
+    return page_obj
@@ -42,9 +42,12 @@ INSTALLED_APPS = [
     "bom.apps.BomConfig",
     "indent.apps.IndentConfig",
     "notifications.apps.NotificationsConfig",
+    "jobs.apps.JobsConfig",
 ]
 
 MIDDLEWARE = [
+    # Does nothing unless REQUEST_TIMING is on (see OTHER below)
+    "suntech_erp.middleware.RequestTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -76,6 +79,25 @@ DATABASES = {
     }
 }
 
+# ==============================
+# CACHE
+# Per-process memory by default. Cached values (master tables, report
+# results, unread counts) are keyed on DataVersion rows in the database
+# (master/versions.py), so every worker stays consistent with any
+# backend; a shared one (Memcached / Redis) just avoids each worker
+# recomputing the same entry.
+# ==============================
+
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="suntech-erp"),
+    }
+}
+
 # ==============================
 # TEMPLATES
 # ==============================
@@ -145,4 +167,62 @@ LOGIN_URL = "users:login"
 # ==============================
 
 IMPORT_EXPORT_USE_TRANSACTIONS = True
+
+# PO / BOM / Indent lists: Previous/Next seek pagination on id with an
+# estimated total, instead of numbered pages (COUNT + OFFSET).
+KEYSET_PAGINATION = config("KEYSET_PAGINATION", default=False, cast=bool)
+
+# Header notifications: Server-Sent Events instead of polling. Each open
+# stream holds a worker for up to NOTIFICATIONS_STREAM_TIMEOUT seconds,
+# so only enable it on a server with threaded/async workers.
+NOTIFICATIONS_SSE_ENABLED = config("NOTIFICATIONS_SSE_ENABLED", default=False, cast=bool)
+NOTIFICATIONS_STREAM_TIMEOUT = 55
+NOTIFICATIONS_STREAM_INTERVAL = 2
+
+# Per-request timing: Server-Timing header plus one log line per request
+# (wall time, SQL time, query and duplicate-query counts per view).
+# Views running more queries than their budget log a warning.
+REQUEST_TIMING = config("REQUEST_TIMING", default=False, cast=bool)
+REQUEST_QUERY_BUDGET_DEFAULT = config("REQUEST_QUERY_BUDGET_DEFAULT", default=50, cast=int)
+REQUEST_QUERY_BUDGETS = {
+    "po:po_list": 15,
+    "po:po_report": 20,
+    "po:po_process_report": 20,
+    "po:po_target_report": 20,
+    "bom:bom_list": 15,
+    "indent:indent_list": 15,
+}
+
+# Background exports (jobs app): report pages offer "export in background"
+# once a result set has this many rows; the run_export_jobs worker writes
+# the files to MEDIA_ROOT/exports/ and deletes them after the retention.
+BACKGROUND_EXPORT_MIN_ROWS = config("BACKGROUND_EXPORT_MIN_ROWS", default=500, cast=int)
+EXPORT_JOB_RETENTION_DAYS = config("EXPORT_JOB_RETENTION_DAYS", default=7, cast=int)
+
+# Report results (matching ids + totals) cached per filter set, for paging
+# and exports; invalidated by data changes (suntech_erp/report_cache.py).
+# 0 disables. The process report caches its rows only up to the row limit.
+REPORT_CACHE_TIMEOUT = config("REPORT_CACHE_TIMEOUT", default=900, cast=int)
+REPORT_CACHE_MAX_ROWS = config("REPORT_CACHE_MAX_ROWS", default=20000, cast=int)
+
+# Master tables (statuses, processes, companies) are kept in each worker
+# and their version re-read at most this often (master/cache.py): an edit
+# shows up in other workers within this many seconds. 0 checks every lookup.
+MASTER_CACHE_RECHECK_SECONDS = config("MASTER_CACHE_RECHECK_SECONDS", default=5, cast=int)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "suntech_erp.timing": {
+            "handlers": ["console"],
+            "level": config("REQUEST_TIMING_LOG_LEVEL", default="INFO"),
+            "propagate": False,
+        },
+    },
+}
+
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
@@ -22,6 +22,7 @@ urlpatterns = [
         "notifications/",
         include(("notifications.urls", "notifications"), namespace="notifications"),
     ),
+    path("jobs/", include(("jobs.urls", "jobs"), namespace="jobs")),
 ]
 
 # Custom error pages
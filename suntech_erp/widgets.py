@@ -0,0 +1,53 @@
+from django import forms
+from django.urls import reverse
+
+
+class LookupSelect(forms.Select):
+    """
+    <select> for a ModelChoiceField with too many rows to list.
+
+    Only the empty choice and the current value are rendered; the page
+    searches the rest through the JSON endpoint named by `lookup_url`
+    (see templates/components/lookup_select.html). The field's queryset
+    is still what validates the submitted value.
+    """
+
+    def __init__(self, lookup_url, attrs=None):
+        super().__init__(attrs)
+        self.lookup_url = lookup_url
+
+    def get_context(self, name, value, attrs):
+        attrs = {**(attrs or {}), "data-lookup-url": reverse(self.lookup_url)}
+        return super().get_context(name, value, attrs)
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        selected = [v for v in value if v and str(v).isdigit()]
+
+        choices = []
+        if field.empty_label is not None:
+            choices.append(("", field.empty_label))
+        if selected:
+            choices.extend(
+                (obj.pk, field.label_from_instance(obj))
+                for obj in field.queryset.filter(pk__in=selected)
+            )
+
+        all_choices = self.choices
+        self.choices = choices
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = all_choices
+
+
+def selected_choices(queryset, values):
+    """
+    The rows of `queryset` picked in a lookup <select> (a GET value or
+    list of values), for rendering them as the selected options.
+    Non-numeric values are ignored.
+    """
+    if isinstance(values, str):
+        values = [values]
+    ids = [v for v in values or [] if str(v).isdigit()]
+    return list(queryset.filter(pk__in=ids)) if ids else []